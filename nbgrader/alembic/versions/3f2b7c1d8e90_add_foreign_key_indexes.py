@@ -0,0 +1,37 @@
+"""add foreign key indexes
+
+Revision ID: 3f2b7c1d8e90
+Revises: 9c5e4f8a2d31
+Create Date: 2026-10-18 14:03:27.450196
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2b7c1d8e90'
+down_revision = '9c5e4f8a2d31'
+branch_labels = None
+depends_on = None
+
+# foreign keys that are not already the leading column of a unique constraint
+indexes = [
+    ('assignment', 'course_id'),
+    ('notebook', 'assignment_id'),
+    ('base_cell', 'notebook_id'),
+    ('source_cell', 'notebook_id'),
+    ('submitted_assignment', 'student_id'),
+    ('submitted_notebook', 'assignment_id'),
+    ('grade', 'notebook_id'),
+    ('comment', 'notebook_id'),
+]
+
+
+def upgrade():
+    for table, column in indexes:
+        op.create_index(op.f('ix_{}_{}'.format(table, column)), table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in reversed(indexes):
+        op.drop_index(op.f('ix_{}_{}'.format(table, column)), table_name=table)
@@ -0,0 +1,118 @@
+"""store submission scores
+
+Revision ID: 6a1d0e3c5b47
+Revises: 3f2b7c1d8e90
+Create Date: 2026-10-18 16:41:05.283917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1d0e3c5b47'
+down_revision = '3f2b7c1d8e90'
+branch_labels = None
+depends_on = None
+
+columns = {
+    'submitted_notebook': [
+        ('score', sa.Float(), '0'),
+        ('code_score', sa.Float(), '0'),
+        ('written_score', sa.Float(), '0'),
+        ('task_score', sa.Float(), '0'),
+        ('needs_manual_grade', sa.Boolean(create_constraint=False), sa.false()),
+        ('failed_tests', sa.Boolean(create_constraint=False), sa.false()),
+    ],
+    'submitted_assignment': [
+        ('score', sa.Float(), '0'),
+        ('code_score', sa.Float(), '0'),
+        ('written_score', sa.Float(), '0'),
+        ('task_score', sa.Float(), '0'),
+        ('needs_manual_grade', sa.Boolean(create_constraint=False), sa.false()),
+    ],
+}
+
+
+# the tables as they are at this revision, for computing the scores of
+# existing submissions
+grade = sa.table(
+    'grade', sa.column('notebook_id'), sa.column('cell_id'), sa.column('auto_score'),
+    sa.column('manual_score'), sa.column('extra_credit'), sa.column('needs_manual_grade'))
+grade_cells = sa.table(
+    'grade_cells', sa.column('id'), sa.column('cell_type'), sa.column('max_score'))
+task_cells = sa.table('task_cells', sa.column('id'), sa.column('cell_type'))
+submitted_notebook = sa.table(
+    'submitted_notebook', sa.column('id'), sa.column('assignment_id'),
+    *[sa.column(name) for name, _, _ in columns['submitted_notebook']])
+submitted_assignment = sa.table(
+    'submitted_assignment', sa.column('id'),
+    *[sa.column(name) for name, _, _ in columns['submitted_assignment']])
+
+
+def _grade_sum(*criteria):
+    extra_credit = sa.func.coalesce(grade.c.extra_credit, 0.0)
+    score = sa.case(
+        [
+            (grade.c.manual_score != None, grade.c.manual_score + extra_credit),
+            (grade.c.auto_score != None, grade.c.auto_score + extra_credit),
+        ],
+        else_=0.0)
+    return sa.select([sa.func.coalesce(sa.func.sum(score), 0.0)])\
+        .where(sa.and_(grade.c.notebook_id == submitted_notebook.c.id, *criteria))\
+        .correlate(submitted_notebook).as_scalar()
+
+
+def _notebook_sum(column):
+    return sa.select([sa.func.coalesce(sa.func.sum(column), 0.0)])\
+        .where(submitted_notebook.c.assignment_id == submitted_assignment.c.id)\
+        .correlate(submitted_assignment).as_scalar()
+
+
+def upgrade():
+    for table, table_columns in columns.items():
+        for name, type_, default in table_columns:
+            op.add_column(table, sa.Column(name, type_, nullable=False, server_default=default))
+
+    # compute the scores of the existing submissions, like
+    # Gradebook.rebuild_aggregates does. Tables that were added to nbgrader
+    # without a migration (e.g. task cells) may not exist yet in old
+    # databases, in which case there are no such scores.
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'grade' not in tables:
+        return
+
+    values = {'score': _grade_sum()}
+    values['needs_manual_grade'] = sa.exists().where(sa.and_(
+        grade.c.notebook_id == submitted_notebook.c.id,
+        grade.c.needs_manual_grade)).correlate(submitted_notebook)
+    if 'grade_cells' in tables:
+        is_code = sa.and_(grade_cells.c.id == grade.c.cell_id, grade_cells.c.cell_type == "code")
+        values['code_score'] = _grade_sum(is_code)
+        values['written_score'] = _grade_sum(
+            grade_cells.c.id == grade.c.cell_id, grade_cells.c.cell_type == "markdown")
+        values['failed_tests'] = sa.exists().where(sa.and_(
+            grade.c.notebook_id == submitted_notebook.c.id, is_code,
+            grade.c.auto_score < sa.func.coalesce(grade_cells.c.max_score, 0.0)
+        )).correlate(submitted_notebook)
+    if 'task_cells' in tables:
+        values['task_score'] = _grade_sum(
+            task_cells.c.id == grade.c.cell_id, task_cells.c.cell_type == "markdown")
+    op.execute(submitted_notebook.update().values(values))
+
+    op.execute(submitted_assignment.update().values(
+        score=_notebook_sum(submitted_notebook.c.score),
+        code_score=_notebook_sum(submitted_notebook.c.code_score),
+        written_score=_notebook_sum(submitted_notebook.c.written_score),
+        task_score=_notebook_sum(submitted_notebook.c.task_score),
+        needs_manual_grade=sa.exists().where(sa.and_(
+            submitted_notebook.c.assignment_id == submitted_assignment.c.id,
+            submitted_notebook.c.needs_manual_grade)).correlate(submitted_assignment),
+    ))
+
+
+def downgrade():
+    for table, table_columns in columns.items():
+        with op.batch_alter_table(table) as batch_op:
+            for name, _, _ in reversed(table_columns):
+                batch_op.drop_column(name)
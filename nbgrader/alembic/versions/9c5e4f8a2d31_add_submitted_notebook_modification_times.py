@@ -0,0 +1,27 @@
+"""add submitted notebook modification times
+
+Revision ID: 9c5e4f8a2d31
+Revises: e43177bfe90b
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c5e4f8a2d31'
+down_revision = 'e43177bfe90b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('submitted_notebook', sa.Column('last_modified', sa.DateTime(), nullable=True))
+    op.add_column('submitted_notebook', sa.Column('feedback_last_modified', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('submitted_notebook') as batch_op:
+        batch_op.drop_column('feedback_last_modified')
+        batch_op.drop_column('last_modified')
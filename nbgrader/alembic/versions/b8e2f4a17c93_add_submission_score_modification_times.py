@@ -0,0 +1,37 @@
+"""add submission score modification times
+
+Revision ID: b8e2f4a17c93
+Revises: 6a1d0e3c5b47
+Create Date: 2026-10-19 10:03:27.561204
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2f4a17c93'
+down_revision = '6a1d0e3c5b47'
+branch_labels = None
+depends_on = None
+
+
+submitted_assignment = sa.table(
+    'submitted_assignment',
+    sa.column('score_last_modified', sa.DateTime()))
+
+
+def upgrade():
+    op.add_column('submitted_assignment', sa.Column('score_last_modified', sa.DateTime(), nullable=True))
+
+    # the scores of the existing submissions may have changed at any time
+    # until now, so they are all included by the next incremental export
+    op.execute(submitted_assignment.update().values(
+        score_last_modified=datetime.datetime.utcnow()))
+
+
+def downgrade():
+    with op.batch_alter_table('submitted_assignment') as batch_op:
+        batch_op.drop_column('score_last_modified')
@@ -0,0 +1,39 @@
+"""add change log
+
+Revision ID: d4f7a2c9e165
+Revises: b8e2f4a17c93
+Create Date: 2026-10-19 11:42:08.318415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f7a2c9e165'
+down_revision = 'b8e2f4a17c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'change',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('kind', sa.Enum(
+            'grade', 'comment', 'submitted_notebook', 'submitted_assignment',
+            name='change_kind'), nullable=False),
+        sa.Column('action', sa.Enum('insert', 'update', 'delete', name='change_action'), nullable=False),
+        sa.Column('object_id', sa.String(32), nullable=False),
+        sa.Column('assignment', sa.String(128)),
+        sa.Column('notebook', sa.String(128)),
+        sa.Column('student', sa.String(128)),
+        sqlite_autoincrement=True,
+    )
+
+
+def downgrade():
+    op.drop_table('change')
+    sa.Enum(name='change_action').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='change_kind').drop(op.get_bind(), checkfirst=True)
@@ -2,25 +2,35 @@ from __future__ import division
 
 from . import utils
 
+import os
 import datetime
+import itertools
+import contextlib
+import threading
 import subprocess as sp
 
 from sqlalchemy import (create_engine, ForeignKey, Column, String, Text,
                         DateTime, Interval, Float, Enum, UniqueConstraint,
-                        Boolean)
+                        Boolean, Integer, event, inspect)
 from sqlalchemy.orm import (sessionmaker, scoped_session, relationship,
-                            column_property, aliased)
+                            column_property, object_session, Session, undefer)
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.orm.exc import NoResultFound, FlushError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.associationproxy import association_proxy
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, DBAPIError
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import and_, or_
-from sqlalchemy import select, func, exists, case, literal_column, union_all
+from sqlalchemy import select, func, exists, case, literal, literal_column, null, true, union_all, bindparam
 from sqlalchemy.ext.declarative import declared_attr
 from uuid import uuid4
 from .dbutil import _temp_alembic_ini
-from typing import List, Any, Optional, Union
+from typing import List, Any, Optional, Union, Dict, Set, Tuple, Iterator, Iterable
 from .auth import Authenticator
+from .scorematrix import ScoreMatrix
+from .latepenalties import PenaltySimulation
 
 Base = declarative_base()
 
@@ -29,11 +39,28 @@ def new_uuid() -> str:
     return uuid4().hex
 
 
+_alembic_version = None  # type: Optional[str]
+
+
 def get_alembic_version() -> str:
-    with _temp_alembic_ini('sqlite:////tmp/gradebook.db') as alembic_ini:
-        output = sp.check_output(['alembic', '-c', alembic_ini, 'heads'])
-        head = output.decode().split("\n")[0].split(" ")[0]
-        return head
+    global _alembic_version
+    # the head revision does not change while nbgrader is running, so only
+    # ask alembic for it once
+    if _alembic_version is None:
+        with _temp_alembic_ini('sqlite:////tmp/gradebook.db') as alembic_ini:
+            output = sp.check_output(['alembic', '-c', alembic_ini, 'heads'])
+            _alembic_version = output.decode().split("\n")[0].split(" ")[0]
+    return _alembic_version
+
+
+def _total_seconds_late(timestamp, duedate, extension=None) -> float:
+    """The number of seconds between the (extended) duedate and the time of a
+    submission, or zero if it was submitted on time or there is no duedate."""
+    if timestamp is None or duedate is None:
+        return 0
+    if extension is not None:
+        duedate = duedate + extension
+    return max(0, (timestamp - duedate).total_seconds())
 
 
 class InvalidEntry(ValueError):
@@ -59,7 +86,7 @@ class Assignment(Base):
     duedate = Column(DateTime())
 
     #: The course for this assignment
-    course_id = Column(String(128), ForeignKey('course.id'), nullable=False)
+    course_id = Column(String(128), ForeignKey('course.id'), nullable=False, index=True)
     course = relationship("Course", back_populates="assignments")
 
     #: A collection of notebooks contained in this assignment, represented
@@ -132,7 +159,7 @@ class Notebook(Base):
     assignment = None
 
     #: Unique id of :attr:`~nbgrader.api.Notebook.assignment`
-    assignment_id = Column(String(32), ForeignKey('assignment.id'))
+    assignment_id = Column(String(32), ForeignKey('assignment.id'), index=True)
 
     #: The json string representation of the kernelspec for this notebook
     kernelspec = Column(String(1024), nullable=True)
@@ -233,7 +260,7 @@ class BaseCell(Base):
             self.grade_notebook = value
 
     #: Unique id of the :attr:`~nbgrader.api.GradeCell.notebook`
-    notebook_id = Column(String(32), ForeignKey('notebook.id'), nullable=False)
+    notebook_id = Column(String(32), ForeignKey('notebook.id'), nullable=False, index=True)
 
     #: The assignment that this cell is contained within, represented by a
     #: :class:`~nbgrader.api.Assignment` object
@@ -403,7 +430,7 @@ class SourceCell(Base):
     notebook = None
 
     #: Unique id of the :attr:`~nbgrader.api.SourceCell.notebook`
-    notebook_id = Column(String(32), ForeignKey('notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('notebook.id'), index=True)
 
     #: The assignment that this cell is contained within, represented by a
     #: :class:`~nbgrader.api.Assignment` object
@@ -512,7 +539,7 @@ class SubmittedAssignment(Base):
     student = None
 
     #: Unique id of :attr:`~nbgrader.api.SubmittedAssignment.student`
-    student_id = Column(String(128), ForeignKey('student.id'))
+    student_id = Column(String(128), ForeignKey('student.id'), index=True)
 
     #: (Optional) The date and time that the assignment was submitted, in date
     #: time format with a UTC timezone
@@ -529,7 +556,7 @@ class SubmittedAssignment(Base):
     #: The score assigned to this assignment, automatically calculated from the
     #: :attr:`~nbgrader.api.SubmittedNotebook.score` of each notebook within
     #: this submitted assignment.
-    score = None
+    score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible score of this assignment, inherited from
     #: :class:`~nbgrader.api.Assignment`
@@ -538,7 +565,7 @@ class SubmittedAssignment(Base):
     #: The code score assigned to this assignment, automatically calculated from
     #: the :attr:`~nbgrader.api.SubmittedNotebook.code_score` of each notebook
     #: within this submitted assignment.
-    code_score = None
+    code_score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible code score of this assignment, inherited from
     #: :class:`~nbgrader.api.Assignment`
@@ -547,7 +574,7 @@ class SubmittedAssignment(Base):
     #: The written score assigned to this assignment, automatically calculated
     #: from the :attr:`~nbgrader.api.SubmittedNotebook.written_score` of each
     #: notebook within this submitted assignment.
-    written_score = None
+    written_score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible written score of this assignment, inherited from
     #: :class:`~nbgrader.api.Assignment`
@@ -556,15 +583,16 @@ class SubmittedAssignment(Base):
     #: The task score assigned to this assignment, automatically calculated
     #: from the :attr:`~nbgrader.api.SubmittedNotebook.task_score` of each
     #: notebook within this submitted assignment.
-    task_score = None
+    task_score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible task score of this assignment, inherited from
     #: :class:`~nbgrader.api.Assignment`
     max_task_score = None
+
     #: Whether this assignment has parts that need to be manually graded,
     #: automatically determined from the :attr:`~nbgrader.api.SubmittedNotebook.needs_manual_grade`
     #: attribute of each notebook.
-    needs_manual_grade = None
+    needs_manual_grade = Column(Boolean, default=False, nullable=False)
 
     #: The penalty (>= 0) given for submitting the assignment late.
     #: Automatically determined from the
@@ -572,6 +600,11 @@ class SubmittedAssignment(Base):
     #: attribute of each notebook.
     late_submission_penalty = None
 
+    #: The time (in UTC) at which the :attr:`~nbgrader.api.SubmittedAssignment.score`
+    #: or the :attr:`~nbgrader.api.SubmittedAssignment.late_submission_penalty`
+    #: of this submission were last changed, or at which it was created
+    score_last_modified = Column(DateTime(), default=datetime.datetime.utcnow)
+
     @property
     def duedate(self) -> datetime.datetime:
         """The duedate of this student's assignment, which includes any extension
@@ -592,10 +625,7 @@ class SubmittedAssignment(Base):
         before the deadline, this value will just be zero.
 
         """
-        if self.timestamp is None or self.duedate is None:
-            return 0
-        else:
-            return max(0, (self.timestamp - self.duedate).total_seconds())
+        return _total_seconds_late(self.timestamp, self.assignment.duedate, self.extension)
 
     def to_dict(self):
         """Convert the submitted assignment object to a JSON-friendly dictionary
@@ -642,7 +672,7 @@ class SubmittedNotebook(Base):
     assignment = None
 
     #: Unique id of :attr:`~nbgrader.api.SubmittedNotebook.assignment`
-    assignment_id = Column(String(32), ForeignKey('submitted_assignment.id'))
+    assignment_id = Column(String(32), ForeignKey('submitted_assignment.id'), index=True)
 
     #: The master version of this notebook, represented by a
     #: :class:`~nbgrader.api.Notebook` object
@@ -669,7 +699,7 @@ class SubmittedNotebook(Base):
     #: The score assigned to this notebook, automatically calculated from the
     #: :attr:`~nbgrader.api.Grade.score` of each grade cell within
     #: this submitted notebook.
-    score = None
+    score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible score of this notebook, inherited from
     #: :class:`~nbgrader.api.Notebook`
@@ -678,7 +708,7 @@ class SubmittedNotebook(Base):
     #: The code score assigned to this notebook, automatically calculated from
     #: the :attr:`~nbgrader.api.Grade.score` and :attr:`~nbgrader.api.GradeCell.cell_type`
     #: of each grade within this submitted notebook.
-    code_score = None
+    code_score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible code score of this notebook, inherited from
     #: :class:`~nbgrader.api.Notebook`
@@ -687,26 +717,44 @@ class SubmittedNotebook(Base):
     #: The written score assigned to this notebook, automatically calculated from
     #: the :attr:`~nbgrader.api.Grade.score` and :attr:`~nbgrader.api.GradeCell.cell_type`
     #: of each grade within this submitted notebook.
-    written_score = None
+    written_score = Column(Float(), default=0.0, nullable=False)
 
     #: The maximum possible written score of this notebook, inherited from
     #: :class:`~nbgrader.api.Notebook`
     max_written_score = None
 
+    #: The task score assigned to this notebook, automatically calculated from
+    #: the :attr:`~nbgrader.api.Grade.score` and :attr:`~nbgrader.api.TaskCell.cell_type`
+    #: of each grade within this submitted notebook.
+    task_score = Column(Float(), default=0.0, nullable=False)
+
+    #: The maximum possible task score of this notebook, inherited from
+    #: :class:`~nbgrader.api.Notebook`
+    max_task_score = None
+
     #: Whether this notebook has parts that need to be manually graded,
     #: automatically determined from the :attr:`~nbgrader.api.Grade.needs_manual_grade`
     #: attribute of each grade.
-    needs_manual_grade = None
+    needs_manual_grade = Column(Boolean, default=False, nullable=False)
 
     #: Whether this notebook contains autograder tests that failed to pass,
     #: automatically determined from the :attr:`~nbgrader.api.Grade.failed_tests`
     #: attribute of each grade.
-    failed_tests = None
+    failed_tests = Column(Boolean, default=False, nullable=False)
 
     #: The penalty (>= 0) given for submitting the assignment late. Updated
     #: by the :class:`~nbgrader.plugins.LateSubmissionPlugin`.
     late_submission_penalty = Column(Float(0))
 
+    #: The time (in UTC) at which any of the :class:`~nbgrader.api.Grade` or
+    #: :class:`~nbgrader.api.Comment` objects of this notebook were last
+    #: created or changed
+    last_modified = Column(DateTime())
+
+    #: The value of :attr:`~nbgrader.api.SubmittedNotebook.last_modified` at the
+    #: time feedback was last generated for this notebook
+    feedback_last_modified = Column(DateTime())
+
     def to_dict(self):
         """Convert the submitted notebook object to a JSON-friendly dictionary
         representation. Note that this includes a key for ``student`` which is
@@ -769,7 +817,7 @@ class Grade(Base):
     notebook = None
 
     #: Unique id of :attr:`~nbgrader.api.Grade.notebook`
-    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'), index=True)
 
     #: The master version of the cell this grade is assigned to, represented by
     #: a :class:`~nbgrader.api.GradeCell` object.
@@ -904,7 +952,7 @@ class Comment(Base):
     notebook = None
 
     #: Unique id of :attr:`~nbgrader.api.Comment.notebook`
-    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'), index=True)
 
     #: The master version of the cell this comment is assigned to, represented by
     #: a :class:`~nbgrader.api.SolutionCell` object.
@@ -989,50 +1037,79 @@ class Course(Base):
     def __repr__(self):
         return "Course<{}>".format(self.id)
 
-## Needs manual grade
 
-SubmittedNotebook.needs_manual_grade = column_property(
-    exists().where(and_(
-        Grade.notebook_id == SubmittedNotebook.id,
-        Grade.needs_manual_grade))
-    .correlate_except(Grade), deferred=True)
+class Change(Base):
+    """Database representation of a change to a grade, comment or submission.
+    Changes are only ever appended to this table, whenever the gradebook
+    inserts, updates or deletes one of these objects, so that they can be
+    followed with :func:`~nbgrader.api.Gradebook.changes_since`.
 
-SubmittedAssignment.needs_manual_grade = column_property(
-    exists().where(and_(
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id,
-        Grade.needs_manual_grade))
-    .correlate_except(Grade), deferred=True)
+    """
+
+    __tablename__ = "change"
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    #: Position of the change in the log, which increases with every change
+    id = Column(Integer, primary_key=True)
+
+    #: The time at which the change was made
+    timestamp = Column(DateTime(), default=datetime.datetime.utcnow, nullable=False)
+
+    #: The kind of object that was changed, either "grade", "comment",
+    #: "submitted_notebook" or "submitted_assignment"
+    kind = Column(Enum("grade", "comment", "submitted_notebook", "submitted_assignment",
+                       name="change_kind"), nullable=False)
+
+    #: What happened to the object, either "insert", "update" or "delete"
+    action = Column(Enum("insert", "update", "delete", name="change_action"), nullable=False)
+
+    #: Unique id of the changed object
+    object_id = Column(String(32), nullable=False)
+
+    #: The name of the assignment that the object belongs to
+    assignment = Column(String(128))
+
+    #: The name of the notebook that the object belongs to, or None for
+    #: submitted assignments
+    notebook = Column(String(128))
+
+    #: The unique id of the student that the object belongs to
+    student = Column(String(128))
+
+    def to_dict(self):
+        """Convert the change object to a JSON-friendly dictionary
+        representation.
+
+        """
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp.isoformat(),
+            "kind": self.kind,
+            "action": self.action,
+            "object_id": self.object_id,
+            "assignment": self.assignment,
+            "notebook": self.notebook,
+            "student": self.student
+        }
+
+    def __repr__(self):
+        return "Change<{} {} {}>".format(self.action, self.kind, self.object_id)
+
+## Needs manual grade
 
 Notebook.needs_manual_grade = column_property(
     exists().where(and_(
         Notebook.id == SubmittedNotebook.notebook_id,
-        Grade.notebook_id == SubmittedNotebook.id,
-        Grade.needs_manual_grade))
-    .correlate_except(Grade), deferred=True)
+        SubmittedNotebook.needs_manual_grade))
+    .correlate_except(SubmittedNotebook), deferred=True)
 
 
 # Overall scores
 
-SubmittedNotebook.score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(Grade.notebook_id == SubmittedNotebook.id)
-    .correlate_except(Grade), deferred=True)
-
-SubmittedAssignment.score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id))
-    .correlate_except(Grade), deferred=True)
-
 Student.score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        SubmittedAssignment.student_id == Student.id,
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id))
-    .correlate_except(Grade), deferred=True)
+    select([func.coalesce(func.sum(SubmittedAssignment.score), 0.0)])
+    .where(SubmittedAssignment.student_id == Student.id)
+    .correlate_except(SubmittedAssignment), deferred=True)
 
 
 # Overall max scores
@@ -1067,8 +1144,8 @@ Grade.cell_type_from_gradecell = column_property(
     .correlate_except(GradeCell), deferred=True)
 
 Grade.cell_type = column_property(
-    select([func.coalesce(Grade.cell_type_from_gradecell, Grade.cell_type_from_taskcell)])
-)
+    select([func.coalesce(Grade.cell_type_from_gradecell, Grade.cell_type_from_taskcell)]),
+    deferred=True)
 
 
 Notebook.max_score_gradecell = column_property(
@@ -1084,8 +1161,7 @@ Notebook.max_score_taskcell = column_property(
         .correlate_except(TaskCell), deferred=True)
 
 Notebook.max_score = column_property(
-    Notebook.max_score_gradecell + Notebook.max_score_taskcell
-)
+    Notebook.max_score_gradecell + Notebook.max_score_taskcell, deferred=True)
 
 SubmittedNotebook.max_score = column_property(
     select([Notebook.max_score])
@@ -1109,8 +1185,7 @@ Assignment.max_score_taskcell = column_property(
     .correlate_except(TaskCell), deferred=True)
 
 Assignment.max_score = column_property(
-    Assignment.max_score_gradecell + Assignment.max_score_taskcell
-)
+    Assignment.max_score_gradecell + Assignment.max_score_taskcell, deferred=True)
 
 
 SubmittedAssignment.max_score = column_property(
@@ -1123,26 +1198,6 @@ Student.max_score = column_property(
     .correlate_except(Assignment), deferred=True)
 
 
-# Written scores
-
-SubmittedNotebook.written_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        Grade.notebook_id == SubmittedNotebook.id,
-        GradeCell.id == Grade.cell_id,
-        GradeCell.cell_type == "markdown"))
-    .correlate_except(Grade), deferred=True)
-
-SubmittedAssignment.written_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id,
-        GradeCell.id == Grade.cell_id,
-        GradeCell.cell_type == "markdown"))
-    .correlate_except(Grade), deferred=True)
-
-
 # Written max scores
 
 Notebook.max_written_score = column_property(
@@ -1173,26 +1228,6 @@ SubmittedAssignment.max_written_score = column_property(
     .correlate_except(Assignment), deferred=True)
 
 
-# Code scores
-
-SubmittedNotebook.code_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        Grade.notebook_id == SubmittedNotebook.id,
-        GradeCell.id == Grade.cell_id,
-        GradeCell.cell_type == "code"))
-    .correlate_except(Grade), deferred=True)
-
-SubmittedAssignment.code_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id,
-        GradeCell.id == Grade.cell_id,
-        GradeCell.cell_type == "code"))
-    .correlate_except(Grade), deferred=True)
-
-
 # Code max scores
 
 Notebook.max_code_score = column_property(
@@ -1222,26 +1257,6 @@ SubmittedAssignment.max_code_score = column_property(
     .where(Assignment.id == SubmittedAssignment.assignment_id)
     .correlate_except(Assignment), deferred=True)
 
-# task score
-
-SubmittedNotebook.task_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        Grade.notebook_id == SubmittedNotebook.id,
-        TaskCell.id == Grade.cell_id,
-        TaskCell.cell_type == "markdown"))
-    .correlate_except(Grade), deferred=True)
-
-SubmittedAssignment.task_score = column_property(
-    select([func.coalesce(func.sum(Grade.score), 0.0)])
-    .where(and_(
-        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-        Grade.notebook_id == SubmittedNotebook.id,
-        TaskCell.id == Grade.cell_id,
-        TaskCell.cell_type == "markdown"))
-    .correlate_except(Grade), deferred=True)
-
-
 # task max scores
 
 Notebook.max_task_score = column_property(
@@ -1268,7 +1283,8 @@ Assignment.max_task_score = column_property(
 
 SubmittedAssignment.max_task_score = column_property(
     select([func.coalesce(Assignment.max_task_score, 0.0)])
-)
+    .where(Assignment.id == SubmittedAssignment.assignment_id)
+    .correlate_except(Assignment), deferred=True)
 
 # Number of submissions
 
@@ -1301,14 +1317,8 @@ Grade.cell_type_taskcell = column_property(
 # Failed tests
 
 Grade.failed_tests = column_property(
-    (Grade.cell_type_gradecell != None) & ((Grade.auto_score < Grade.max_score_gradecell) & (Grade.cell_type_gradecell == "code"))
-)
-
-SubmittedNotebook.failed_tests = column_property(
-    exists().where(and_(
-        Grade.notebook_id == SubmittedNotebook.id,
-        Grade.failed_tests))
-    .correlate_except(Grade), deferred=True)
+    (Grade.cell_type_gradecell != None) & ((Grade.auto_score < Grade.max_score_gradecell) & (Grade.cell_type_gradecell == "code")),
+    deferred=True)
 
 
 # Late penalties
@@ -1319,6 +1329,593 @@ SubmittedAssignment.late_submission_penalty = column_property(
     .correlate_except(SubmittedNotebook), deferred=True)
 
 
+# Computed columns. These are all deferred, so that they are only computed
+# when they are accessed, unless they are loaded together with the objects
+# using undefer_computed.
+
+_computed_columns = {
+    Assignment: [
+        'max_score', 'max_code_score', 'max_written_score', 'max_task_score',
+        'num_submissions'],
+    Notebook: [
+        'max_score', 'max_code_score', 'max_written_score', 'max_task_score',
+        'needs_manual_grade', 'num_submissions'],
+    Student: ['score', 'max_score'],
+    SubmittedAssignment: [
+        'max_score', 'max_code_score', 'max_written_score', 'max_task_score',
+        'late_submission_penalty'],
+    SubmittedNotebook: [
+        'max_score', 'max_code_score', 'max_written_score', 'max_task_score'],
+    Grade: ['max_score', 'cell_type', 'failed_tests'],
+}
+
+
+def undefer_computed(cls: type) -> List[Any]:
+    """Query options that compute the scores (and other computed columns,
+    such as :attr:`~nbgrader.api.Grade.cell_type`) of the queried objects in
+    the same query that loads them. By default, each of them is computed
+    with a separate query when it is first accessed.
+
+    Parameters
+    ----------
+    cls:
+        The queried class, e.g. :class:`~nbgrader.api.Assignment`
+
+    Returns
+    -------
+    options : list
+        Options to pass to :meth:`sqlalchemy.orm.query.Query.options`
+
+    """
+    return [undefer(name) for name in _computed_columns.get(cls, [])]
+
+
+# Modification times
+
+def _touch_submitted_notebooks(connection, notebook_ids):
+    table = SubmittedNotebook.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id.in_(list(notebook_ids)))
+        .values(last_modified=datetime.datetime.utcnow()))
+
+
+def _grade_or_comment_inserted(mapper, connection, target):
+    _touch_submitted_notebooks(connection, [target.notebook_id])
+
+
+def _grade_or_comment_updated(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        _touch_submitted_notebooks(connection, [target.notebook_id])
+
+
+for _cls in (Grade, Comment):
+    event.listen(_cls, 'after_insert', _grade_or_comment_inserted)
+    event.listen(_cls, 'before_update', _grade_or_comment_updated)
+
+
+# Stored scores. The scores of submitted notebooks and assignments are stored
+# in the database rather than computed when they are loaded. They are updated
+# at the end of every flush that changes grades or the cells they refer to,
+# and can be recomputed with Gradebook.rebuild_aggregates.
+
+def _grade_sum(*criteria):
+    return select([func.coalesce(func.sum(Grade.score), 0.0)])\
+        .where(and_(Grade.notebook_id == SubmittedNotebook.id, *criteria))\
+        .correlate_except(Grade)
+
+
+def _submitted_notebook_sum(column):
+    return select([func.coalesce(func.sum(column), 0.0)])\
+        .where(SubmittedNotebook.assignment_id == SubmittedAssignment.id)\
+        .correlate_except(SubmittedNotebook)
+
+
+_submitted_notebook_aggregates = {
+    'score': _grade_sum(),
+    'code_score': _grade_sum(GradeCell.id == Grade.cell_id, GradeCell.cell_type == "code"),
+    'written_score': _grade_sum(GradeCell.id == Grade.cell_id, GradeCell.cell_type == "markdown"),
+    'task_score': _grade_sum(TaskCell.id == Grade.cell_id, TaskCell.cell_type == "markdown"),
+    'needs_manual_grade': exists().where(and_(
+        Grade.notebook_id == SubmittedNotebook.id,
+        Grade.needs_manual_grade)).correlate_except(Grade),
+    'failed_tests': exists().where(and_(
+        Grade.notebook_id == SubmittedNotebook.id,
+        Grade.failed_tests)).correlate_except(Grade),
+}
+
+_submitted_assignment_aggregates = {
+    'score': _submitted_notebook_sum(SubmittedNotebook.score),
+    'code_score': _submitted_notebook_sum(SubmittedNotebook.code_score),
+    'written_score': _submitted_notebook_sum(SubmittedNotebook.written_score),
+    'task_score': _submitted_notebook_sum(SubmittedNotebook.task_score),
+    'needs_manual_grade': exists().where(and_(
+        SubmittedNotebook.assignment_id == SubmittedAssignment.id,
+        SubmittedNotebook.needs_manual_grade)).correlate_except(SubmittedNotebook),
+}
+
+
+def _update_aggregates(connection, submitted_notebooks=None, notebooks=None,
+                       submitted_assignments=None, assignments=None):
+    """Recompute the stored scores of the given submitted notebooks (by id),
+    of the submissions of the given notebooks (by id), and of the submitted
+    assignments containing any of them. The scores of the given submitted
+    assignments (by id) and of the submissions of the given assignments (by
+    id) are recomputed from the stored scores of their notebooks. If nothing
+    is given, all scores are recomputed."""
+    notebook_table = SubmittedNotebook.__table__
+    assignment_table = SubmittedAssignment.__table__
+
+    if submitted_notebooks is None and notebooks is None and submitted_assignments is None \
+            and assignments is None:
+        notebook_where = assignment_where = None
+    else:
+        notebook_where = or_(
+            notebook_table.c.id.in_(list(submitted_notebooks or [])),
+            notebook_table.c.notebook_id.in_(list(notebooks or [])))
+        assignment_where = or_(
+            assignment_table.c.id.in_(
+                select([notebook_table.c.assignment_id]).where(notebook_where)),
+            assignment_table.c.id.in_(list(submitted_assignments or [])),
+            assignment_table.c.assignment_id.in_(list(assignments or [])))
+
+    update = notebook_table.update().values({
+        name: value.as_scalar() if hasattr(value, 'as_scalar') else value
+        for name, value in _submitted_notebook_aggregates.items()})
+    if notebook_where is not None:
+        update = update.where(notebook_where)
+    connection.execute(update)
+
+    values = [
+        (name, value.as_scalar() if hasattr(value, 'as_scalar') else value)
+        for name, value in _submitted_assignment_aggregates.items()]
+    # the modification time is compared with the old score, so it has to be
+    # set first on databases that apply the values in order (MySQL)
+    score = values[0][1]
+    values.insert(0, ('score_last_modified', case(
+        [(score != assignment_table.c.score, datetime.datetime.utcnow())],
+        else_=assignment_table.c.score_last_modified)))
+    update = assignment_table.update(preserve_parameter_order=True).values(values)
+    if assignment_where is not None:
+        update = update.where(assignment_where)
+    connection.execute(update)
+
+
+def _touch_submitted_assignments(connection, assignment_ids):
+    table = SubmittedAssignment.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id.in_(list(assignment_ids)))
+        .values(score_last_modified=datetime.datetime.utcnow()))
+
+
+def _stale_aggregates(target):
+    session = object_session(target)
+    return session.info.setdefault('nbgrader_stale_aggregates', {
+        'submitted_notebooks': set(),
+        'notebooks': set(),
+        'submitted_assignments': set(),
+    })
+
+
+def _grade_changed(mapper, connection, target):
+    _stale_aggregates(target)['submitted_notebooks'].add(target.notebook_id)
+
+
+def _grade_updated(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        _grade_changed(mapper, connection, target)
+
+
+def _cell_changed(mapper, connection, target):
+    _stale_aggregates(target)['notebooks'].add(target.notebook_id)
+
+
+def _cell_updated(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        _cell_changed(mapper, connection, target)
+
+
+def _submitted_notebook_deleted(mapper, connection, target):
+    _stale_aggregates(target)['submitted_assignments'].add(target.assignment_id)
+
+
+def _submitted_notebook_updated(mapper, connection, target):
+    # a new late penalty changes the final score of the assignment, but not
+    # the stored scores
+    if inspect(target).attrs.late_submission_penalty.history.has_changes():
+        session = object_session(target)
+        session.info.setdefault('nbgrader_penalized_assignments', set()).add(target.assignment_id)
+
+
+def _update_stale_aggregates(session, flush_context):
+    stale = session.info.pop('nbgrader_stale_aggregates', None)
+    penalized = session.info.pop('nbgrader_penalized_assignments', None)
+    if stale is None and penalized is None:
+        return
+    if stale is not None:
+        _update_aggregates(session.connection(), **stale)
+    if penalized is not None:
+        _touch_submitted_assignments(session.connection(), penalized)
+    session.info['nbgrader_updated_aggregates'] = True
+
+
+def _expire_updated_aggregates(session, flush_context):
+    updated = session.info.pop('nbgrader_updated_aggregates', None)
+    if updated is None:
+        return
+
+    # objects that are already loaded need to load the new scores
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, SubmittedNotebook):
+            names = _submitted_notebook_aggregates.keys()
+        elif isinstance(obj, SubmittedAssignment):
+            names = list(_submitted_assignment_aggregates.keys()) + ['score_last_modified']
+        else:
+            continue
+        state = inspect(obj)
+        if state.persistent:
+            session.expire(obj, [x for x in names if x not in state.unloaded])
+
+
+event.listen(Grade, 'after_insert', _grade_changed)
+event.listen(Grade, 'before_update', _grade_updated)
+event.listen(Grade, 'after_delete', _grade_changed)
+for _cls in (GradeCell, TaskCell):
+    event.listen(_cls, 'after_insert', _cell_changed)
+    event.listen(_cls, 'before_update', _cell_updated)
+    event.listen(_cls, 'after_delete', _cell_changed)
+event.listen(SubmittedNotebook, 'after_delete', _submitted_notebook_deleted)
+event.listen(SubmittedNotebook, 'before_update', _submitted_notebook_updated)
+event.listen(Session, 'after_flush', _update_stale_aggregates)
+event.listen(Session, 'after_flush_postexec', _expire_updated_aggregates)
+
+
+# Change log. Changes to grades, comments and submissions are collected by
+# the mapper events below and appended to the change table at the end of the
+# flush, so that they are committed (or rolled back) together with the change.
+
+def _change_names(session, connection, kind, target):
+    """The (assignment, notebook, student) names of the object, which are
+    looked up once per flush for each submitted notebook or assignment."""
+    if kind in ("grade", "comment"):
+        key = ("submitted_notebook", target.notebook_id)
+    elif kind == "submitted_notebook":
+        key = ("submitted_notebook", target.id)
+    else:
+        key = ("submitted_assignment", target.id)
+
+    names = session.info.setdefault('nbgrader_change_names', {})
+    if key not in names:
+        assignment = SubmittedAssignment.__table__
+        if key[0] == "submitted_notebook":
+            notebook = SubmittedNotebook.__table__
+            query = select([Assignment.name, Notebook.name, assignment.c.student_id])\
+                .select_from(notebook
+                             .join(assignment, notebook.c.assignment_id == assignment.c.id)
+                             .join(Assignment.__table__, assignment.c.assignment_id == Assignment.id)
+                             .join(Notebook.__table__, notebook.c.notebook_id == Notebook.id))\
+                .where(notebook.c.id == key[1])
+        else:
+            query = select([Assignment.name, null(), assignment.c.student_id])\
+                .select_from(assignment.join(
+                    Assignment.__table__, assignment.c.assignment_id == Assignment.id))\
+                .where(assignment.c.id == key[1])
+        names[key] = tuple(connection.execute(query).first() or (None, None, None))
+    return names[key]
+
+
+def _change_recorder(kind, action):
+    def record(mapper, connection, target):
+        session = object_session(target)
+        if action == "update" and not session.is_modified(target, include_collections=False):
+            return
+        assignment, notebook, student = _change_names(session, connection, kind, target)
+        session.info.setdefault('nbgrader_changes', []).append({
+            'timestamp': datetime.datetime.utcnow(),
+            'kind': kind,
+            'action': action,
+            'object_id': target.id,
+            'assignment': assignment,
+            'notebook': notebook,
+            'student': student,
+        })
+    return record
+
+
+def _discard_changes(session, flush_context, instances):
+    # changes left over from a flush that failed
+    session.info.pop('nbgrader_changes', None)
+    session.info.pop('nbgrader_change_names', None)
+
+
+def _insert_changes(session, flush_context):
+    session.info.pop('nbgrader_change_names', None)
+    changes = session.info.pop('nbgrader_changes', None)
+    if changes:
+        session.connection().execute(Change.__table__.insert(), changes)
+
+
+for _cls, _kind in ((Grade, "grade"), (Comment, "comment"),
+                    (SubmittedNotebook, "submitted_notebook"),
+                    (SubmittedAssignment, "submitted_assignment")):
+    event.listen(_cls, 'after_insert', _change_recorder(_kind, "insert"))
+    event.listen(_cls, 'before_update', _change_recorder(_kind, "update"))
+    # the names are looked up before the rows are gone
+    event.listen(_cls, 'before_delete', _change_recorder(_kind, "delete"))
+event.listen(Session, 'before_flush', _discard_changes)
+event.listen(Session, 'after_flush', _insert_changes)
+
+
+# Bulk imports
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _upsert_statement(connection, table, key, columns):
+    """An INSERT statement for rows with the given columns, which updates the
+    row with the same key instead if there is one, using the upsert syntax of
+    the database where SQLAlchemy supports it."""
+    dialect = connection.dialect.name
+    try:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            # only available from SQLAlchemy 1.4
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+        else:
+            return table.insert()
+    except ImportError:
+        return table.insert()
+
+    statement = insert(table)
+    names = [x for x in columns if x != key] or [key]
+    if dialect == "mysql":
+        return statement.on_duplicate_key_update(
+            {x: statement.inserted[x] for x in names})
+    return statement.on_conflict_do_update(
+        index_elements=[key], set_={x: statement.excluded[x] for x in names})
+
+
+# Bulk updates and deletes. These change many rows with a fixed number of
+# statements, however many submissions there are. They bypass the mapper
+# events above, so the changes are recorded in the change log here, and the
+# callers update the stored scores that depend on them.
+
+def _record_changes(connection, kind, action, table, notebook_id, assignment_id, where):
+    """Append a change to the change log for each row of ``table`` that
+    matches ``where``, where ``notebook_id`` is the column of the row with
+    the id of its submitted notebook (if any) and ``assignment_id`` is the
+    column with the id of its submitted assignment."""
+    submitted_notebook = SubmittedNotebook.__table__
+    submitted_assignment = SubmittedAssignment.__table__
+    columns = [
+        literal(datetime.datetime.utcnow()).label('timestamp'),
+        literal(kind).label('kind'),
+        literal(action).label('action'),
+        table.c.id,
+        Assignment.__table__.c.name,
+        Notebook.__table__.c.name if notebook_id is not None else null(),
+        submitted_assignment.c.student_id,
+    ]
+
+    joined = table
+    if notebook_id is not None:
+        if table is not submitted_notebook:
+            joined = joined.join(submitted_notebook, submitted_notebook.c.id == notebook_id)
+        joined = joined.join(Notebook.__table__, Notebook.__table__.c.id == submitted_notebook.c.notebook_id)
+    if table is not submitted_assignment:
+        joined = joined.join(submitted_assignment, submitted_assignment.c.id == assignment_id)
+    joined = joined.join(
+        Assignment.__table__, Assignment.__table__.c.id == submitted_assignment.c.assignment_id)
+
+    connection.execute(Change.__table__.insert().from_select(
+        ['timestamp', 'kind', 'action', 'object_id', 'assignment', 'notebook', 'student'],
+        select(columns).select_from(joined).where(where)))
+
+
+def _select_ids(connection, table, where) -> List[Any]:
+    """The ids of the rows of ``table`` that match ``where``."""
+    return [x for x, in connection.execute(select([table.c.id]).where(where))]
+
+
+def _delete_submitted_notebooks(connection, where) -> Dict[type, List[Any]]:
+    """Delete the submitted notebooks that match ``where`` (a condition on
+    the submitted notebook table), with their grades and comments. Returns
+    the ids of the deleted objects, by class."""
+    submitted_notebook = SubmittedNotebook.__table__
+    notebook_ids = select([submitted_notebook.c.id]).where(where)
+    deleted = {}  # type: Dict[type, List[Any]]
+    for cls, kind in ((Grade, "grade"), (Comment, "comment")):
+        table = cls.__table__
+        deleted[cls] = _select_ids(connection, table, table.c.notebook_id.in_(notebook_ids))
+        _record_changes(
+            connection, kind, "delete", table, table.c.notebook_id, submitted_notebook.c.assignment_id,
+            table.c.notebook_id.in_(notebook_ids))
+        connection.execute(table.delete().where(table.c.notebook_id.in_(notebook_ids)))
+
+    deleted[SubmittedNotebook] = _select_ids(connection, submitted_notebook, where)
+    _record_changes(
+        connection, "submitted_notebook", "delete", submitted_notebook, submitted_notebook.c.id,
+        submitted_notebook.c.assignment_id, where)
+    connection.execute(submitted_notebook.delete().where(where))
+    return deleted
+
+
+def _delete_submissions(connection, where) -> Dict[type, List[Any]]:
+    """Delete the submitted assignments that match ``where`` (a condition on
+    the submitted assignment table), with all of their notebooks. Returns the
+    ids of the deleted objects, by class."""
+    submitted_assignment = SubmittedAssignment.__table__
+    deleted = _delete_submitted_notebooks(
+        connection,
+        SubmittedNotebook.__table__.c.assignment_id.in_(
+            select([submitted_assignment.c.id]).where(where)))
+
+    deleted[SubmittedAssignment] = _select_ids(connection, submitted_assignment, where)
+    _record_changes(
+        connection, "submitted_assignment", "delete", submitted_assignment, None,
+        submitted_assignment.c.id, where)
+    connection.execute(submitted_assignment.delete().where(where))
+    return deleted
+
+
+def _delete_notebooks(connection, where) -> Dict[type, List[Any]]:
+    """Delete the master versions of the notebooks that match ``where`` (a
+    condition on the notebook table), with their cells. Their submissions
+    must have been deleted already. Returns the ids of the deleted objects,
+    by class (all cells are under :class:`BaseCell`)."""
+    notebook_ids = select([Notebook.__table__.c.id]).where(where)
+    base_cell = BaseCell.__table__
+    source_cell = SourceCell.__table__
+    deleted = {
+        BaseCell: _select_ids(connection, base_cell, base_cell.c.notebook_id.in_(notebook_ids)),
+        SourceCell: _select_ids(connection, source_cell, source_cell.c.notebook_id.in_(notebook_ids)),
+        Notebook: _select_ids(connection, Notebook.__table__, where),
+    }  # type: Dict[type, List[Any]]
+
+    cell_ids = select([base_cell.c.id]).where(base_cell.c.notebook_id.in_(notebook_ids))
+    for cls in (GradeCell, SolutionCell, TaskCell):
+        table = cls.__table__
+        connection.execute(table.delete().where(table.c.id.in_(cell_ids)))
+    connection.execute(base_cell.delete().where(base_cell.c.notebook_id.in_(notebook_ids)))
+    connection.execute(source_cell.delete().where(source_cell.c.notebook_id.in_(notebook_ids)))
+    connection.execute(Notebook.__table__.delete().where(where))
+    return deleted
+
+
+# Engines (and their connection pools) are shared by all the gradebooks in a
+# process that connect to the same database
+_engines = {}  # type: Dict[str, Engine]
+_engines_pid = None  # type: Optional[int]
+_engines_lock = threading.Lock()
+
+# (database, course) pairs for which the schema is known to be up to date and
+# the course exists, so that opening another gradebook does not touch the
+# database at all
+_checked_databases = set()  # type: Set[Tuple[str, str]]
+
+
+def _is_memory_db(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _engine_key(db_url: str) -> str:
+    url = make_url(db_url)
+    if url.get_backend_name() == 'sqlite' and not _is_memory_db(db_url):
+        # relative paths are resolved against the current directory (URLs
+        # are immutable in SQLAlchemy 1.4 and later)
+        database = os.path.abspath(url.database)
+        if hasattr(url, 'set'):
+            url = url.set(database=database)
+        else:
+            url.database = database
+    return str(url)
+
+
+def get_engine(db_url: str) -> Engine:
+    """Get the engine that is shared by all gradebooks in this process that
+    connect to ``db_url``, creating it if necessary. In-memory SQLite
+    databases are never shared, as each engine has its own database.
+
+    Parameters
+    ----------
+    db_url:
+        The URL to the database, e.g. ``sqlite:///grades.db``
+
+    Returns
+    -------
+    engine : :class:`sqlalchemy.engine.Engine`
+
+    """
+    global _engines_pid
+
+    if _is_memory_db(db_url):
+        return create_engine(db_url, echo=False)
+
+    url = make_url(_engine_key(db_url))
+    with _engines_lock:
+        # pooled connections must not be shared with the parent of a forked
+        # process, so a child process starts with its own engines
+        if _engines_pid != os.getpid():
+            _engines.clear()
+            _checked_databases.clear()
+            _engines_pid = os.getpid()
+
+        engine = _engines.get(str(url))
+        if engine is None:
+            if url.get_backend_name() == 'sqlite':
+                # pool SQLite connections too (by default, a new connection
+                # is opened for every session); the pool makes sure that a
+                # connection is only used by one thread at a time, and never
+                # blocks waiting for a connection to be returned
+                engine = create_engine(
+                    url, echo=False, poolclass=QueuePool, max_overflow=-1,
+                    connect_args={'check_same_thread': False})
+            else:
+                engine = create_engine(url, echo=False)
+            _engines[str(url)] = engine
+        return engine
+
+
+def dispose_engines(db_url: Optional[str] = None) -> None:
+    """Close the pooled connections of the shared engines, e.g. before the
+    database file is removed or replaced. This also forgets that the schema
+    of the database has been checked, so it is checked again by the next
+    :class:`~nbgrader.api.Gradebook`.
+
+    Parameters
+    ----------
+    db_url:
+        The URL of the database whose engine should be disposed. If not
+        given, all the shared engines are disposed.
+
+    """
+    with _engines_lock:
+        if _engines_pid != os.getpid():
+            return
+        if db_url is None:
+            engines = list(_engines.values())
+            _engines.clear()
+            _checked_databases.clear()
+        else:
+            key = _engine_key(db_url)
+            engine = _engines.pop(key, None)
+            engines = [engine] if engine is not None else []
+            for checked in [x for x in _checked_databases if x[0] == key]:
+                _checked_databases.remove(checked)
+    for engine in engines:
+        engine.dispose()
+
+
+class _GradebookSession(Session):
+    """A session whose commits can be deferred by
+    :func:`Gradebook.transaction`, so that the changes of several gradebook
+    methods (which each commit their own changes) are committed together."""
+
+    def commit(self):
+        if self.info.get('nbgrader_transaction'):
+            self.flush()
+        else:
+            super(_GradebookSession, self).commit()
+
+    def rollback(self):
+        # the changes of the earlier methods are rolled back as well, so the
+        # transaction must not be committed
+        if self.info.get('nbgrader_transaction'):
+            self.info['nbgrader_transaction_failed'] = True
+        super(_GradebookSession, self).rollback()
+
+
 class Gradebook(object):
     """The gradebook object to interface with the database holding
     nbgrader grades.
@@ -1344,9 +1941,49 @@ class Gradebook(object):
 
         """
         # create the connection to the database
-        self.engine = create_engine(db_url, echo=False)
-        self.db = scoped_session(sessionmaker(autoflush=True, bind=self.engine))
+        self.engine = get_engine(db_url)
+        self._shared_engine = not _is_memory_db(db_url)
+        self.db = scoped_session(sessionmaker(
+            autoflush=True, bind=self.engine, class_=_GradebookSession))
+
+        # the schema and the course only need to be checked once per process
+        checked = (_engine_key(db_url), course_id) if self._shared_engine else None
+        if checked not in _checked_databases:
+            # tables that were added since the last migration of the database
+            # are created here rather than by alembic
+            self._create_schema()
+            self.check_course(course_id=course_id)
+            # an outdated database is not cached, so that errors due to the
+            # missing columns are reported consistently
+            if checked is not None and self._schema_is_current():
+                with _engines_lock:
+                    _checked_databases.add(checked)
 
+        self.course_id = course_id
+        self.authenticator = authenticator
+
+    def _forget_deleted(self, deleted: Dict[type, List[Any]]) -> None:
+        """Remove the objects whose rows were deleted without the ORM (their
+        ids, by class) from the session, so that they keep their loaded state
+        like objects that were deleted with the ORM."""
+        for cls, ids in deleted.items():
+            for obj_id in ids:
+                obj = self.db.identity_map.get(identity_key(cls, obj_id))
+                if obj is not None:
+                    self.db.expunge(obj)
+
+    def _schema_is_current(self) -> bool:
+        """Whether the database is stamped with the current alembic
+        revision."""
+        try:
+            version = self.db.execute("SELECT version_num FROM alembic_version").scalar()
+        except DBAPIError:
+            self.db.rollback()
+            return False
+        self.db.commit()
+        return version == get_alembic_version()
+
+    def _create_schema(self) -> None:
         # this creates all the tables in the database if they don't already exist
         db_exists = len(self.engine.table_names()) > 0
         Base.metadata.create_all(bind=self.engine)
@@ -1358,10 +1995,6 @@ class Gradebook(object):
             self.db.execute("INSERT INTO alembic_version (version_num) VALUES ('{}');".format(alembic_version))
             self.db.commit()
 
-        self.check_course(course_id=course_id)
-        self.course_id = course_id
-        self.authenticator = authenticator
-
     def __enter__(self) -> 'Gradebook':
         return self
 
@@ -1376,9 +2009,54 @@ class Gradebook(object):
         gradebook without closing them, you may run into errors where there
         are too many open connections to the database.
 
+        The connection is returned to the pool of the engine that is shared
+        with other gradebooks for the same database (see
+        :func:`~nbgrader.api.dispose_engines`).
+
         """
         self.db.remove()
-        self.engine.dispose()
+        if not self._shared_engine:
+            self.engine.dispose()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator['Gradebook']:
+        """Apply the changes made by the gradebook methods called in this
+        context in a single transaction, which is committed at the end of the
+        context, e.g.::
+
+            with gb.transaction():
+                gb.add_submission('ps1', 'hacker123')
+                gb.add_submission('ps1', 'bitdiddle')
+
+        If an exception is raised, or any of the methods fails and rolls back
+        its changes, none of the changes are committed. Nested transactions
+        are part of the outermost one.
+
+        """
+        session = self.db()
+        if session.info.get('nbgrader_transaction'):
+            yield self
+            return
+
+        session.info['nbgrader_transaction'] = True
+        try:
+            yield self
+            failed = session.info.get('nbgrader_transaction_failed', False)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            session.info.pop('nbgrader_transaction', None)
+            session.info.pop('nbgrader_transaction_failed', None)
+            if failed:
+                self.db.rollback()
+        if failed:
+            raise InvalidEntry("The transaction was rolled back")
+        try:
+            self.db.commit()
+        except (IntegrityError, FlushError) as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
 
     def check_course(self, course_id: str = "default_course", **kwargs: dict) -> Course:
         """Set the course id
@@ -1413,14 +2091,126 @@ class Gradebook(object):
             raise InvalidEntry(*e.args)
         return course
 
+    def _query(self, cls: type, computed: bool = False) -> Any:
+        query = self.db.query(cls)
+        if computed:
+            query = query.options(*undefer_computed(cls))
+        return query
+
+    def _stream(self, query: Any, cls: type, batch_size: int, tuples: bool) -> Iterator[Any]:
+        if tuples:
+            query = query.with_entities(*cls.__table__.columns)
+        # yield_per also asks for a server-side cursor where the database
+        # driver supports it (e.g. psycopg2), so that the rows are not all
+        # buffered by the driver either
+        for row in query.yield_per(batch_size):
+            yield row
+
+    def _bulk_update_or_create(self,
+                               cls: type,
+                               key: str,
+                               rows: Iterable[Dict[str, Any]],
+                               batch_size: int,
+                               defaults: Dict[str, Any]) -> Dict[str, int]:
+        table = cls.__table__
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        for chunk in _chunks(rows, batch_size):
+            # later rows for the same key take precedence
+            merged = {}  # type: Dict[Any, Dict[str, Any]]
+            for row in chunk:
+                unknown = [x for x in row if x not in table.c]
+                if unknown:
+                    raise InvalidEntry("Unknown columns for {}: {}".format(
+                        table.name, ", ".join(unknown)))
+                if row.get(key) is None:
+                    raise InvalidEntry("Missing {} for {}: {}".format(key, table.name, row))
+                merged.setdefault(row[key], {}).update(row)
+
+            connection = self.db.connection()
+            existing = {
+                x[key]: x for x in connection.execute(
+                    select([table]).where(table.c[key].in_(list(merged))))}
+
+            # rows are written in groups with the same columns, so that each
+            # group is a single executemany
+            inserted = {}  # type: Dict[Tuple[str, ...], List[Dict[str, Any]]]
+            updated = {}  # type: Dict[Tuple[str, ...], List[Dict[str, Any]]]
+            for value, row in merged.items():
+                old = existing.get(value)
+                if old is None:
+                    row = dict(defaults, **row)
+                    inserted.setdefault(tuple(sorted(row)), []).append(row)
+                elif any(old[name] != row[name] for name in row):
+                    row = {name: row[name] for name in row if name != key}
+                    row["_key"] = value
+                    updated.setdefault(tuple(sorted(row)), []).append(row)
+                else:
+                    summary["unchanged"] += 1
+
+            try:
+                for columns, group in inserted.items():
+                    connection.execute(_upsert_statement(connection, table, key, columns), group)
+                    summary["inserted"] += len(group)
+                for columns, group in updated.items():
+                    connection.execute(
+                        table.update().where(table.c[key] == bindparam("_key")), group)
+                    summary["updated"] += len(group)
+                self.db.commit()
+            except (IntegrityError, DBAPIError) as e:
+                self.db.rollback()
+                raise InvalidEntry(*e.args)
+
+        return summary
+
+    def rebuild_aggregates(self) -> None:
+        """Recompute the scores that are stored for each submitted notebook
+        and assignment (such as :attr:`~nbgrader.api.SubmittedNotebook.score`
+        and :attr:`~nbgrader.api.SubmittedAssignment.needs_manual_grade`).
+        These are normally kept up to date whenever grades are changed through
+        the gradebook, so this is only needed if the database was modified
+        in some other way.
+
+        """
+        _update_aggregates(self.db.connection())
+        self.db.commit()
+        self.db.expire_all()
+
     #### Students
 
     @property
     def students(self) -> List[Student]:
         """A list of all students in the database."""
+        return self._students_query().all()
+
+    def _students_query(self) -> Any:
         return self.db.query(Student)\
-            .order_by(Student.last_name, Student.first_name)\
-            .all()
+            .order_by(Student.last_name, Student.first_name)
+
+    def iter_students(self, batch_size: int = 1000, tuples: bool = False) -> Iterator[Any]:
+        """Iterate over all students in the database, in the same order as
+        :attr:`~nbgrader.api.Gradebook.students`, fetching ``batch_size``
+        students from the database at a time.
+
+        The gradebook should not be modified until the iteration is done.
+
+        Parameters
+        ----------
+        batch_size:
+            the number of rows to fetch from the database at a time
+        tuples:
+            whether to return named tuples of the columns of the student
+            table (e.g. ``row.id``, ``row.last_name``) instead of
+            :class:`~nbgrader.api.Student` objects, which is faster for
+            read-only access
+
+        Returns
+        -------
+        students:
+            An iterator over :class:`~nbgrader.api.Student` objects or tuples
+
+        """
+        return self._stream(self._students_query(), Student, batch_size, tuples)
 
     def add_student(self, student_id: str, **kwargs: dict) -> Student:
         """Add a new student to the database.
@@ -1450,13 +2240,16 @@ class Gradebook(object):
 
         return student
 
-    def find_student(self, student_id: str) -> Student:
+    def find_student(self, student_id: str, computed: bool = False) -> Student:
         """Find a student.
 
         Parameters
         ----------
         student_id:
             The unique id of the student
+        computed:
+            whether to compute the scores of the student right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -1465,7 +2258,7 @@ class Gradebook(object):
         """
 
         try:
-            student = self.db.query(Student)\
+            student = self._query(Student, computed)\
                 .filter(Student.id == student_id)\
                 .one()
         except NoResultFound:
@@ -1510,6 +2303,43 @@ class Gradebook(object):
 
         return student
 
+    def update_or_create_students(self,
+                                  students: Iterable[Dict[str, Any]],
+                                  batch_size: int = 1000) -> Dict[str, int]:
+        """Update existing students, or create them if they don't exist. This
+        is equivalent to calling
+        :func:`~nbgrader.api.Gradebook.update_or_create_student` for each
+        student, but the students are written ``batch_size`` at a time, with
+        one transaction for each batch, which is much faster for large
+        rosters.
+
+        Parameters
+        ----------
+        students:
+            dictionaries with the unique ``id`` of each student, and any other
+            columns of the :class:`~nbgrader.api.Student` table to set.
+            Columns that are not given are left unchanged for existing
+            students.
+        batch_size:
+            the number of students to write in each transaction
+
+        Returns
+        -------
+        summary:
+            A dictionary with the number of students that were ``inserted``,
+            ``updated`` and ``unchanged``
+
+        """
+        def rows():
+            for student in students:
+                # make sure the students are in the course, even if they
+                # are already in the database
+                if self.authenticator and student.get("id") is not None:
+                    self.authenticator.add_student_to_course(student["id"], self.course_id)
+                yield student
+
+        return self._bulk_update_or_create(Student, "id", rows(), batch_size, {})
+
     def remove_student(self, student_id):
         """Deletes an existing student from the gradebook, including any
         submissions the might be associated with that student.
@@ -1526,12 +2356,14 @@ class Gradebook(object):
 
         student = self.find_student(student_id)
 
-        for submission in student.submissions:
-            self.remove_submission(submission.assignment.name, student_id)
-
-        self.db.delete(student)
-
         try:
+            self.db.flush()
+            connection = self.db.connection()
+            deleted = _delete_submissions(
+                connection, SubmittedAssignment.__table__.c.student_id == student.id)
+            connection.execute(Student.__table__.delete().where(Student.__table__.c.id == student.id))
+            deleted[Student] = [student.id]
+            self._forget_deleted(deleted)
             self.db.commit()
         except (IntegrityError, FlushError) as e:
             self.db.rollback()
@@ -1574,13 +2406,16 @@ class Gradebook(object):
             raise InvalidEntry(*e.args)
         return assignment
 
-    def find_assignment(self, name: str) -> Assignment:
+    def find_assignment(self, name: str, computed: bool = False) -> Assignment:
         """Find an assignment in the gradebook.
 
         Parameters
         ----------
         name:
             the unique name of the assignment
+        computed:
+            whether to compute the scores of the assignment right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -1589,7 +2424,7 @@ class Gradebook(object):
         """
 
         try:
-            assignment = self.db.query(Assignment)\
+            assignment = self._query(Assignment, computed)\
                 .filter(Assignment.name == name)\
                 .one()
         except NoResultFound:
@@ -1631,6 +2466,41 @@ class Gradebook(object):
 
         return assignment
 
+    def update_or_create_assignments(self,
+                                     assignments: Iterable[Dict[str, Any]],
+                                     batch_size: int = 1000) -> Dict[str, int]:
+        """Update existing assignments, or create them if they don't exist.
+        This is equivalent to calling
+        :func:`~nbgrader.api.Gradebook.update_or_create_assignment` for each
+        assignment, but the assignments are written ``batch_size`` at a time,
+        with one transaction for each batch.
+
+        Parameters
+        ----------
+        assignments:
+            dictionaries with the unique ``name`` of each assignment, and any
+            other columns of the :class:`~nbgrader.api.Assignment` table to
+            set (such as ``duedate``). Columns that are not given are left
+            unchanged for existing assignments.
+        batch_size:
+            the number of assignments to write in each transaction
+
+        Returns
+        -------
+        summary:
+            A dictionary with the number of assignments that were
+            ``inserted``, ``updated`` and ``unchanged``
+
+        """
+        def rows():
+            for assignment in assignments:
+                if 'duedate' in assignment:
+                    assignment = dict(assignment, duedate=utils.parse_utc(assignment['duedate']))
+                yield assignment
+
+        return self._bulk_update_or_create(
+            Assignment, "name", rows(), batch_size, {"course_id": self.course_id})
+
     def remove_assignment(self, name):
         """Deletes an existing assignment from the gradebook, including any
         submissions the might be associated with that assignment.
@@ -1643,15 +2513,17 @@ class Gradebook(object):
         """
         assignment = self.find_assignment(name)
 
-        for submission in assignment.submissions:
-            self.remove_submission(name, submission.student.id)
-
-        for notebook in assignment.notebooks:
-            self.remove_notebook(notebook.name, name)
-
-        self.db.delete(assignment)
-
         try:
+            self.db.flush()
+            connection = self.db.connection()
+            deleted = _delete_submissions(
+                connection, SubmittedAssignment.__table__.c.assignment_id == assignment.id)
+            deleted.update(_delete_notebooks(
+                connection, Notebook.__table__.c.assignment_id == assignment.id))
+            connection.execute(
+                Assignment.__table__.delete().where(Assignment.__table__.c.id == assignment.id))
+            deleted[Assignment] = [assignment.id]
+            self._forget_deleted(deleted)
             self.db.commit()
         except (IntegrityError, FlushError) as e:
             self.db.rollback()
@@ -1687,7 +2559,7 @@ class Gradebook(object):
             raise InvalidEntry(*e.args)
         return notebook
 
-    def find_notebook(self, name: str, assignment: str) -> Notebook:
+    def find_notebook(self, name: str, assignment: str, computed: bool = False) -> Notebook:
         """Find a particular notebook in an assignment.
 
         Parameters
@@ -1696,6 +2568,9 @@ class Gradebook(object):
             the name of the notebook
         assignment:
             the name of the assignment
+        computed:
+            whether to compute the scores of the notebook right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -1704,7 +2579,7 @@ class Gradebook(object):
         """
 
         try:
-            notebook = self.db.query(Notebook)\
+            notebook = self._query(Notebook, computed)\
                 .join(Assignment, Assignment.id == Notebook.assignment_id)\
                 .filter(Notebook.name == name, Assignment.name == assignment)\
                 .one()
@@ -1760,20 +2635,15 @@ class Gradebook(object):
         """
         notebook = self.find_notebook(name, assignment)
 
-        for submission in notebook.submissions:
-            self.remove_submission_notebook(name, assignment, submission.student.id)
-
-        for grade_cell in notebook.grade_cells:
-            self.db.delete(grade_cell)
-        for solution_cell in notebook.solution_cells:
-            self.db.delete(solution_cell)
-        for source_cell in notebook.source_cells:
-            self.db.delete(source_cell)
-        for task_cell in notebook.task_cells:
-            self.db.delete(task_cell)
-        self.db.delete(notebook)
-
         try:
+            self.db.flush()
+            connection = self.db.connection()
+            deleted = _delete_submitted_notebooks(
+                connection, SubmittedNotebook.__table__.c.notebook_id == notebook.id)
+            deleted.update(_delete_notebooks(connection, Notebook.__table__.c.id == notebook.id))
+            # the submissions of the assignment no longer include the notebook
+            _update_aggregates(connection, assignments=[notebook.assignment_id])
+            self._forget_deleted(deleted)
             self.db.commit()
         except (IntegrityError, FlushError) as e:
             self.db.rollback()
@@ -2274,7 +3144,7 @@ class Gradebook(object):
 
         return submission
 
-    def find_submission(self, assignment: str, student: str) -> SubmittedAssignment:
+    def find_submission(self, assignment: str, student: str, computed: bool = False) -> SubmittedAssignment:
         """Find a student's submission for a given assignment.
 
         Parameters
@@ -2283,6 +3153,9 @@ class Gradebook(object):
             the name of an assignment
         student : string
             the unique id of a student
+        computed : bool
+            whether to compute the scores of the submission right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -2291,7 +3164,7 @@ class Gradebook(object):
         """
 
         try:
-            submission = self.db.query(SubmittedAssignment)\
+            submission = self._query(SubmittedAssignment, computed)\
                 .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
                 .join(Student, Student.id == SubmittedAssignment.student_id)\
                 .filter(Assignment.name == assignment, Student.id == student)\
@@ -2382,6 +3255,155 @@ class Gradebook(object):
             self.db.rollback()
             raise InvalidEntry(*e.args)
 
+    def grant_extensions(self,
+                         assignment: str,
+                         students: Optional[Iterable[str]] = None,
+                         minutes: float = 0,
+                         hours: float = 0,
+                         days: float = 0,
+                         weeks: float = 0) -> int:
+        """Gives the same extension to many students for an assignment, with
+        a single statement. Like with :func:`grant_extension`, the new
+        extension replaces any existing one, and existing extensions are
+        removed if none of the time arguments are given.
+
+        The late penalties of the submissions are not changed; use
+        :func:`recompute_late_penalties` (or ``nbgrader db
+        recompute-penalties``) to update them afterwards.
+
+        Parameters
+        ----------
+        assignment:
+            the name of an assignment
+        students:
+            the unique ids of the students, or None for all of the students
+            that submitted the assignment
+        minutes:
+            The number of minutes in the extension
+        hours:
+            The number of hours in the extension
+        days:
+            The number of days in the extension
+        weeks:
+            The number of weeks in the extension
+
+        Returns
+        -------
+        count:
+            The number of submissions that were given the extension
+
+        """
+        assignment_id = self.find_assignment(assignment).id
+        if minutes == 0 and hours == 0 and days == 0 and weeks == 0:
+            extension = None
+        else:
+            extension = datetime.timedelta(
+                minutes=minutes, hours=hours, days=days, weeks=weeks)
+
+        table = SubmittedAssignment.__table__
+        where = table.c.assignment_id == assignment_id
+        if students is not None:
+            students = set(students)
+            found = {x for x, in self.db.query(SubmittedAssignment.student_id).filter(
+                SubmittedAssignment.assignment_id == assignment_id,
+                SubmittedAssignment.student_id.in_(students))}
+            missing = sorted(students - found)
+            if missing:
+                raise MissingEntry("No submission of {} for: {}".format(
+                    assignment, ", ".join(missing)))
+            where = and_(where, table.c.student_id.in_(students))
+
+        try:
+            self.db.flush()
+            connection = self.db.connection()
+            count = connection.execute(table.update().where(where).values(extension=extension)).rowcount
+            _record_changes(
+                connection, "submitted_assignment", "update", table, None, table.c.id, where)
+            self.db.commit()
+        except (IntegrityError, DBAPIError) as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
+        return count
+
+    def recompute_late_penalties(self,
+                                 assignment: str,
+                                 penalty: Any,
+                                 students: Optional[Iterable[str]] = None) -> int:
+        """Recompute the late penalties of the submissions of an assignment
+        from their stored scores, e.g. after the duedate was moved or
+        extensions were granted, without autograding them again.
+
+        Parameters
+        ----------
+        assignment:
+            the name of an assignment
+        penalty:
+            a function of the student id, the score of a submitted notebook
+            and the number of seconds that the submission was late, which
+            returns the penalty of the notebook (or None for no penalty),
+            like :func:`nbgrader.preprocessors.AssignLatePenalties.late_submission_penalty`.
+            It is only called for late submissions.
+        students:
+            the unique ids of the students whose penalties are recomputed,
+            or None for all of the students that submitted the assignment
+
+        Returns
+        -------
+        count:
+            The number of submitted notebooks whose penalty changed
+
+        """
+        duedate = self.find_assignment(assignment).duedate
+        query = self.db.query(
+            SubmittedNotebook.id, SubmittedNotebook.score, SubmittedNotebook.late_submission_penalty,
+            Notebook.name, SubmittedAssignment.id, SubmittedAssignment.student_id,
+            SubmittedAssignment.timestamp, SubmittedAssignment.extension
+        ).select_from(SubmittedNotebook)\
+         .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+         .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+         .filter(Assignment.name == assignment)
+        if students is not None:
+            query = query.filter(SubmittedAssignment.student_id.in_(set(students)))
+
+        now = datetime.datetime.utcnow()
+        penalties = {}  # type: Dict[str, Optional[float]]
+        assignment_ids = set()  # type: Set[str]
+        changes = []
+        for (notebook_id, score, old_penalty, notebook, assignment_id, student,
+             timestamp, extension) in query:
+            seconds_late = _total_seconds_late(timestamp, duedate, extension)
+            new_penalty = penalty(student, score, seconds_late) if seconds_late > 0 else None
+            if new_penalty == old_penalty:
+                continue
+            penalties[notebook_id] = new_penalty
+            assignment_ids.add(assignment_id)
+            changes.append({
+                'timestamp': now, 'kind': 'submitted_notebook', 'action': 'update',
+                'object_id': notebook_id, 'assignment': assignment, 'notebook': notebook,
+                'student': student})
+
+        if not penalties:
+            return 0
+
+        table = SubmittedNotebook.__table__
+        try:
+            self.db.flush()
+            connection = self.db.connection()
+            connection.execute(
+                table.update()
+                .where(table.c.id == bindparam("_id"))
+                .values(late_submission_penalty=bindparam("_penalty")),
+                [{"_id": x, "_penalty": y} for x, y in penalties.items()])
+            # a new penalty changes the final score of the assignment
+            _touch_submitted_assignments(connection, assignment_ids)
+            connection.execute(Change.__table__.insert(), changes)
+            self.db.commit()
+        except (IntegrityError, DBAPIError) as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
+        return len(penalties)
+
     def remove_submission(self, assignment, student):
         """Removes a submission from the database.
 
@@ -2395,12 +3417,11 @@ class Gradebook(object):
         """
         submission = self.find_submission(assignment, student)
 
-        for notebook in submission.notebooks:
-            self.remove_submission_notebook(notebook.name, assignment, student)
-
-        self.db.delete(submission)
-
         try:
+            self.db.flush()
+            deleted = _delete_submissions(
+                self.db.connection(), SubmittedAssignment.__table__.c.id == submission.id)
+            self._forget_deleted(deleted)
             self.db.commit()
         except (IntegrityError, FlushError) as e:
             self.db.rollback()
@@ -2421,25 +3442,28 @@ class Gradebook(object):
         """
         submission = self.find_submission_notebook(notebook, assignment, student)
 
-        for grade in submission.grades:
-            self.db.delete(grade)
-        for comment in submission.comments:
-            self.db.delete(comment)
-        self.db.delete(submission)
-
         try:
+            self.db.flush()
+            connection = self.db.connection()
+            deleted = _delete_submitted_notebooks(
+                connection, SubmittedNotebook.__table__.c.id == submission.id)
+            _update_aggregates(connection, submitted_assignments=[submission.assignment_id])
+            self._forget_deleted(deleted)
             self.db.commit()
         except (IntegrityError, FlushError) as e:
             self.db.rollback()
             raise InvalidEntry(*e.args)
 
-    def assignment_submissions(self, assignment):
+    def assignment_submissions(self, assignment, computed=False):
         """Find all submissions of a given assignment.
 
         Parameters
         ----------
         assignment : string
             the name of an assignment
+        computed : bool
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -2448,12 +3472,51 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedAssignment)\
+        return self._assignment_submissions_query(assignment, computed).all()
+
+    def _assignment_submissions_query(self, assignment: str, computed: bool = False) -> Any:
+        return self._query(SubmittedAssignment, computed)\
             .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
-            .filter(Assignment.name == assignment)\
-            .all()
+            .filter(Assignment.name == assignment)
+
+    def iter_assignment_submissions(self,
+                                    assignment: str,
+                                    batch_size: int = 1000,
+                                    tuples: bool = False,
+                                    computed: bool = False) -> Iterator[Any]:
+        """Iterate over all submissions of a given assignment, fetching
+        ``batch_size`` submissions from the database at a time. This is like
+        :func:`~nbgrader.api.Gradebook.assignment_submissions`, but without
+        loading all of the submissions into memory at once.
+
+        The gradebook should not be modified until the iteration is done.
+
+        Parameters
+        ----------
+        assignment:
+            the name of an assignment
+        batch_size:
+            the number of rows to fetch from the database at a time
+        tuples:
+            whether to return named tuples of the columns of the submitted
+            assignment table (e.g. ``row.student_id``, ``row.score``)
+            instead of :class:`~nbgrader.api.SubmittedAssignment` objects,
+            which is faster for read-only access
+        computed:
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`), ignored for tuples
+
+        Returns
+        -------
+        submissions:
+            An iterator over :class:`~nbgrader.api.SubmittedAssignment`
+            objects or tuples
+
+        """
+        query = self._assignment_submissions_query(assignment, computed and not tuples)
+        return self._stream(query, SubmittedAssignment, batch_size, tuples)
 
-    def notebook_submissions(self, notebook, assignment):
+    def notebook_submissions(self, notebook, assignment, computed=False):
         """Find all submissions of a given notebook in a given assignment.
 
         Parameters
@@ -2462,6 +3525,9 @@ class Gradebook(object):
             the name of a notebook
         assignment : string
             the name of an assignment
+        computed : bool
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -2470,20 +3536,66 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedNotebook)\
+        return self._notebook_submissions_query(notebook, assignment, computed).all()
+
+    def _notebook_submissions_query(self, notebook: str, assignment: str, computed: bool = False) -> Any:
+        return self._query(SubmittedNotebook, computed)\
             .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
             .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
             .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
-            .filter(Notebook.name == notebook, Assignment.name == assignment)\
-            .all()
+            .filter(Notebook.name == notebook, Assignment.name == assignment)
+
+    def iter_notebook_submissions(self,
+                                  notebook: str,
+                                  assignment: str,
+                                  batch_size: int = 1000,
+                                  tuples: bool = False,
+                                  computed: bool = False) -> Iterator[Any]:
+        """Iterate over all submissions of a given notebook in a given
+        assignment, fetching ``batch_size`` submissions from the database at
+        a time. This is like
+        :func:`~nbgrader.api.Gradebook.notebook_submissions`, but without
+        loading all of the submissions into memory at once.
+
+        The gradebook should not be modified until the iteration is done.
+
+        Parameters
+        ----------
+        notebook:
+            the name of a notebook
+        assignment:
+            the name of an assignment
+        batch_size:
+            the number of rows to fetch from the database at a time
+        tuples:
+            whether to return named tuples of the columns of the submitted
+            notebook table (e.g. ``row.assignment_id``, ``row.score``)
+            instead of :class:`~nbgrader.api.SubmittedNotebook` objects,
+            which is faster for read-only access
+        computed:
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`), ignored for tuples
 
-    def student_submissions(self, student):
+        Returns
+        -------
+        submissions:
+            An iterator over :class:`~nbgrader.api.SubmittedNotebook`
+            objects or tuples
+
+        """
+        query = self._notebook_submissions_query(notebook, assignment, computed and not tuples)
+        return self._stream(query, SubmittedNotebook, batch_size, tuples)
+
+    def student_submissions(self, student, computed=False):
         """Find all submissions by a given student.
 
         Parameters
         ----------
         student : string
             the student's unique id
+        computed : bool
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -2492,12 +3604,51 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedAssignment)\
+        return self._student_submissions_query(student, computed).all()
+
+    def _student_submissions_query(self, student: str, computed: bool = False) -> Any:
+        return self._query(SubmittedAssignment, computed)\
             .join(Student, Student.id == SubmittedAssignment.student_id)\
-            .filter(Student.id == student)\
-            .all()
+            .filter(Student.id == student)
+
+    def iter_student_submissions(self,
+                                 student: str,
+                                 batch_size: int = 1000,
+                                 tuples: bool = False,
+                                 computed: bool = False) -> Iterator[Any]:
+        """Iterate over all submissions by a given student, fetching
+        ``batch_size`` submissions from the database at a time. This is like
+        :func:`~nbgrader.api.Gradebook.student_submissions`, but without
+        loading all of the submissions into memory at once.
+
+        The gradebook should not be modified until the iteration is done.
+
+        Parameters
+        ----------
+        student:
+            the student's unique id
+        batch_size:
+            the number of rows to fetch from the database at a time
+        tuples:
+            whether to return named tuples of the columns of the submitted
+            assignment table instead of
+            :class:`~nbgrader.api.SubmittedAssignment` objects, which is
+            faster for read-only access
+        computed:
+            whether to compute the scores of the submissions right away (see
+            :func:`~nbgrader.api.undefer_computed`), ignored for tuples
+
+        Returns
+        -------
+        submissions:
+            An iterator over :class:`~nbgrader.api.SubmittedAssignment`
+            objects or tuples
 
-    def find_submission_notebook(self, notebook: str, assignment: str, student: str) -> SubmittedNotebook:
+        """
+        query = self._student_submissions_query(student, computed and not tuples)
+        return self._stream(query, SubmittedAssignment, batch_size, tuples)
+
+    def find_submission_notebook(self, notebook: str, assignment: str, student: str, computed: bool = False) -> SubmittedNotebook:
         """Find a particular notebook in a student's submission for a given
         assignment.
 
@@ -2509,6 +3660,9 @@ class Gradebook(object):
             the name of an assignment
         student:
             the unique id of a student
+        computed:
+            whether to compute the scores of the notebook right away (see
+            :func:`~nbgrader.api.undefer_computed`)
 
         Returns
         -------
@@ -2517,7 +3671,7 @@ class Gradebook(object):
         """
 
         try:
-            notebook = self.db.query(SubmittedNotebook)\
+            notebook = self._query(SubmittedNotebook, computed)\
                 .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
                 .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
                 .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
@@ -2709,6 +3863,185 @@ class Gradebook(object):
 
         return comment
 
+    def find_submitted_cells(self, cls: Any, notebook: str, assignment: str, student: str) -> Dict[str, Any]:
+        """Find all the grades or all the comments of a notebook in a
+        student's submission at once, by the name of their cell.
+
+        Parameters
+        ----------
+        cls:
+            either :class:`~nbgrader.api.Grade` or
+            :class:`~nbgrader.api.Comment`
+        notebook:
+            the name of a notebook
+        assignment:
+            the name of an assignment
+        student:
+            the unique id of a student
+
+        Returns
+        -------
+        found:
+            A dictionary mapping the names of the cells to their grades or
+            comments, which is empty if there is no such submission
+
+        """
+        found = self.db.query(cls, BaseCell.name)\
+            .join(BaseCell, BaseCell.id == cls.cell_id)\
+            .join(SubmittedNotebook, SubmittedNotebook.id == cls.notebook_id)\
+            .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+            .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+            .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+            .filter(
+                Notebook.name == notebook,
+                Assignment.name == assignment,
+                SubmittedAssignment.student_id == student)
+        return {name: obj for obj, name in found}
+
+    def bulk_set_grades(self,
+                        grades: Iterable[Dict[str, Any]],
+                        batch_size: int = 1000) -> Dict[str, int]:
+        """Set the manual scores and comments of many cells at once, e.g. to
+        import grades that were given outside of the formgrader. The cells
+        are looked up with one query per ``batch_size`` rows, and all of the
+        changes are applied in a single transaction, so that either all of
+        the rows are imported or none of them are.
+
+        Like in the formgrader, a grade with a manual score no longer needs
+        to be graded manually.
+
+        Parameters
+        ----------
+        grades:
+            dictionaries with the names of the ``assignment``, ``notebook``
+            and ``cell``, the unique id of the ``student``, and the
+            ``manual_score`` and/or ``comment`` to set. A score or comment
+            that is missing or None is left unchanged.
+        batch_size:
+            the number of rows to look up at a time
+
+        Returns
+        -------
+        summary:
+            A dictionary with the number of ``grades`` and ``comments`` that
+            were changed
+
+        """
+        keys = ("assignment", "notebook", "cell", "student")
+        scores = {}  # type: Dict[str, Any]
+        comments = {}  # type: Dict[str, Any]
+        notebooks = {}  # type: Dict[str, str]
+        names = {}  # type: Dict[str, Tuple[str, str, str]]
+
+        for chunk in _chunks(grades, batch_size):
+            for row in chunk:
+                missing = [x for x in keys if row.get(x) is None]
+                if missing:
+                    raise InvalidEntry("Missing {} for grade: {}".format(", ".join(missing), row))
+
+            # a cell that is both graded and commented has two rows in the
+            # cell table, one joined to the grade and one to the comment
+            query = self.db.query(
+                Assignment.name, Notebook.name, BaseCell.name,
+                SubmittedAssignment.student_id, SubmittedNotebook.id,
+                Grade.id, Grade.manual_score, Grade.needs_manual_grade,
+                Comment.id, Comment.manual_comment
+            ).select_from(SubmittedNotebook)\
+             .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+             .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+             .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+             .join(BaseCell, BaseCell.notebook_id == Notebook.id)\
+             .outerjoin(Grade, and_(
+                 Grade.notebook_id == SubmittedNotebook.id, Grade.cell_id == BaseCell.id))\
+             .outerjoin(Comment, and_(
+                 Comment.notebook_id == SubmittedNotebook.id, Comment.cell_id == BaseCell.id))\
+             .filter(
+                 Assignment.name.in_({row["assignment"] for row in chunk}),
+                 Notebook.name.in_({row["notebook"] for row in chunk}),
+                 BaseCell.name.in_({row["cell"] for row in chunk}),
+                 SubmittedAssignment.student_id.in_({row["student"] for row in chunk}))
+
+            cells = {}  # type: Dict[Tuple[str, ...], Dict[str, Any]]
+            for (assignment, notebook, cell, student, notebook_id,
+                 grade_id, manual_score, needs_manual_grade,
+                 comment_id, manual_comment) in query:
+                found = cells.setdefault((assignment, notebook, cell, student), {})
+                if grade_id is not None:
+                    found["grade"] = (grade_id, manual_score, needs_manual_grade)
+                if comment_id is not None:
+                    found["comment"] = (comment_id, manual_comment)
+                found["notebook"] = notebook_id
+                names[notebook_id] = (assignment, notebook, student)
+
+            for row in chunk:
+                key = tuple(row[x] for x in keys)
+                if key not in cells:
+                    raise MissingEntry("No such cell: {}/{}/{} for {}".format(*key))
+                found = cells[key]
+
+                if row.get("manual_score") is not None:
+                    if "grade" not in found:
+                        raise InvalidEntry("Cell is not graded: {}/{}/{}".format(*key))
+                    grade_id, manual_score, needs_manual_grade = found["grade"]
+                    try:
+                        score = float(row["manual_score"])
+                    except (TypeError, ValueError):
+                        raise InvalidEntry("Invalid score for {}/{}/{} for {}: {}".format(
+                            *(key + (row["manual_score"],))))
+                    if scores.get(grade_id, manual_score) != score or needs_manual_grade:
+                        scores[grade_id] = score
+                        notebooks[grade_id] = found["notebook"]
+
+                if row.get("comment") is not None:
+                    if "comment" not in found:
+                        raise InvalidEntry("Cell cannot be commented: {}/{}/{}".format(*key))
+                    comment_id, manual_comment = found["comment"]
+                    if comments.get(comment_id, manual_comment) != row["comment"]:
+                        comments[comment_id] = row["comment"]
+                        notebooks[comment_id] = found["notebook"]
+
+        if not scores and not comments:
+            return {"grades": 0, "comments": 0}
+
+        # the grades are updated without the ORM, so the bookkeeping that is
+        # otherwise done by the mapper events is done here
+        now = datetime.datetime.utcnow()
+        changes = []
+        for kind, updates in (("grade", scores), ("comment", comments)):
+            for object_id in updates:
+                assignment, notebook, student = names[notebooks[object_id]]
+                changes.append({
+                    'timestamp': now, 'kind': kind, 'action': 'update', 'object_id': object_id,
+                    'assignment': assignment, 'notebook': notebook, 'student': student})
+
+        grade_table = Grade.__table__
+        comment_table = Comment.__table__
+        try:
+            self.db.flush()
+            connection = self.db.connection()
+            if scores:
+                connection.execute(
+                    grade_table.update()
+                    .where(grade_table.c.id == bindparam("_id"))
+                    .values(manual_score=bindparam("_score"), needs_manual_grade=False),
+                    [{"_id": x, "_score": y} for x, y in scores.items()])
+            if comments:
+                connection.execute(
+                    comment_table.update()
+                    .where(comment_table.c.id == bindparam("_id"))
+                    .values(manual_comment=bindparam("_comment")),
+                    [{"_id": x, "_comment": y} for x, y in comments.items()])
+            _touch_submitted_notebooks(connection, set(notebooks.values()))
+            _update_aggregates(
+                connection, submitted_notebooks={notebooks[x] for x in scores})
+            connection.execute(Change.__table__.insert(), changes)
+            self.db.commit()
+        except (IntegrityError, DBAPIError) as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
+
+        return {"grades": len(scores), "comments": len(comments)}
+
     def average_assignment_score(self, assignment_id):
         """Compute the average score for an assignment.
 
@@ -2951,6 +4284,384 @@ class Gradebook(object):
                 TaskCell.cell_type == "markdown")).scalar()
         return score_sum / notebook.num_submissions
 
+    def _score_statistics(self, name: Any, submission: Any, join_on: Any, filters: list) -> Dict[str, Dict[str, Any]]:
+        """Group the stored scores of ``submission`` (either
+        :class:`~nbgrader.api.SubmittedAssignment` or
+        :class:`~nbgrader.api.SubmittedNotebook`) by ``name``."""
+        needs_manual_grade = case([(submission.needs_manual_grade, 1)], else_=0)
+        rows = self.db.query(
+            name,
+            func.count(submission.id),
+            func.coalesce(func.sum(submission.score), 0.0),
+            func.coalesce(func.sum(submission.code_score), 0.0),
+            func.coalesce(func.sum(submission.written_score), 0.0),
+            func.coalesce(func.sum(submission.task_score), 0.0),
+            func.coalesce(func.max(submission.score), 0.0),
+            func.coalesce(func.sum(needs_manual_grade), 0)
+        ).outerjoin(submission, join_on)\
+         .filter(*filters)\
+         .group_by(name)\
+         .all()
+
+        statistics = {}
+        for row in rows:
+            num_submissions = row[1]
+            # the averages are taken over the submissions, like the
+            # average_* methods
+            averages = [x / num_submissions if num_submissions > 0 else 0.0 for x in row[2:6]]
+            statistics[row[0]] = {
+                "num_submissions": num_submissions,
+                "average_score": averages[0],
+                "average_code_score": averages[1],
+                "average_written_score": averages[2],
+                "average_task_score": averages[3],
+                "highest_score": row[6],
+                "num_needs_manual_grade": row[7]
+            }
+        return statistics
+
+    def assignment_statistics(self, assignments: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Compute summary statistics of the submissions of several
+        assignments in one query. The averages are the same as those returned
+        by :func:`~nbgrader.api.Gradebook.average_assignment_score` and the
+        related methods.
+
+        Parameters
+        ----------
+        assignments:
+            the names of the assignments to include, or None for all
+            assignments
+
+        Returns
+        -------
+        statistics:
+            A dictionary mapping the name of each assignment to a dictionary
+            with the keys ``num_submissions``, ``average_score``,
+            ``average_code_score``, ``average_written_score``,
+            ``average_task_score``, ``highest_score`` and
+            ``num_needs_manual_grade``
+
+        """
+        filters = []
+        if assignments is not None:
+            filters.append(Assignment.name.in_(assignments))
+        return self._score_statistics(
+            Assignment.name, SubmittedAssignment,
+            SubmittedAssignment.assignment_id == Assignment.id, filters)
+
+    def notebook_statistics(self, assignment_id: str) -> Dict[str, Dict[str, Any]]:
+        """Compute summary statistics of the submissions of all notebooks in
+        an assignment in one query. The averages are the same as those
+        returned by :func:`~nbgrader.api.Gradebook.average_notebook_score`
+        and the related methods.
+
+        Parameters
+        ----------
+        assignment_id:
+            the name of the assignment
+
+        Returns
+        -------
+        statistics:
+            A dictionary mapping the name of each notebook to a dictionary
+            with the same keys as
+            :func:`~nbgrader.api.Gradebook.assignment_statistics`
+
+        """
+        assignment = self.find_assignment(assignment_id)
+        return self._score_statistics(
+            Notebook.name, SubmittedNotebook,
+            SubmittedNotebook.notebook_id == Notebook.id,
+            [Notebook.assignment_id == assignment.id])
+
+    def score_matrix(self, assignment_id: Optional[str] = None) -> ScoreMatrix:
+        """Get the scores of all students on all graded cells as a
+        :class:`~nbgrader.scorematrix.ScoreMatrix`, which provides summary
+        statistics per cell, notebook or assignment. This requires NumPy.
+
+        Parameters
+        ----------
+        assignment_id:
+            the name of an assignment, or None for all assignments
+
+        Returns
+        -------
+        matrix:
+            The score matrix, with one row per student and one column per
+            grade or task cell
+
+        """
+        cells = []
+        for cls in (GradeCell, TaskCell):
+            query = self.db.query(Assignment.name, Notebook.name, cls.name, cls.max_score, cls.id)\
+                .join(Notebook, Notebook.assignment_id == Assignment.id)\
+                .join(cls, cls.notebook_id == Notebook.id)
+            if assignment_id is not None:
+                query = query.filter(Assignment.name == assignment_id)
+            cells.extend(query.all())
+        cells.sort(key=lambda x: x[:3])
+
+        if assignment_id is not None and not cells:
+            # raises MissingEntry if the assignment does not exist
+            self.find_assignment(assignment_id)
+
+        students = [x[0] for x in self.db.query(Student.id).order_by(Student.id)]
+        rows = {student: i for i, student in enumerate(students)}
+        columns = {x[4]: i for i, x in enumerate(cells)}
+
+        grades = self.db.query(SubmittedAssignment.student_id, Grade.cell_id, Grade.score)\
+            .join(SubmittedNotebook, SubmittedNotebook.id == Grade.notebook_id)\
+            .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+            .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)
+        if assignment_id is not None:
+            grades = grades.filter(Assignment.name == assignment_id)
+
+        matrix = ScoreMatrix(students, [x[:3] for x in cells], [x[3] for x in cells])
+        grades = grades.all()
+        if grades:
+            student_ids, cell_ids, scores = zip(*grades)
+            matrix.scores[
+                [rows[x] for x in student_ids],
+                [columns[x] for x in cell_ids]] = scores
+        return matrix
+
+    def penalty_simulation(self, assignment_id: Optional[str] = None) -> PenaltySimulation:
+        """Get the scores and lateness of all submitted notebooks as a
+        :class:`~nbgrader.latepenalties.PenaltySimulation`, to compare the
+        effect of late penalty policies without changing the database. This
+        requires NumPy.
+
+        Parameters
+        ----------
+        assignment_id:
+            the name of an assignment, or None for all assignments
+
+        Returns
+        -------
+        simulation:
+            The simulation, with one element per submitted notebook
+
+        """
+        query = self.db.query(
+            SubmittedAssignment.student_id, Assignment.name, Notebook.name,
+            SubmittedNotebook.score, SubmittedNotebook.late_submission_penalty,
+            SubmittedAssignment.timestamp, Assignment.duedate, SubmittedAssignment.extension
+        ).select_from(SubmittedNotebook)\
+         .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+         .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)
+        if assignment_id is not None:
+            # raises MissingEntry if the assignment does not exist
+            self.find_assignment(assignment_id)
+            query = query.filter(Assignment.name == assignment_id)
+
+        rows = query.all()
+        return PenaltySimulation(
+            [x[0] for x in rows],
+            [(x[1], x[2]) for x in rows],
+            [x[3] for x in rows],
+            [_total_seconds_late(x[5], x[6], x[7]) for x in rows],
+            [x[4] if x[4] is not None else 0.0 for x in rows])
+
+    def iter_submission_scores(self,
+                               assignments: Optional[List[str]] = None,
+                               students: Optional[List[str]] = None,
+                               batch_size: int = 1000,
+                               since: Optional[datetime.datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the scores of every student in every assignment,
+        including assignments that the student did not submit, ordered by
+        the due date of the assignment and by student name. The rows are
+        computed in a single query and fetched ``batch_size`` at a time.
+
+        Parameters
+        ----------
+        assignments:
+            the names of the assignments to include, or None for all
+            assignments
+        students:
+            the ids of the students to include, or None for all students
+        batch_size:
+            the number of rows to fetch from the database at a time
+        since:
+            if given, only include submissions whose score or late penalty
+            changed after this time (in UTC), see
+            :attr:`~nbgrader.api.SubmittedAssignment.score_last_modified`,
+            and submissions that were removed after this time (according to
+            the change log), which are included as missing submissions. A
+            submission is not included if its student or assignment was
+            removed as well.
+
+        Returns
+        -------
+        rows:
+            An iterator over dictionaries with the keys ``assignment``,
+            ``duedate``, ``timestamp``, ``student_id``, ``last_name``,
+            ``first_name``, ``email``, ``raw_score``,
+            ``late_submission_penalty``, ``score`` and ``max_score``. The
+            ``score`` is the ``raw_score`` minus the penalty, but no less
+            than zero, and missing submissions score zero.
+
+        """
+        cells = union_all(
+            select([Notebook.assignment_id.label("assignment_id"), GradeCell.max_score.label("max_score")])
+            .select_from(GradeCell)
+            .where(GradeCell.notebook_id == Notebook.id),
+            select([Notebook.assignment_id.label("assignment_id"), TaskCell.max_score.label("max_score")])
+            .select_from(TaskCell)
+            .where(TaskCell.notebook_id == Notebook.id)).alias()
+        max_scores = select([cells.c.assignment_id, func.sum(cells.c.max_score).label("max_score")])\
+            .group_by(cells.c.assignment_id).alias()
+        penalties = select([
+            SubmittedNotebook.assignment_id,
+            func.sum(SubmittedNotebook.late_submission_penalty).label("penalty")
+        ]).group_by(SubmittedNotebook.assignment_id).alias()
+
+        query = self.db.query(
+            Assignment.name, Assignment.duedate, SubmittedAssignment.timestamp,
+            Student.id, Student.last_name, Student.first_name, Student.email,
+            func.coalesce(SubmittedAssignment.score, 0.0),
+            func.coalesce(penalties.c.penalty, 0.0),
+            func.coalesce(max_scores.c.max_score, 0.0)
+        ).select_from(Assignment)\
+         .join(Student, true())\
+         .outerjoin(SubmittedAssignment, and_(
+             SubmittedAssignment.assignment_id == Assignment.id,
+             SubmittedAssignment.student_id == Student.id))\
+         .outerjoin(penalties, penalties.c.assignment_id == SubmittedAssignment.id)\
+         .outerjoin(max_scores, max_scores.c.assignment_id == Assignment.id)
+        if assignments is not None:
+            query = query.filter(Assignment.name.in_(assignments))
+        if students is not None:
+            query = query.filter(Student.id.in_(students))
+        if since is not None:
+            removed = exists().where(and_(
+                Change.kind == "submitted_assignment",
+                Change.action == "delete",
+                Change.timestamp > since,
+                Change.assignment == Assignment.name,
+                Change.student == Student.id))
+            query = query.filter(or_(
+                SubmittedAssignment.score_last_modified > since,
+                and_(SubmittedAssignment.id.is_(None), removed)))
+        query = query.order_by(
+            Assignment.duedate, Assignment.name,
+            Student.last_name, Student.first_name, Student.id)
+
+        keys = [
+            "assignment", "duedate", "timestamp", "student_id", "last_name",
+            "first_name", "email", "raw_score", "late_submission_penalty",
+            "max_score"
+        ]
+        for row in query.yield_per(batch_size):
+            score = dict(zip(keys, row))
+            score["score"] = max(0.0, score["raw_score"] - score["late_submission_penalty"])
+            yield score
+
+    def iter_grades(self,
+                    assignments: Optional[List[str]] = None,
+                    students: Optional[List[str]] = None,
+                    batch_size: int = 1000,
+                    since: Optional[datetime.datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the grades of every graded cell in every submission,
+        ordered by the due date of the assignment, by student name, and by
+        notebook and cell name. The rows are computed in a single query and
+        fetched ``batch_size`` at a time.
+
+        Parameters
+        ----------
+        assignments:
+            the names of the assignments to include, or None for all
+            assignments
+        students:
+            the ids of the students to include, or None for all students
+        batch_size:
+            the number of rows to fetch from the database at a time
+        since:
+            if given, only include the grades of submitted notebooks whose
+            grades or comments changed after this time (in UTC), see
+            :attr:`~nbgrader.api.SubmittedNotebook.last_modified`
+
+        Returns
+        -------
+        rows:
+            An iterator over dictionaries with the keys ``assignment``,
+            ``notebook``, ``cell``, ``student_id``, ``last_name``,
+            ``first_name``, ``email``, ``auto_score``, ``manual_score``,
+            ``extra_credit``, ``score`` and ``max_score``
+
+        """
+        grade_cells = GradeCell.__table__
+        task_cells = TaskCell.__table__
+        query = self.db.query(
+            Assignment.name, Notebook.name, BaseCell.name,
+            Student.id, Student.last_name, Student.first_name, Student.email,
+            Grade.auto_score, Grade.manual_score, Grade.extra_credit, Grade.score,
+            func.coalesce(grade_cells.c.max_score, task_cells.c.max_score, 0.0)
+        ).select_from(Grade)\
+         .join(BaseCell, BaseCell.id == Grade.cell_id)\
+         .outerjoin(grade_cells, grade_cells.c.id == Grade.cell_id)\
+         .outerjoin(task_cells, task_cells.c.id == Grade.cell_id)\
+         .join(SubmittedNotebook, SubmittedNotebook.id == Grade.notebook_id)\
+         .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+         .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+         .join(Student, Student.id == SubmittedAssignment.student_id)
+        if assignments is not None:
+            query = query.filter(Assignment.name.in_(assignments))
+        if students is not None:
+            query = query.filter(Student.id.in_(students))
+        if since is not None:
+            query = query.filter(SubmittedNotebook.last_modified > since)
+        query = query.order_by(
+            Assignment.duedate, Assignment.name,
+            Student.last_name, Student.first_name, Student.id,
+            Notebook.name, BaseCell.name)
+
+        keys = [
+            "assignment", "notebook", "cell", "student_id", "last_name",
+            "first_name", "email", "auto_score", "manual_score",
+            "extra_credit", "score", "max_score"
+        ]
+        for row in query.yield_per(batch_size):
+            yield dict(zip(keys, row))
+
+    def changes_since(self, cursor: int = 0, limit: Optional[int] = None) -> List[Change]:
+        """Get the changes to grades, comments and submissions that were made
+        after a given position in the change log, oldest first.
+
+        To follow the changes, start with a cursor of 0 and pass the
+        :attr:`~nbgrader.api.Change.id` of the last change that was returned
+        as the cursor of the next call.
+
+        The ids increase in the order in which the changes were made, which
+        is not always the order in which they become visible: on databases
+        where concurrent transactions may commit out of order (e.g.
+        PostgreSQL, but not SQLite, which has a single writer), a change can
+        be committed after a change with a higher id has already been
+        returned, and is then skipped by the cursor. Readers of such
+        databases should occasionally read the log again from an earlier
+        cursor (the changes can be applied more than once).
+
+        Parameters
+        ----------
+        cursor:
+            the id of the last change that was already seen
+        limit:
+            the maximum number of changes to return, or None for all of them
+
+        Returns
+        -------
+        changes:
+            A list of :class:`~nbgrader.api.Change` objects
+
+        """
+        query = self.db.query(Change)\
+            .filter(Change.id > cursor)\
+            .order_by(Change.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
     def student_dicts(self):
         """Returns a list of dictionaries containing student data. Equivalent
         to calling :func:`~nbgrader.api.Student.to_dict` for each student,
@@ -2974,8 +4685,8 @@ class Gradebook(object):
             # subquery the scores
             scores = self.db.query(
                 Student.id,
-                func.sum(Grade.score).label("score")
-            ).join(SubmittedAssignment, SubmittedNotebook, Grade)\
+                func.sum(SubmittedAssignment.score).label("score")
+            ).join(SubmittedAssignment)\
              .group_by(Student.id)\
              .subquery()
 
@@ -3015,134 +4726,37 @@ class Gradebook(object):
             A list of dictionaries, one per submitted assignment
 
         """
-        # subquery the code scores
-        code_scores = self.db.query(
-            SubmittedAssignment.id.label("id"),
-            func.sum(Grade.score).label("code_score"),
-            func.sum(GradeCell.max_score).label("max_code_score"),
-        ).select_from(SubmittedAssignment
-        ).join(SubmittedNotebook, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "code")\
-         .group_by(SubmittedAssignment.id)\
-         .subquery()
-
-        # subquery for the written scores
-        written_scores = self.db.query(
-            SubmittedAssignment.id.label("id"),
-            func.sum(Grade.score).label("written_score"),
-            func.sum(GradeCell.max_score).label("max_written_score"),
-        ).select_from(SubmittedAssignment
-        ).join(SubmittedNotebook, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "markdown")\
-         .group_by(SubmittedAssignment.id)\
-         .subquery()
-
-        # subquery for the task scores
-        task_scores = self.db.query(
-            SubmittedAssignment.id.label("id"),
-            func.sum(Grade.score).label("task_score"),
-            func.sum(TaskCell.max_score).label("max_task_score"),
-        ).select_from(SubmittedAssignment
-        ).join(SubmittedNotebook, Notebook, Assignment, Student, Grade, TaskCell)\
-         .filter(TaskCell.cell_type == "markdown")\
-         .group_by(SubmittedAssignment.id)\
-         .subquery()
-
-        # subquery for needing manual grading
-        manual_grade = self.db.query(
-            SubmittedAssignment.id,
-            exists().where(Grade.needs_manual_grade).label("needs_manual_grade")
-        ).select_from(SubmittedAssignment
-        ).join(SubmittedNotebook, Assignment, Notebook)\
-         .filter(
-             SubmittedNotebook.assignment_id == SubmittedAssignment.id,
-             Grade.notebook_id == SubmittedNotebook.id,
-             Grade.needs_manual_grade)\
-         .group_by(SubmittedAssignment.id)\
-         .subquery()
-
-        all_scores = aliased(union_all(
-            self.db.query(
-                SubmittedAssignment.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(GradeCell.max_score).label("max_score"),
-            ).select_from(SubmittedAssignment
-            ).join(SubmittedNotebook, Grade, GradeCell)
-            .filter(GradeCell.cell_type == "code")
-            .group_by(SubmittedAssignment.id),
-            # subquery for the written scores
-            self.db.query(
-                SubmittedAssignment.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(GradeCell.max_score).label("max_score"),
-            ).select_from(SubmittedAssignment
-            ).join(SubmittedNotebook, Grade, GradeCell)\
-            .filter(GradeCell.cell_type == "markdown")\
-            .group_by(SubmittedAssignment.id),
-
-            self.db.query(
-                SubmittedAssignment.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(TaskCell.max_score).label("max_score"),
-            ).select_from(SubmittedAssignment
-            ).join(SubmittedNotebook, Grade, TaskCell)\
-            .filter(TaskCell.cell_type == "markdown")\
-            .group_by(SubmittedAssignment.id)
-        )
-        )
-        total_scores = self.db.query(
-            func.sum(all_scores.c.score).label("score"),
-            func.sum(all_scores.c.max_score).label("max_score"),
-            all_scores.c.id.label("id"),
-        ).group_by(all_scores.c.id)\
-         .subquery()
-
-        # full query
-        _manual_grade = func.coalesce(manual_grade.c.needs_manual_grade, False)
-        assignments = self.db.query(
+        try:
+            assignment = self.find_assignment(assignment_id)
+        except MissingEntry:
+            return []
+
+        # the scores are stored with each submission, and the maximum scores
+        # are the same for all of them
+        max_scores = {
+            "max_score": assignment.max_score,
+            "max_code_score": assignment.max_code_score,
+            "max_written_score": assignment.max_written_score,
+            "max_task_score": assignment.max_task_score
+        }
+
+        submissions = self.db.query(
             SubmittedAssignment.id, Assignment.name,
             SubmittedAssignment.timestamp, Student.first_name, Student.last_name,
-            Student.id,
-            func.coalesce(total_scores.c.score, 0.0),
-            func.coalesce(total_scores.c.max_score, 0.0),
-            func.coalesce(code_scores.c.code_score, 0.0),
-            func.coalesce(code_scores.c.max_code_score, 0.0),
-            func.coalesce(written_scores.c.written_score, 0.0),
-            func.coalesce(written_scores.c.max_written_score, 0.0),
-            func.coalesce(task_scores.c.task_score, 0.0),
-            func.coalesce(task_scores.c.max_task_score, 0.0),
-            _manual_grade
+            Student.id, SubmittedAssignment.score, SubmittedAssignment.code_score,
+            SubmittedAssignment.written_score, SubmittedAssignment.task_score,
+            SubmittedAssignment.needs_manual_grade
         ).select_from(SubmittedAssignment
-        ).join(SubmittedNotebook, Assignment, Student, Grade)\
-         .outerjoin(code_scores, SubmittedAssignment.id == code_scores.c.id)\
-         .outerjoin(written_scores, SubmittedAssignment.id == written_scores.c.id)\
-         .outerjoin(task_scores, SubmittedAssignment.id == task_scores.c.id)\
-         .outerjoin(manual_grade, SubmittedAssignment.id == manual_grade.c.id)\
-         .outerjoin(total_scores, SubmittedAssignment.id == total_scores.c.id)\
-         .filter(and_(
-             Assignment.name == assignment_id,
-             Student.id == SubmittedAssignment.student_id,
-             SubmittedAssignment.id == SubmittedNotebook.assignment_id,
-             SubmittedNotebook.id == Grade.notebook_id,
-             SubmittedAssignment.id == total_scores.c.id))\
-         .group_by(
-             SubmittedAssignment.id, Assignment.name,
-             SubmittedAssignment.timestamp, Student.first_name, Student.last_name,
-             Student.id, code_scores.c.code_score, code_scores.c.max_code_score,
-             written_scores.c.written_score, written_scores.c.max_written_score,
-             task_scores.c.task_score, task_scores.c.max_task_score,
-             total_scores.c.score, total_scores.c.max_score,
-             _manual_grade)\
+        ).join(Assignment, Student)\
+         .filter(Assignment.id == assignment.id)\
          .all()
 
         keys = [
             "id", "name", "timestamp", "first_name", "last_name", "student",
-            "score", "max_score", "code_score", "max_code_score",
-            "written_score", "max_written_score",
-            "task_score", "max_task_score",
+            "score", "code_score", "written_score", "task_score",
             "needs_manual_grade"
         ]
-        return [dict(zip(keys, x)) for x in assignments]
+        return [dict(zip(keys, x), **max_scores) for x in submissions]
 
     def notebook_submission_dicts(self, notebook_id, assignment_id):
         """Returns a list of dictionaries containing submission data. Equivalent
@@ -3163,156 +4777,35 @@ class Gradebook(object):
             A list of dictionaries, one per submitted notebook
 
         """
-        # subquery the code scores
-        code_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.sum(Grade.score).label("code_score"),
-            func.sum(GradeCell.max_score).label("max_code_score"),
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "code")\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
-
-        # subquery for the written scores
-        written_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.sum(Grade.score).label("written_score"),
-            func.sum(GradeCell.max_score).label("max_written_score"),
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "markdown")\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
-        # subquery for the written scores
-        task_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.coalesce(func.sum(Grade.score), 0.0).label("task_score"),
-            func.sum(TaskCell.max_score).label("max_task_score"),
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, TaskCell)\
-         .filter(TaskCell.cell_type == "markdown")\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
+        try:
+            notebook = self.find_notebook(notebook_id, assignment_id)
+        except MissingEntry:
+            return []
+
+        # the scores are stored with each submission, and the maximum scores
+        # are the same for all of them
+        max_scores = {
+            "max_score": notebook.max_score,
+            "max_code_score": notebook.max_code_score,
+            "max_written_score": notebook.max_written_score,
+            "max_task_score": notebook.max_task_score
+        }
 
-        max_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.sum(task_scores.c.max_task_score).label("mmmm"),
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, task_scores)\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
-
-        all_scores = aliased(union_all(
-            self.db.query(
-                SubmittedNotebook.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(GradeCell.max_score).label("max_score"),
-            ).select_from(SubmittedNotebook
-            ).join(Grade, GradeCell)
-            .filter(GradeCell.cell_type == "code")
-            .group_by(SubmittedNotebook.id),
-            # subquery for the written scores
-            self.db.query(
-                SubmittedNotebook.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(GradeCell.max_score).label("max_score"),
-            ).select_from(SubmittedNotebook
-            ).join(Grade, GradeCell)\
-            .filter(GradeCell.cell_type == "markdown")\
-            .group_by(SubmittedNotebook.id),
-
-            self.db.query(
-                SubmittedNotebook.id.label('id'),
-                func.sum(Grade.score).label("score"),
-                func.sum(TaskCell.max_score).label("max_score"),
-            ).select_from(SubmittedNotebook
-            ).join(Grade, TaskCell)\
-            .filter(TaskCell.cell_type == "markdown")\
-            .group_by(SubmittedNotebook.id)
-        )
-        )
-        total_scores = self.db.query(
-            func.sum(all_scores.c.score).label("score"),
-            func.sum(all_scores.c.max_score).label("max_score"),
-            all_scores.c.id.label("id"),
-        )\
-            .group_by(all_scores.c.id)\
-            .subquery()
-
-        # subquery for needing manual grading
-
-        manual_grade = self.db.query(
-            SubmittedNotebook.id,
-            exists().where(Grade.needs_manual_grade).label("needs_manual_grade")
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Assignment, Notebook)\
-         .filter(
-             Grade.notebook_id == SubmittedNotebook.id,
-             Grade.needs_manual_grade)\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
-
-        # subquery for failed tests
-        failed_tests = self.db.query(
-            SubmittedNotebook.id,
-            exists().where(Grade.failed_tests).label("failed_tests")
-        ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Assignment, Notebook)\
-         .filter(
-             Grade.notebook_id == SubmittedNotebook.id,
-             Grade.failed_tests)\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
-
-        # full query
-        _manual_grade = func.coalesce(manual_grade.c.needs_manual_grade, False)
-        _failed_tests = func.coalesce(failed_tests.c.failed_tests, False)
         submissions = self.db.query(
             SubmittedNotebook.id, Notebook.name,
             Student.id, Student.first_name, Student.last_name,
-            func.coalesce(total_scores.c.score, 0.0),
-            func.coalesce(total_scores.c.max_score, 0.0),
-            func.coalesce(code_scores.c.code_score, 0.0),
-            func.coalesce(code_scores.c.max_code_score, 0.0),
-            func.coalesce(written_scores.c.written_score, 0.0),
-            func.coalesce(written_scores.c.max_written_score, 0.0),
-            func.coalesce(task_scores.c.task_score, 0.0),
-            func.coalesce(task_scores.c.max_task_score, 0.0),
-            _manual_grade, _failed_tests, SubmittedNotebook.flagged
+            SubmittedNotebook.score, SubmittedNotebook.code_score,
+            SubmittedNotebook.written_score, SubmittedNotebook.task_score,
+            SubmittedNotebook.needs_manual_grade, SubmittedNotebook.failed_tests,
+            SubmittedNotebook.flagged
         ).select_from(SubmittedNotebook
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade)\
-         .outerjoin(code_scores, SubmittedNotebook.id == code_scores.c.id)\
-         .outerjoin(written_scores, SubmittedNotebook.id == written_scores.c.id)\
-         .outerjoin(task_scores, SubmittedNotebook.id == task_scores.c.id)\
-         .outerjoin(total_scores, SubmittedNotebook.id == total_scores.c.id)\
-         .outerjoin(manual_grade, SubmittedNotebook.id == manual_grade.c.id)\
-         .outerjoin(failed_tests, SubmittedNotebook.id == failed_tests.c.id)\
-         .filter(and_(
-             Notebook.name == notebook_id,
-             Assignment.name == assignment_id,
-             Student.id == SubmittedAssignment.student_id,
-             SubmittedAssignment.id == SubmittedNotebook.assignment_id,
-             SubmittedNotebook.id == Grade.notebook_id,
-             SubmittedNotebook.id == total_scores.c.id,
-         )
-        ).group_by(
-             SubmittedNotebook.id, Notebook.name,
-             Student.id, Student.first_name, Student.last_name,
-             code_scores.c.code_score, code_scores.c.max_code_score,
-             written_scores.c.written_score, written_scores.c.max_written_score,
-             task_scores.c.task_score, task_scores.c.max_task_score,
-             total_scores.c.score, total_scores.c.max_score,
-             _manual_grade, _failed_tests, SubmittedNotebook.flagged)\
+        ).join(SubmittedAssignment, Notebook, Student)\
+         .filter(Notebook.id == notebook.id)\
          .all()
 
         keys = [
             "id", "name", "student", "first_name", "last_name",
-            "score", "max_score",
-            "code_score", "max_code_score",
-            "written_score", "max_written_score",
-            "task_score", "max_task_score",
-            "needs_manual_grade",
-            "failed_tests", "flagged"
+            "score", "code_score", "written_score", "task_score",
+            "needs_manual_grade", "failed_tests", "flagged"
         ]
-        return [dict(zip(keys, x)) for x in submissions]
+        return [dict(zip(keys, x), **max_scores) for x in submissions]
@@ -21,7 +21,9 @@ from .exportapp import ExportApp
 from .dbapp import (
     DbApp, DbStudentApp, DbAssignmentApp,
     DbStudentAddApp, DbStudentRemoveApp, DbStudentImportApp, DbStudentListApp,
-    DbAssignmentAddApp, DbAssignmentRemoveApp, DbAssignmentImportApp, DbAssignmentListApp)
+    DbAssignmentAddApp, DbAssignmentRemoveApp, DbAssignmentImportApp, DbAssignmentListApp,
+    DbGradesApp, DbGradesImportApp, DbRebuildAggregatesApp, DbRecomputePenaltiesApp,
+    DbSimulatePenaltiesApp)
 from .updateapp import UpdateApp
 from .zipcollectapp import ZipCollectApp
 from .generateconfigapp import GenerateConfigApp
@@ -61,6 +63,11 @@ __all__ = [
     'DbAssignmentImportApp',
     'DbAssignmentRemoveApp',
     'DbAssignmentListApp',
+    'DbGradesApp',
+    'DbGradesImportApp',
+    'DbRebuildAggregatesApp',
+    'DbRecomputePenaltiesApp',
+    'DbSimulatePenaltiesApp',
     'UpdateApp',
     'ZipCollectApp',
     'GenerateConfigApp',
@@ -12,7 +12,7 @@ from ..coursedir import CourseDirectory
 from ..converters import GenerateAssignment, Autograde, GenerateFeedback
 from ..exchange import ExchangeList, ExchangeReleaseAssignment, ExchangeReleaseFeedback, ExchangeFetchFeedback, ExchangeCollect, ExchangeError, ExchangeSubmit
 from ..api import MissingEntry, Gradebook, Student, SubmittedAssignment
-from ..utils import parse_utc, temp_attrs, capture_log, as_timezone, to_numeric_tz
+from ..utils import parse_utc, temp_attrs, capture_log, as_timezone, to_numeric_tz, find_stored_file
 from ..auth import Authenticator
 
 
@@ -281,7 +281,7 @@ class NbGraderAPI(LoggingConfigurable):
 
         return students
 
-    def get_assignment(self, assignment_id, released=None):
+    def get_assignment(self, assignment_id, released=None, statistics=None):
         """Get information about an assignment given its name.
 
         Arguments
@@ -291,6 +291,9 @@ class NbGraderAPI(LoggingConfigurable):
         released: list
             (Optional) A set of names of released assignments, obtained via
             self.get_released_assignments().
+        statistics: dict
+            (Optional) The submission statistics of the assignments, obtained
+            via :func:`~nbgrader.api.Gradebook.assignment_statistics`.
 
         Returns
         -------
@@ -313,7 +316,7 @@ class NbGraderAPI(LoggingConfigurable):
         # see if there is information about the assignment in the database
         try:
             with self.gradebook as gb:
-                db_assignment = gb.find_assignment(assignment_id)
+                db_assignment = gb.find_assignment(assignment_id, computed=True)
                 assignment = db_assignment.to_dict()
                 if db_assignment.duedate:
                     ts = as_timezone(db_assignment.duedate, self.timezone)
@@ -323,10 +326,13 @@ class NbGraderAPI(LoggingConfigurable):
                     assignment["display_duedate"] = None
                     assignment["duedate_notimezone"] = None
                 assignment["duedate_timezone"] = to_numeric_tz(self.timezone)
-                assignment["average_score"] = gb.average_assignment_score(assignment_id)
-                assignment["average_code_score"] = gb.average_assignment_code_score(assignment_id)
-                assignment["average_written_score"] = gb.average_assignment_written_score(assignment_id)
-                assignment["average_task_score"] = gb.average_assignment_task_score(assignment_id)
+                if statistics is None or assignment_id not in statistics:
+                    statistics = gb.assignment_statistics([assignment_id])
+                stats = statistics[assignment_id]
+                assignment["average_score"] = stats["average_score"]
+                assignment["average_code_score"] = stats["average_code_score"]
+                assignment["average_written_score"] = stats["average_written_score"]
+                assignment["average_task_score"] = stats["average_task_score"]
 
         except MissingEntry:
             assignment = {
@@ -385,10 +391,12 @@ class NbGraderAPI(LoggingConfigurable):
 
         """
         released = self.get_released_assignments()
+        with self.gradebook as gb:
+            statistics = gb.assignment_statistics()
 
         assignments = []
         for x in self.get_source_assignments():
-            assignments.append(self.get_assignment(x, released=released))
+            assignments.append(self.get_assignment(x, released=released, statistics=statistics))
 
         assignments.sort(key=lambda x: (x["duedate"] if x["duedate"] is not None else "None", x["name"]))
         return assignments
@@ -415,13 +423,15 @@ class NbGraderAPI(LoggingConfigurable):
 
             # if the assignment exists in the database
             if assignment and assignment.notebooks:
+                statistics = gb.notebook_statistics(assignment.name)
                 notebooks = []
                 for notebook in assignment.notebooks:
                     x = notebook.to_dict()
-                    x["average_score"] = gb.average_notebook_score(notebook.name, assignment.name)
-                    x["average_code_score"] = gb.average_notebook_code_score(notebook.name, assignment.name)
-                    x["average_written_score"] = gb.average_notebook_written_score(notebook.name, assignment.name)
-                    x["average_task_score"] = gb.average_notebook_task_score(notebook.name, assignment.name)
+                    stats = statistics[notebook.name]
+                    x["average_score"] = stats["average_score"]
+                    x["average_code_score"] = stats["average_code_score"]
+                    x["average_written_score"] = stats["average_written_score"]
+                    x["average_task_score"] = stats["average_task_score"]
                     notebooks.append(x)
 
             # if it doesn't exist in the database
@@ -524,7 +534,7 @@ class NbGraderAPI(LoggingConfigurable):
         elif student_id in autograded:
             with self.gradebook as gb:
                 try:
-                    db_submission = gb.find_submission(assignment_id, student_id)
+                    db_submission = gb.find_submission(assignment_id, student_id, computed=True)
                     submission = db_submission.to_dict()
                     if db_submission.timestamp:
                         submission["display_timestamp"] = as_timezone(
@@ -656,7 +666,7 @@ class NbGraderAPI(LoggingConfigurable):
                     assignment_id=assignment_id)),
                 "{}.ipynb".format(nb.name))
 
-            if os.path.exists(filename):
+            if find_stored_file(filename) is not None:
                 submissions.append(nb)
 
         return sorted(submissions, key=lambda x: x.id)
@@ -737,7 +747,7 @@ class NbGraderAPI(LoggingConfigurable):
 
         try:
             with self.gradebook as gb:
-                student = gb.find_student(student_id).to_dict()
+                student = gb.find_student(student_id, computed=True).to_dict()
 
         except MissingEntry:
             if student_id in submitted:
@@ -840,7 +850,7 @@ class NbGraderAPI(LoggingConfigurable):
                         assignment_id=assignment_id)),
                     "{}.ipynb".format(notebook.name))
 
-                if os.path.exists(filename):
+                if find_stored_file(filename) is not None:
                     submissions.append(notebook.to_dict())
                 else:
                     submissions.append({
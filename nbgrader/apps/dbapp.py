@@ -7,12 +7,14 @@ import sys
 import shutil
 
 from textwrap import dedent
-from traitlets import default, Unicode, Bool, List
+from traitlets import default, Unicode, Bool, List, Integer, Dict
+from traitlets.utils.importstring import import_item
 from datetime import datetime
 
 from . import NbGrader
-from ..api import Gradebook, MissingEntry, Student, Assignment
+from ..api import Gradebook, MissingEntry, InvalidEntry, Student, Assignment, dispose_engines
 from ..exchange import ExchangeList
+from ..preprocessors import AssignLatePenalties
 from .. import dbutil
 
 aliases = {
@@ -154,17 +156,23 @@ class DbGenericImportApp(DbBaseApp):
         These are the column names in database table that should not be
         imported via a csv file.
         """).strip())
+    batch_size = Integer(
+        1000,
+        help="The number of rows of the CSV file to write to the database in each transaction."
+    ).tag(config=True)
 
     def db_update_method_name(self):
         """
-        Name of the update method used on the Gradebook for this import app.
+        Name of the bulk update method used on the Gradebook for this import
+        app.
 
         Arguments
         ---------
-        instance_id: string
-            Identifies which instance you are updating based on self.primary_key
-        instance: dictionary
-            Contents for the update from the parsed csv rows; unpacked as kwargs
+        instances: iterable of dictionaries
+            Contents for the update from the parsed csv rows, including
+            self.primary_key
+        batch_size: int
+            The number of rows to write in each transaction
 
         """
         raise NotImplementedError
@@ -223,31 +231,41 @@ class DbGenericImportApp(DbBaseApp):
             with open(path, 'r') as fh:
                 reader = csv.DictReader(fh)
                 reader.fieldnames = self._preprocess_keys(reader.fieldnames)
-                for row in reader:
-                    if self.primary_key not in row:
-                        self.fail("Malformatted CSV file: must contain a column for '%s'" % self.primary_key)
-
-                    # make sure all the keys are actually allowed in the database,
-                    # and that any empty strings are parsed as None
-                    instance = {}
-                    for key, val in row.items():
-                        if key not in self.expected_keys:
-                            continue
-                        if val == '':
-                            instance[key] = None
-                        else:
-                            instance[key] = val
-                    instance_primary_key = instance.pop(self.primary_key)
-
-
-                    self.log.info("Creating/updating %s with %s '%s': %s",
-                                  self.table_class.__name__,
-                                  self.primary_key,
-                                  instance_primary_key,
-                                  instance)
-                    db_update_method = getattr(gb, self.db_update_method_name)
-                    db_update_method(instance_primary_key, **instance)
+                if self.primary_key not in reader.fieldnames:
+                    self.fail("Malformatted CSV file: must contain a column for '%s'" % self.primary_key)
+
+                db_update_method = getattr(gb, self.db_update_method_name)
+                try:
+                    summary = db_update_method(self._parse_rows(reader), batch_size=self.batch_size)
+                except InvalidEntry as e:
+                    self.fail("Could not import '%s': %s", path, e)
+
+        self.log.info("Imported %d %s rows: %d inserted, %d updated, %d unchanged",
+                      sum(summary.values()),
+                      self.table_class.__name__,
+                      summary["inserted"],
+                      summary["updated"],
+                      summary["unchanged"])
+
+    def _parse_rows(self, reader):
+        for row in reader:
+            # make sure all the keys are actually allowed in the database,
+            # and that any empty strings are parsed as None
+            instance = {}
+            for key, val in row.items():
+                if key not in self.expected_keys or key in self.excluded_keys:
+                    continue
+                if val == '':
+                    instance[key] = None
+                else:
+                    instance[key] = val
 
+            self.log.debug("Creating/updating %s with %s '%s': %s",
+                           self.table_class.__name__,
+                           self.primary_key,
+                           instance[self.primary_key],
+                           instance)
+            yield instance
 
     def _preprocess_keys(self, keys):
         """
@@ -278,7 +296,7 @@ class DbStudentImportApp(DbGenericImportApp):
 
     @property
     def db_update_method_name(self):
-        return "update_or_create_student"
+        return "update_or_create_students"
 
 
 class DbStudentListApp(DbBaseApp):
@@ -293,8 +311,8 @@ class DbStudentListApp(DbBaseApp):
         super(DbStudentListApp, self).start()
 
         with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
-            print("There are %d students in the database:" % len(gb.students))
-            for student in gb.students:
+            print("There are %d students in the database:" % gb.db.query(Student).count())
+            for student in gb.iter_students(tuples=True):
                 print("%s (%s, %s) -- %s, %s" % (student.id, student.last_name, student.first_name, student.email, student.lms_user_id))
 
 
@@ -402,7 +420,7 @@ class DbAssignmentImportApp(DbGenericImportApp):
 
     @property
     def db_update_method_name(self):
-        return "update_or_create_assignment"
+        return "update_or_create_assignments"
 
 class DbAssignmentListApp(DbBaseApp):
 
@@ -490,6 +508,103 @@ class DbAssignmentApp(DbBaseApp):
         super(DbAssignmentApp, self).start()
 
 
+class DbGradesImportApp(DbBaseApp):
+
+    name = u'nbgrader-db-grades-import'
+    description = u'Import manual grades and comments into the nbgrader database from a CSV file'
+
+    aliases = aliases
+    flags = flags
+
+    batch_size = Integer(
+        1000,
+        help="The number of rows of the CSV file to look up in the database at a time."
+    ).tag(config=True)
+
+    required_keys = ["assignment", "notebook", "cell", "student"]
+
+    @default('examples')
+    def examples_default(self):
+        return dedent(
+            """
+            This command imports manual grades and comments from a CSV file
+            into the database, e.g. for written answers that were graded
+            outside of the formgrader. The CSV file must have the following
+            columns:
+
+              - assignment (required)
+              - notebook (required)
+              - cell (required)
+              - student (required)
+              - manual_score
+              - comment
+
+            Empty scores and comments are left unchanged. All of the rows are
+            imported in a single transaction, so if any row does not match a
+            submitted cell, nothing is imported.
+            """).strip()
+
+    def start(self):
+        super(DbGradesImportApp, self).start()
+
+        if len(self.extra_args) != 1:
+            self.fail("Path to CSV file not provided.")
+
+        path = self.extra_args[0]
+        if not os.path.exists(path):
+            self.fail("No such file: '%s'", path)
+        self.log.info("Importing from: '%s'", path)
+
+        with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
+            with open(path, 'r') as fh:
+                reader = csv.DictReader(fh)
+                reader.fieldnames = [key.strip() for key in reader.fieldnames]
+                missing = [x for x in self.required_keys if x not in reader.fieldnames]
+                if missing:
+                    self.fail("Malformatted CSV file: must contain columns for %s", ", ".join(missing))
+
+                # empty strings are parsed as None, so that they are ignored
+                rows = ({key: val if val != '' else None for key, val in row.items()}
+                        for row in reader)
+                try:
+                    summary = gb.bulk_set_grades(rows, batch_size=self.batch_size)
+                except (MissingEntry, InvalidEntry) as e:
+                    self.fail("Could not import '%s': %s", path, e)
+
+        self.log.info("Updated %d grades and %d comments", summary["grades"], summary["comments"])
+
+
+class DbGradesApp(DbBaseApp):
+
+    name = u'nbgrader-db-grades'
+    description = u'Modify grades in the nbgrader database'
+
+    subcommands = {
+        "import": (DbGradesImportApp, "Import manual grades and comments into the database from a file")
+    }
+
+    @default("classes")
+    def _classes_default(self):
+        classes = super(DbGradesApp, self)._classes_default()
+
+        # include all the apps that have configurable options
+        for _, (app, _) in self.subcommands.items():
+            if len(app.class_traits(config=True)) > 0:
+                classes.append(app)
+
+        return classes
+
+    def start(self):
+        # check: is there a subapp given?
+        if self.subapp is None:
+            print("No grades command given. List of subcommands:\n")
+            for key, (app, desc) in self.subcommands.items():
+                print("    {}\n{}\n".format(key, desc))
+
+        # This starts subapps
+        super(DbGradesApp, self).start()
+
+
 class DbUpgradeApp(DbBaseApp):
     """Based on the `jupyterhub upgrade-db` command found in jupyterhub.app.UpgradeDB"""
 
@@ -517,6 +632,164 @@ class DbUpgradeApp(DbBaseApp):
             self._backup_db_file(db_file)
         self.log.info("Upgrading %s", self.coursedir.db_url)
         dbutil.upgrade(self.coursedir.db_url)
+        # make sure the upgraded schema is checked by the next gradebook
+        dispose_engines(self.coursedir.db_url)
+
+        # scores stored by older versions may be missing or out of date
+        with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
+            gb.rebuild_aggregates()
+
+
+class DbRebuildAggregatesApp(DbBaseApp):
+
+    name = u'nbgrader-db-rebuild-aggregates'
+    description = u'Recompute the stored scores of all submissions'
+
+    aliases = aliases
+    flags = flags
+
+    def start(self):
+        super(DbRebuildAggregatesApp, self).start()
+
+        with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
+            self.log.info("Recomputing the scores of all submissions in %s", self.coursedir.db_url)
+            gb.rebuild_aggregates()
+
+
+class DbRecomputePenaltiesApp(DbBaseApp):
+
+    name = u'nbgrader-db-recompute-penalties'
+    description = u'Recompute the late penalties of the submissions of an assignment'
+
+    aliases = aliases
+    flags = flags
+
+    examples = """
+        After moving the duedate of an assignment or granting extensions, the
+        late penalties of its submissions can be recomputed from the scores in
+        the database, without autograding them again:
+
+            nbgrader db assignment add ps1 --duedate="2015-02-04 17:00:00 UTC"
+            nbgrader db recompute-penalties ps1
+
+        The penalties are computed by the plugin configured with
+        `AssignLatePenalties.plugin_class`, like in `nbgrader autograde`.
+        """
+
+    def start(self):
+        super(DbRecomputePenaltiesApp, self).start()
+
+        if len(self.extra_args) != 1:
+            self.fail("No assignment id provided.")
+        assignment_id = self.extra_args[0]
+
+        penalties = AssignLatePenalties(parent=self)
+        penalties.init_plugin()
+
+        with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
+            try:
+                count = gb.recompute_late_penalties(assignment_id, penalties.late_submission_penalty)
+            except MissingEntry:
+                self.fail("No such assignment: %s", assignment_id)
+            self.log.info("Changed the late penalties of %d submitted notebooks", count)
+
+
+simulate_penalties_aliases = {}
+simulate_penalties_aliases.update(aliases)
+simulate_penalties_aliases.update({
+    'to': 'DbSimulatePenaltiesApp.output',
+})
+
+class DbSimulatePenaltiesApp(DbBaseApp):
+
+    name = u'nbgrader-db-simulate-penalties'
+    description = u'Compare the effect of late penalty policies on the scores of the students'
+
+    aliases = simulate_penalties_aliases
+    flags = flags
+
+    examples = """
+        The effect of each policy is computed from the scores in the database,
+        without changing them. A policy is the import path of a function of
+        the arrays of student ids, notebook scores and seconds late of all the
+        late submissions, which returns their penalties, for example:
+
+            import numpy as np
+
+            def ten_percent_per_day(students, scores, seconds_late):
+                return scores * np.minimum(1, 0.1 * np.ceil(seconds_late / 86400))
+
+        To compare it with the built-in policies for the assignment ps1, and
+        save the change of the score of each student to a CSV file:
+
+            nbgrader db simulate-penalties ps1 --to=deltas.csv \\
+                --DbSimulatePenaltiesApp.policies="{'ten': 'policies.ten_percent_per_day'}"
+
+        Without an assignment, all assignments are included.
+
+        This command requires NumPy, which is installed with:
+
+            pip install nbgrader[analysis]
+        """
+
+    policies = Dict(
+        {
+            'none': 'nbgrader.latepenalties.no_penalty',
+            'zero': 'nbgrader.latepenalties.zero_score',
+        },
+        help=dedent(
+            """
+            The policies to compare, as a dictionary of names and import
+            paths of functions (or the functions themselves). See
+            `nbgrader.latepenalties` for the arguments of the functions.
+            """
+        )
+    ).tag(config=True)
+
+    output = Unicode(
+        "",
+        help="A CSV file to write the change of the score of each student to."
+    ).tag(config=True)
+
+    def start(self):
+        super(DbSimulatePenaltiesApp, self).start()
+
+        if len(self.extra_args) > 1:
+            self.fail("Only one assignment can be given.")
+        assignment_id = self.extra_args[0] if self.extra_args else None
+
+        policies = {}
+        for name, policy in self.policies.items():
+            if isinstance(policy, str):
+                try:
+                    policy = import_item(policy)
+                except ImportError:
+                    self.fail("Cannot import policy '%s': %s", name, policy)
+            policies[name] = policy
+
+        with Gradebook(self.coursedir.db_url, self.course_id, self.authenticator) as gb:
+            try:
+                simulation = gb.penalty_simulation(assignment_id)
+            except MissingEntry:
+                self.fail("No such assignment: %s", assignment_id)
+            except ImportError as e:
+                self.fail(str(e))
+
+        summary = simulation.compare(policies)
+        print("%-20s %10s %10s %10s %10s %10s" % ("policy", "students", "mean", "min", "max", "penalty"))
+        for name, result in summary.items():
+            print("%-20s %10d %10.2f %10.2f %10.2f %10.2f" % (
+                name, result["students"], result["mean"], result["min"], result["max"], result["total"]))
+
+        if self.output:
+            deltas = [simulation.deltas(policy) for policy in policies.values()]
+            with open(self.output, "w") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["student"] + list(policies))
+                for i, student in enumerate(simulation.student_ids):
+                    writer.writerow([student] + [x[i] for x in deltas])
+            self.log.info("Wrote the score changes of %d students to %s",
+                          len(simulation.student_ids), self.output)
 
 
 class DbApp(DbBaseApp):
@@ -524,8 +797,8 @@ class DbApp(DbBaseApp):
     name = u'nbgrader-db'
     description = u'Perform operations on the nbgrader database'
 
-    subcommands = dict(
-        student=(
+    subcommands = {
+        'student': (
             DbStudentApp,
             dedent(
                 """
@@ -533,7 +806,7 @@ class DbApp(DbBaseApp):
                 """
             ).strip()
         ),
-        assignment=(
+        'assignment': (
             DbAssignmentApp,
             dedent(
                 """
@@ -541,7 +814,15 @@ class DbApp(DbBaseApp):
                 """
             ).strip()
         ),
-        upgrade=(
+        'grades': (
+            DbGradesApp,
+            dedent(
+                """
+                Import manual grades and comments into the nbgrader database.
+                """
+            ).strip()
+        ),
+        'upgrade': (
             DbUpgradeApp,
             dedent(
                 """
@@ -549,7 +830,31 @@ class DbApp(DbBaseApp):
                 """
             ).strip()
         ),
-    )
+        'rebuild-aggregates': (
+            DbRebuildAggregatesApp,
+            dedent(
+                """
+                Recompute the stored scores of all submissions.
+                """
+            ).strip()
+        ),
+        'recompute-penalties': (
+            DbRecomputePenaltiesApp,
+            dedent(
+                """
+                Recompute the late penalties of the submissions of an assignment.
+                """
+            ).strip()
+        ),
+        'simulate-penalties': (
+            DbSimulatePenaltiesApp,
+            dedent(
+                """
+                Compare the effect of late penalty policies on the scores of the students.
+                """
+            ).strip()
+        ),
+    }
 
     @default("classes")
     def _classes_default(self):
@@ -12,9 +12,16 @@ aliases = {
     'exporter': 'ExportApp.plugin_class',
     'assignment' : 'ExportPlugin.assignment',
     'student': 'ExportPlugin.student',
+    'since': 'ExportPlugin.since',
+    'watermark': 'ExportPlugin.watermark',
     'course': 'CourseDirectory.course_id'
 }
-flags = {}
+flags = {
+    'per-cell': (
+        {'CsvExportPlugin': {'per_cell': True}},
+        "Export one row per grade of each graded cell, rather than one row per assignment and student."
+    ),
+}
 
 
 class ExportApp(NbGrader):
@@ -45,6 +52,28 @@ class ExportApp(NbGrader):
         assignments. The assignments or studentIDs need to quoted if they 
         contain not only numbers. The square brackets are obligatory.
 
+        If the filename ends with ".gz", the CSV file is compressed with gzip:
+
+            nbgrader export --to grades.csv.gz
+
+        To export the score of every graded cell in every submission, rather
+        than the total score of each assignment:
+
+            nbgrader export --per-cell --to cells.csv
+
+        To export only the grades that changed after a given time, e.g. to
+        update the grades in a learning management system:
+
+            nbgrader export --since "2020-01-31 23:59:00 America/Los_Angeles"
+
+        Submissions that were removed after that time are exported as missing
+        submissions, with a score of zero.
+
+        Or, to keep track of the time of the last export in a file, so that
+        every export only contains the grades changed since the previous one:
+
+            nbgrader export --watermark .last_export --to changes.csv
+
         To change the export type, you will need a class that inherits from
         nbgrader.plugins.ExportPlugin. If your exporter is named
         `MyCustomExporter` and is saved in the file `myexporter.py`, then:
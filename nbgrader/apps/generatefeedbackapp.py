@@ -49,6 +49,10 @@ class GenerateFeedbackApp(NbGrader):
         likely `nbgrader formgrade`) have been run and that all grading is
         complete.
 
+        Existing feedback is only regenerated for notebooks whose grades or
+        comments have changed since the feedback was generated. To regenerate
+        all feedback, use the `--force` flag.
+
         To generate feedback for all submissions for "Problem Set 1":
             nbgrader generate_feedback "Problem Set 1"
 
@@ -7,7 +7,7 @@ from traitlets import Bool, List, Dict
 from .base import BaseConverter, NbGraderException
 from ..preprocessors import (
     AssignLatePenalties, ClearOutput, DeduplicateIds, OverwriteCells, SaveAutoGrades,
-    Execute, LimitOutput, OverwriteKernelspec, CheckCellMetadata)
+    Execute, LimitOutput, CompactOutput, OverwriteKernelspec, CheckCellMetadata)
 from ..api import Gradebook, MissingEntry
 from .. import utils
 
@@ -24,6 +24,18 @@ class Autograde(BaseConverter):
         )
     ).tag(config=True)
 
+    compress_output = Bool(
+        False,
+        help=dedent(
+            """
+            Whether to write the autograded notebooks in compressed (gzip)
+            form, e.g. "Problem 1.ipynb.gz" rather than "Problem 1.ipynb".
+            Compressed notebooks are read transparently by nbgrader, so this
+            reduces the size of the autograded directory.
+            """
+        )
+    ).tag(config=True)
+
     exclude_overwriting = Dict(
         {},
         help=dedent(
@@ -62,6 +74,7 @@ class Autograde(BaseConverter):
         LimitOutput,
         SaveAutoGrades,
         AssignLatePenalties,
+        CompactOutput,
         CheckCellMetadata
     ])
 
@@ -183,7 +196,8 @@ class Autograde(BaseConverter):
         self._init_preprocessors()
         super(Autograde, self).convert_single_notebook(notebook_filename)
 
-        notebook_filename = os.path.join(self.writer.build_directory, os.path.basename(notebook_filename))
+        notebook_filename = utils.find_stored_file(
+            os.path.join(self.writer.build_directory, os.path.basename(notebook_filename)))
         self.log.info("Autograding %s", notebook_filename)
         self._sanitizing = False
         self._init_preprocessors()
@@ -1,5 +1,6 @@
 import os
 import glob
+import gzip
 import re
 import shutil
 import sqlalchemy
@@ -13,7 +14,9 @@ from nbconvert.exporters import Exporter, NotebookExporter
 from nbconvert.writers import FilesWriter
 
 from ..coursedir import CourseDirectory
-from ..utils import find_all_files, rmtree, remove
+from ..utils import (
+    find_all_files, rmtree, remove, find_stored_file, open_stored_file,
+    is_compressed, COMPRESSED_EXTENSION)
 from ..preprocessors.execute import UnresponsiveKernelError
 from ..nbgraderformat import SchemaTooOldError, SchemaTooNewError
 import typing
@@ -50,6 +53,12 @@ class BaseConverter(LoggingConfigurable):
     def _permissions_default(self) -> int:
         return 664 if self.coursedir.groupshared else 444
 
+    #: Whether to write output files in compressed (gzip) form. This is only
+    #: configurable for the converters whose output is read by nbgrader
+    #: itself (Autograde and GenerateFeedback), as students need
+    #: uncompressed notebooks.
+    compress_output = False
+
     coursedir = Instance(CourseDirectory, allow_none=True)
 
     def __init__(self, coursedir: CourseDirectory = None, **kwargs: typing.Any) -> None:
@@ -66,10 +75,7 @@ class BaseConverter(LoggingConfigurable):
 
     def start(self) -> None:
         self.init_notebooks()
-        self.writer = FilesWriter(parent=self, config=self.config)
-        self.exporter = self.exporter_class(parent=self, config=self.config)
-        for pp in self.preprocessors:
-            self.exporter.register_preprocessor(pp)
+        self.init_exporter()
         currdir = os.getcwd()
         os.chdir(self.coursedir.root)
         try:
@@ -87,6 +93,12 @@ class BaseConverter(LoggingConfigurable):
                 classes.append(pp)
         return classes
 
+    def init_exporter(self) -> None:
+        self.writer = FilesWriter(parent=self, config=self.config)
+        self.exporter = self.exporter_class(parent=self, config=self.config)
+        for pp in self.preprocessors:
+            self.exporter.register_preprocessor(pp)
+
     @property
     def _input_directory(self):
         raise NotImplementedError
@@ -108,6 +120,11 @@ class BaseConverter(LoggingConfigurable):
         for assignment in glob.glob(assignment_glob):
             notebook_glob = os.path.join(assignment, self.coursedir.notebook_id + ".ipynb")
             found = glob.glob(notebook_glob)
+            # compressed notebooks are only used if there is no uncompressed
+            # version of the same notebook
+            for filename in glob.glob(notebook_glob + COMPRESSED_EXTENSION):
+                if filename[:-len(COMPRESSED_EXTENSION)] not in found:
+                    found.append(filename)
             if len(found) == 0:
                 self.log.warning("No notebooks were matched by '%s'", notebook_glob)
                 continue
@@ -133,7 +150,7 @@ class BaseConverter(LoggingConfigurable):
     def init_single_notebook_resources(self, notebook_filename: str) -> typing.Dict[str, typing.Any]:
         regexp = re.escape(os.path.sep).join([
             self._format_source("(?P<assignment_id>.*)", "(?P<student_id>.*)", escape=True),
-            "(?P<notebook_id>.*).ipynb"
+            "(?P<notebook_id>.*).ipynb(?:{})?$".format(re.escape(COMPRESSED_EXTENSION))
         ])
 
         m = re.match(regexp, notebook_filename)
@@ -165,9 +182,35 @@ class BaseConverter(LoggingConfigurable):
         self.writer.build_directory = self._format_dest(
             resources['nbgrader']['assignment'], resources['nbgrader']['student'])
 
+        # compress the results, if requested
+        if self.compress_output:
+            if isinstance(output, str):
+                output = output.encode('utf-8')
+            output = gzip.compress(output)
+            resources['output_extension'] = resources.get(
+                'output_extension', self.exporter.file_extension) + COMPRESSED_EXTENSION
+
         # write out the results
         self.writer.write(output, resources, notebook_name=resources['unique_key'])
 
+    def _existing_outputs(self, dest: str) -> typing.List[str]:
+        """Find the existing output files (compressed or not) in ``dest``
+        for the notebooks that are being converted."""
+        paths = []
+        for notebook in self.notebooks:
+            filename = self._notebook_name(notebook) + self.exporter.file_extension
+            path = os.path.join(dest, filename)
+            for candidate in (path, path + COMPRESSED_EXTENSION):
+                if os.path.exists(candidate):
+                    paths.append(candidate)
+        return paths
+
+    def _notebook_name(self, notebook_filename: str) -> str:
+        basename = os.path.basename(notebook_filename)
+        if is_compressed(basename):
+            basename = basename[:-len(COMPRESSED_EXTENSION)]
+        return os.path.splitext(basename)[0]
+
     def init_destination(self, assignment_id: str, student_id: str) -> bool:
         """Initialize the destination for an assignment. Returns whether the
         assignment should actually be processed or not (i.e. whether the
@@ -188,9 +231,9 @@ class BaseConverter(LoggingConfigurable):
         else:
             # if any of the notebooks don't exist, then we want to process them
             for notebook in self.notebooks:
-                filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
+                filename = self._notebook_name(notebook) + self.exporter.file_extension
                 path = os.path.join(dest, filename)
-                if not os.path.exists(path):
+                if find_stored_file(path) is None:
                     return True
 
         # if we have specified --force, then always remove existing stuff
@@ -199,12 +242,9 @@ class BaseConverter(LoggingConfigurable):
                 self.log.warning("Removing existing assignment: {}".format(dest))
                 rmtree(dest)
             else:
-                for notebook in self.notebooks:
-                    filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
-                    path = os.path.join(dest, filename)
-                    if os.path.exists(path):
-                        self.log.warning("Removing existing notebook: {}".format(path))
-                        remove(path)
+                for path in self._existing_outputs(dest):
+                    self.log.warning("Removing existing notebook: {}".format(path))
+                    remove(path)
             return True
 
         src = self._format_source(assignment_id, student_id)
@@ -218,12 +258,9 @@ class BaseConverter(LoggingConfigurable):
                 self.log.warning("Updating existing assignment: {}".format(dest))
                 rmtree(dest)
             else:
-                for notebook in self.notebooks:
-                    filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
-                    path = os.path.join(dest, filename)
-                    if os.path.exists(path):
-                        self.log.warning("Updating existing notebook: {}".format(path))
-                        remove(path)
+                for path in self._existing_outputs(dest):
+                    self.log.warning("Updating existing notebook: {}".format(path))
+                    remove(path)
             return True
 
         # otherwise, we should skip the assignment
@@ -239,7 +276,8 @@ class BaseConverter(LoggingConfigurable):
         dest = self._format_dest(assignment_id, student_id)
 
         # detect other files in the source directory
-        for filename in find_all_files(source, self.coursedir.ignore + ["*.ipynb"]):
+        notebook_globs = ["*.ipynb", "*.ipynb" + COMPRESSED_EXTENSION]
+        for filename in find_all_files(source, self.coursedir.ignore + notebook_globs):
             # Make sure folder exists.
             path = os.path.join(dest, os.path.relpath(filename, source))
             if not os.path.exists(os.path.dirname(path)):
@@ -290,38 +328,96 @@ class BaseConverter(LoggingConfigurable):
         """
         self.log.info("Converting notebook %s", notebook_filename)
         resources = self.init_single_notebook_resources(notebook_filename)
-        output, resources = self.exporter.from_filename(notebook_filename, resources=resources)
+        if is_compressed(notebook_filename):
+            resources['metadata'] = {
+                'name': self._notebook_name(notebook_filename),
+                'path': os.path.dirname(notebook_filename)
+            }
+            with open_stored_file(notebook_filename) as fh:
+                output, resources = self.exporter.from_file(fh, resources=resources)
+        else:
+            output, resources = self.exporter.from_filename(notebook_filename, resources=resources)
         self.write_single_notebook(output, resources)
 
-    def convert_notebooks(self) -> None:
-        errors = []
+    def _parse_assignment(self, assignment: str) -> typing.Dict[str, str]:
+        """Parse out the assignment and student ids of an assignment directory."""
+        regexp = self._format_source("(?P<assignment_id>.*)", "(?P<student_id>.*)", escape=True)
+        m = re.match(regexp, assignment)
+        if m is None:
+            msg = "Could not match '%s' with regexp '%s'" % (assignment, regexp)
+            self.log.error(msg)
+            raise NbGraderException(msg)
+        return m.groupdict()
 
-        def _handle_failure(gd: typing.Dict[str, str]) -> None:
-            dest = os.path.normpath(self._format_dest(gd['assignment_id'], gd['student_id']))
-            if self.coursedir.notebook_id == "*":
-                if os.path.exists(dest):
-                    self.log.warning("Removing failed assignment: {}".format(dest))
-                    rmtree(dest)
+    def _handle_failure(self, gd: typing.Dict[str, str]) -> None:
+        dest = os.path.normpath(self._format_dest(gd['assignment_id'], gd['student_id']))
+        if self.coursedir.notebook_id == "*":
+            if os.path.exists(dest):
+                self.log.warning("Removing failed assignment: {}".format(dest))
+                rmtree(dest)
+        else:
+            for path in self._existing_outputs(dest):
+                self.log.warning("Removing failed notebook: {}".format(path))
+                remove(path)
+
+    # errors that stop the conversion of all the remaining assignments,
+    # rather than only failing the assignment they were raised for
+    _fatal_errors = (sqlalchemy.exc.OperationalError, SchemaTooOldError, SchemaTooNewError)
+
+    def _raise_fatal_error(self, error_class: type, tb: str) -> None:
+        """Report one of the fatal errors (given by its class and
+        formatted traceback) and stop the conversion."""
+        if issubclass(error_class, sqlalchemy.exc.OperationalError):
+            self.log.error(tb)
+            msg = (
+                "There was an error accessing the nbgrader database. This "
+                "may occur if you recently upgraded nbgrader. To resolve "
+                "the issue, first BACK UP your database and then run the "
+                "command `nbgrader db upgrade`."
+            )
+        elif issubclass(error_class, SchemaTooOldError):
+            msg = (
+                "One or more notebooks in the assignment use an old version \n"
+                "of the nbgrader metadata format. Please **back up your class files \n"
+                "directory** and then update the metadata using:\n\nnbgrader update .\n"
+            )
+        else:
+            msg = (
+                "One or more notebooks in the assignment use an newer version \n"
+                "of the nbgrader metadata format. Please update your version of \n"
+                "nbgrader to the latest version to be able to use this notebook.\n"
+            )
+        self.log.error(msg)
+        raise NbGraderException(msg)
+
+    def _report_errors(self, errors: typing.List[typing.Tuple[str, str]]) -> None:
+        if len(errors) > 0:
+            for assignment_id, student_id in errors:
+                self.log.error(
+                    "There was an error processing assignment '{}' for student '{}'".format(
+                        assignment_id, student_id))
+
+            if self.logfile:
+                msg = (
+                    "Please see the error log ({}) for details on the specific "
+                    "errors on the above failures.".format(self.logfile))
             else:
-                for notebook in self.notebooks:
-                    filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
-                    path = os.path.join(dest, filename)
-                    if os.path.exists(path):
-                        self.log.warning("Removing failed notebook: {}".format(path))
-                        remove(path)
+                msg = (
+                    "Please see the the above traceback for details on the specific "
+                    "errors on the above failures.")
+
+            self.log.error(msg)
+            raise NbGraderException(msg)
+
+    def convert_notebooks(self) -> None:
+        errors = []
 
         for assignment in sorted(self.assignments.keys()):
             # initialize the list of notebooks and the exporter
             self.notebooks = sorted(self.assignments[assignment])
 
             # parse out the assignment and student ids
-            regexp = self._format_source("(?P<assignment_id>.*)", "(?P<student_id>.*)", escape=True)
-            m = re.match(regexp, assignment)
-            if m is None:
-                msg = "Could not match '%s' with regexp '%s'" % (assignment, regexp)
-                self.log.error(msg)
-                raise NbGraderException(msg)
-            gd = m.groupdict()
+            gd = self._parse_assignment(assignment)
 
             try:
                 # determine whether we actually even want to process this submission
@@ -350,42 +446,14 @@ class BaseConverter(LoggingConfigurable):
                     "just throw an error rather than enter an infinite loop). ",
                     assignment)
                 errors.append((gd['assignment_id'], gd['student_id']))
-                _handle_failure(gd)
+                self._handle_failure(gd)
 
-            except sqlalchemy.exc.OperationalError:
-                _handle_failure(gd)
-                self.log.error(traceback.format_exc())
-                msg = (
-                    "There was an error accessing the nbgrader database. This "
-                    "may occur if you recently upgraded nbgrader. To resolve "
-                    "the issue, first BACK UP your database and then run the "
-                    "command `nbgrader db upgrade`."
-                )
-                self.log.error(msg)
-                raise NbGraderException(msg)
-
-            except SchemaTooOldError:
-                _handle_failure(gd)
-                msg = (
-                    "One or more notebooks in the assignment use an old version \n"
-                    "of the nbgrader metadata format. Please **back up your class files \n"
-                    "directory** and then update the metadata using:\n\nnbgrader update .\n"
-                )
-                self.log.error(msg)
-                raise NbGraderException(msg)
-
-            except SchemaTooNewError:
-                _handle_failure(gd)
-                msg = (
-                    "One or more notebooks in the assignment use an newer version \n"
-                    "of the nbgrader metadata format. Please update your version of \n"
-                    "nbgrader to the latest version to be able to use this notebook.\n"
-                )
-                self.log.error(msg)
-                raise NbGraderException(msg)
+            except self._fatal_errors as e:
+                self._handle_failure(gd)
+                self._raise_fatal_error(type(e), traceback.format_exc())
 
             except KeyboardInterrupt:
-                _handle_failure(gd)
+                self._handle_failure(gd)
                 self.log.error("Canceled")
                 raise
 
@@ -393,22 +461,6 @@ class BaseConverter(LoggingConfigurable):
                 self.log.error("There was an error processing assignment: %s", assignment)
                 self.log.error(traceback.format_exc())
                 errors.append((gd['assignment_id'], gd['student_id']))
-                _handle_failure(gd)
-
-        if len(errors) > 0:
-            for assignment_id, student_id in errors:
-                self.log.error(
-                    "There was an error processing assignment '{}' for student '{}'".format(
-                        assignment_id, student_id))
-
-            if self.logfile:
-                msg = (
-                    "Please see the error log ({}) for details on the specific "
-                    "errors on the above failures.".format(self.logfile))
-            else:
-                msg = (
-                    "Please see the the above traceback for details on the specific "
-                    "errors on the above failures.")
+                self._handle_failure(gd)
 
-            self.log.error(msg)
-            raise NbGraderException(msg)
+        self._report_errors(errors)
@@ -1,12 +1,87 @@
 import os
+import hashlib
+import multiprocessing
+import signal
+import traceback
 
+from textwrap import dedent
 from traitlets.config import Config
-from traitlets import List, default
+from traitlets import List, Integer, Bool, default
 from nbconvert.exporters import HTMLExporter
-from nbconvert.preprocessors import CSSHTMLHeaderPreprocessor
+from nbconvert.preprocessors import CSSHTMLHeaderPreprocessor, Preprocessor
 
 from .base import BaseConverter
+from ..api import Gradebook, MissingEntry
+from ..coursedir import CourseDirectory
 from ..preprocessors import GetGrades
+from ..utils import remove
+
+
+class CachedCSSHTMLHeaderPreprocessor(CSSHTMLHeaderPreprocessor):
+    """Variant of CSSHTMLHeaderPreprocessor that only generates the CSS
+    header once, rather than reading the stylesheets again for every
+    notebook."""
+
+    def _generate_header(self, resources):
+        key = resources['config_dir']
+        if getattr(self, '_header_cache', None) is None:
+            self._header_cache = {}
+        if key not in self._header_cache:
+            self._header_cache[key] = super(CachedCSSHTMLHeaderPreprocessor, self)._generate_header(resources)
+        return list(self._header_cache[key])
+
+
+class SharedFeedbackAssets(Preprocessor):
+    """Moves the CSS header that would otherwise be inlined into every
+    feedback file into a single stylesheet, which is named after a hash of
+    its contents, written next to the feedback and linked from it."""
+
+    _asset = None
+
+    def preprocess(self, nb, resources):
+        css = "\n".join(resources['inlining']['css'])
+        if self._asset is None or self._asset[1] != css:
+            digest = hashlib.sha1(css.encode('utf-8')).hexdigest()[:16]
+            self._asset = ("feedback-{}.css".format(digest), css)
+        name, css = self._asset
+
+        resources['inlining']['css'] = []
+        resources.setdefault('outputs', {})[name] = css.encode('utf-8')
+        resources['nbgrader']['feedback_assets'] = [name]
+        return nb, resources
+
+
+# the converter used by each worker process when rendering feedback in parallel
+_worker = None
+
+
+def _init_worker(config, coursedir_traits):
+    global _worker
+    # Ctrl-C is handled by the parent process, which terminates the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    coursedir = CourseDirectory(config=config, **coursedir_traits)
+    os.chdir(coursedir.root)
+    _worker = GenerateFeedback(coursedir=coursedir, config=config)
+    _worker.init_exporter()
+    # compile the template up front, so that it is shared by all notebooks
+    # rendered by this worker
+    _worker.exporter.template
+
+
+def _convert_single_notebook(notebook_filename):
+    """Render a notebook, returning a pair of the feedback that was written
+    (see :func:`GenerateFeedback._record_feedback`), which the parent process
+    records in the database, and None if it succeeded. Otherwise the pair
+    is None and the traceback of the error, along with its class if it is
+    one of the errors that stop the conversion (which is None for other
+    errors)."""
+    _worker._rendered = []
+    try:
+        _worker.convert_single_notebook(notebook_filename)
+    except Exception as e:
+        fatal = [cls for cls in _worker._fatal_errors if isinstance(e, cls)]
+        return None, ((fatal[0] if fatal else None), traceback.format_exc())
+    return _worker._rendered, None
 
 
 class GenerateFeedback(BaseConverter):
@@ -21,9 +96,47 @@ class GenerateFeedback(BaseConverter):
 
     preprocessors = List([
         GetGrades,
-        CSSHTMLHeaderPreprocessor
+        CachedCSSHTMLHeaderPreprocessor
     ])
 
+    workers = Integer(
+        1,
+        help=dedent(
+            """
+            Number of worker processes used to render feedback. Each worker
+            compiles the feedback template and generates the CSS header once,
+            and then renders submissions as they are assigned to it. A value
+            of 0 uses one worker per CPU; a value of 1 renders feedback in
+            this process, one submission at a time.
+            """
+        )
+    ).tag(config=True)
+
+    shared_assets = Bool(
+        False,
+        help=dedent(
+            """
+            Whether to link the notebook stylesheets from a shared file rather
+            than inlining them into every feedback file. The shared file is
+            named after a hash of its contents, and is written next to the
+            feedback and released and fetched along with it. This makes the
+            feedback files much smaller.
+            """
+        )
+    ).tag(config=True)
+
+    compress_output = Bool(
+        False,
+        help=dedent(
+            """
+            Whether to write the feedback in compressed (gzip) form, e.g.
+            "Problem 1.html.gz" rather than "Problem 1.html". The feedback is
+            decompressed when it is released, so students still receive
+            plain HTML.
+            """
+        )
+    ).tag(config=True)
+
     @default("classes")
     def _classes_default(self):
         classes = super(GenerateFeedback, self)._classes_default()
@@ -61,3 +174,157 @@ class GenerateFeedback(BaseConverter):
             template_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'server_extensions', 'formgrader', 'templates'))
             c.HTMLExporter.template_path = ['.', template_path]
         self.update_config(c)
+
+    def init_exporter(self):
+        super(GenerateFeedback, self).init_exporter()
+        if self.shared_assets:
+            self.exporter.register_preprocessor(SharedFeedbackAssets, enabled=True)
+
+    def _changed_notebooks(self, assignment_id, student_id):
+        """Find the notebooks whose grades or comments have changed since
+        their feedback was generated."""
+        changed = []
+        with Gradebook(self.coursedir.db_url, self.coursedir.course_id) as gb:
+            for notebook in self.notebooks:
+                try:
+                    submission = gb.find_submission_notebook(
+                        self._notebook_name(notebook), assignment_id, student_id)
+                except MissingEntry:
+                    continue
+                if submission.last_modified != submission.feedback_last_modified:
+                    changed.append(notebook)
+        return changed
+
+    def init_destination(self, assignment_id, student_id):
+        if super(GenerateFeedback, self).init_destination(assignment_id, student_id):
+            return True
+
+        if self.coursedir.student_id_exclude:
+            if student_id in self.coursedir.student_id_exclude.split(','):
+                return False
+
+        # the feedback is up to date with the submission, but it may still
+        # need to be regenerated if the grades or comments have changed
+        changed = self._changed_notebooks(assignment_id, student_id)
+        if len(changed) == 0:
+            return False
+
+        dest = os.path.normpath(self._format_dest(assignment_id, student_id))
+        self.notebooks = changed
+        for path in self._existing_outputs(dest):
+            self.log.warning("Updating feedback with changed grades: {}".format(path))
+            remove(path)
+        return True
+
+    #: The feedback written by a worker process, which is recorded by the
+    #: parent process rather than by the worker (None outside of workers)
+    _rendered = None
+
+    def write_single_notebook(self, output, resources):
+        super(GenerateFeedback, self).write_single_notebook(output, resources)
+
+        # record which version of the grades and comments the feedback shows
+        rendered = (
+            resources['nbgrader']['notebook'],
+            resources['nbgrader']['assignment'],
+            resources['nbgrader']['student'],
+            resources['nbgrader'].get('last_modified'))
+        if self._rendered is not None:
+            self._rendered.append(rendered)
+        else:
+            self._record_feedback([rendered])
+
+    def _record_feedback(self, rendered):
+        """Record the version of the grades and comments shown by feedback,
+        given as (notebook, assignment, student, last modified) tuples, in a
+        single transaction."""
+        with Gradebook(self.coursedir.db_url, self.coursedir.course_id) as gb:
+            for notebook_id, assignment_id, student_id, last_modified in rendered:
+                submission = gb.find_submission_notebook(notebook_id, assignment_id, student_id)
+                submission.feedback_last_modified = last_modified
+            gb.db.commit()
+
+    def convert_notebooks(self):
+        workers = self.workers if self.workers > 0 else multiprocessing.cpu_count()
+        if workers == 1:
+            super(GenerateFeedback, self).convert_notebooks()
+            return
+
+        # prepare the destinations up front (this is cheap), and collect the
+        # notebooks that need to be rendered
+        errors = []
+        jobs = []
+        for assignment in sorted(self.assignments.keys()):
+            self.notebooks = sorted(self.assignments[assignment])
+            gd = self._parse_assignment(assignment)
+            try:
+                if not self.init_destination(gd['assignment_id'], gd['student_id']):
+                    continue
+                self.init_assignment(gd['assignment_id'], gd['student_id'])
+            except self._fatal_errors as e:
+                self._handle_failure(gd)
+                self._raise_fatal_error(type(e), traceback.format_exc())
+            except KeyboardInterrupt:
+                self._handle_failure(gd)
+                self.log.error("Canceled")
+                raise
+            except Exception:
+                self.log.error("There was an error processing assignment: %s", assignment)
+                self.log.error(traceback.format_exc())
+                errors.append((gd['assignment_id'], gd['student_id']))
+                self._handle_failure(gd)
+                continue
+            jobs.append((assignment, gd, self.notebooks))
+
+        filenames = [filename for _, _, notebooks in jobs for filename in notebooks]
+        if filenames:
+            self.log.info("Rendering %d notebooks with %d workers", len(filenames), workers)
+            coursedir_traits = {
+                name: getattr(self.coursedir, name)
+                for name in self.coursedir.trait_names(config=True)}
+            pool = multiprocessing.Pool(
+                min(workers, len(filenames)), _init_worker, (self.config, coursedir_traits))
+            try:
+                results = dict(zip(filenames, pool.map(_convert_single_notebook, filenames, chunksize=1)))
+                pool.close()
+            except KeyboardInterrupt:
+                pool.terminate()
+                for _, gd, notebooks in jobs:
+                    self.notebooks = notebooks
+                    self._handle_failure(gd)
+                self.log.error("Canceled")
+                raise
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            results = {}
+
+        # the workers only read from the database, so that they do not wait
+        # for each other to write; the feedback they rendered is recorded here
+        rendered = []
+        for assignment, gd, notebooks in jobs:
+            self.notebooks = notebooks
+            failures = [results[filename][1] for filename in notebooks if results[filename][1] is not None]
+            for fatal, tb in failures:
+                if fatal is not None:
+                    self._handle_failure(gd)
+                    self._raise_fatal_error(fatal, tb)
+            if failures:
+                self.log.error("There was an error processing assignment: %s", assignment)
+                for _, tb in failures:
+                    self.log.error(tb)
+                errors.append((gd['assignment_id'], gd['student_id']))
+                self._handle_failure(gd)
+            else:
+                self.set_permissions(gd['assignment_id'], gd['student_id'])
+                for filename in notebooks:
+                    rendered.extend(results[filename][0])
+
+        if rendered:
+            try:
+                self._record_feedback(rendered)
+            except self._fatal_errors as e:
+                self._raise_fatal_error(type(e), traceback.format_exc())
+
+        self._report_errors(sorted(errors))
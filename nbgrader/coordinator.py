@@ -0,0 +1,234 @@
+"""A single writer for the gradebook, shared by the threads of a process.
+
+SQLite allows only one writer at a time, so threads that each commit their
+own changes to the same database wait for each other and may fail with
+``database is locked``. A :class:`WriteCoordinator` instead applies the
+changes of all of the threads from one thread with its own
+:class:`~nbgrader.api.Gradebook`, grouping the changes that are waiting into
+a single transaction.
+
+The coordinator only serializes the writes of the threads of one process.
+It does not prevent ``database is locked`` errors between processes, such as
+the formgrader, ``nbgrader collect`` and ``nbgrader autograde`` running at
+the same time, which each write to the database with their own connections.
+Parallel feedback workers avoid these errors by leaving the writes to their
+parent process (see :class:`~nbgrader.converters.GenerateFeedback`), rather
+than through a coordinator.
+
+"""
+
+import logging
+import queue
+import threading
+
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Union
+
+from .api import Gradebook, _is_memory_db
+from .auth import Authenticator
+
+
+class _Mutation(object):
+
+    def __init__(self, method: Union[str, Callable[..., Any]], args: tuple, kwargs: dict) -> None:
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()  # type: Future
+
+    def __call__(self, gb: Gradebook) -> Any:
+        if isinstance(self.method, str):
+            return getattr(gb, self.method)(*self.args, **self.kwargs)
+        return self.method(gb, *self.args, **self.kwargs)
+
+
+class WriteCoordinator(object):
+    """Apply changes to the gradebook from a single thread.
+
+    Changes are submitted with :func:`submit`, from any thread, and are
+    applied in the order in which they were submitted. The changes that are
+    waiting when the writer is free are applied in a single transaction (see
+    :func:`~nbgrader.api.Gradebook.transaction`). If the transaction fails,
+    its changes are applied again one at a time, so that a bad change does
+    not fail the others.
+
+    At most ``max_pending`` changes can be waiting at once; :func:`submit`
+    blocks when there are more, so that the threads submitting changes do
+    not get too far ahead of the database.
+
+    """
+
+    def __init__(self,
+                 db_url: str,
+                 course_id: str = "default_course",
+                 authenticator: Optional[Authenticator] = None,
+                 batch_size: int = 100,
+                 max_pending: int = 1000,
+                 log: Optional[logging.Logger] = None) -> None:
+        """Start the writer thread.
+
+        Parameters
+        ----------
+        db_url:
+            The URL to the database, e.g. ``sqlite:///grades.db``
+        course_id:
+            identifier of the course
+        authenticator:
+            An authenticator instance for communicating with an external
+            database.
+        batch_size:
+            the maximum number of changes applied in one transaction
+        max_pending:
+            the maximum number of changes waiting to be applied, or 0 for
+            no limit
+
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if _is_memory_db(db_url):
+            # each thread has its own in-memory database
+            raise ValueError("In-memory databases cannot be shared between threads")
+
+        self.db_url = db_url
+        self.course_id = course_id
+        self.authenticator = authenticator
+        self.batch_size = batch_size
+        self.log = log or logging.getLogger(__name__)
+
+        self._queue = queue.Queue(max_pending)  # type: queue.Queue
+        self._closed = False
+        # the number of changes that are being put on the queue, which must
+        # all be queued before the writer is stopped
+        self._submitting = 0
+        self._lock = threading.Condition()
+
+        # open the gradebook here, so that errors connecting to the database
+        # are raised by the constructor
+        self._gradebook = Gradebook(db_url, course_id, authenticator)
+        self._gradebook.db.remove()
+        self._thread = threading.Thread(target=self._run, name="nbgrader-writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self) -> 'WriteCoordinator':
+        return self
+
+    def __exit__(self, exc_type: Optional[Any], exc_value: Optional[Any], traceback: Optional[Any]) -> None:
+        self.close()
+
+    def submit(self,
+               method: Union[str, Callable[..., Any]],
+               *args: Any,
+               timeout: Optional[float] = None,
+               **kwargs: Any) -> Future:
+        """Submit a change to be applied by the writer thread.
+
+        Parameters
+        ----------
+        method:
+            the name of a :class:`~nbgrader.api.Gradebook` method, e.g.
+            ``"bulk_set_grades"``, or a function that is called with the
+            gradebook of the writer as its first argument
+        args, kwargs:
+            the other arguments of the method or function
+        timeout:
+            how long to wait (in seconds) if too many changes are waiting,
+            or None to wait as long as necessary
+
+        Returns
+        -------
+        future : :class:`concurrent.futures.Future`
+            The result of the method or function, or the exception it
+            raised. Objects loaded by the gradebook of the writer must not
+            be used from other threads, so functions should return plain
+            values (e.g. using ``to_dict``).
+
+        Raises
+        ------
+        queue.Full:
+            if the change could not be submitted within ``timeout``
+
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write coordinator is closed")
+            self._submitting += 1
+        try:
+            mutation = _Mutation(method, args, kwargs)
+            self._queue.put(mutation, timeout=timeout)
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                self._lock.notify_all()
+        return mutation.future
+
+    def apply(self, method: Union[str, Callable[..., Any]], *args: Any, **kwargs: Any) -> Any:
+        """Submit a change and wait until it has been applied, returning its
+        result or raising its exception."""
+        return self.submit(method, *args, **kwargs).result()
+
+    def flush(self) -> None:
+        """Wait until all the changes submitted so far have been applied."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Apply the changes that are waiting, stop the writer thread and
+        close its gradebook."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # the writer keeps applying changes meanwhile, so the changes
+            # that are waiting for room on the queue are queued eventually
+            self._lock.wait_for(lambda: self._submitting == 0)
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            stop = False
+            while not stop:
+                batch = []  # type: List[_Mutation]
+                mutation = self._queue.get()
+                while mutation is not None:
+                    batch.append(mutation)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        mutation = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                stop = mutation is None
+
+                try:
+                    self._apply(batch)
+                finally:
+                    for _ in range(len(batch) + stop):
+                        self._queue.task_done()
+        finally:
+            self._gradebook.close()
+
+    def _apply(self, batch: List[_Mutation]) -> None:
+        batch = [x for x in batch if x.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        if len(batch) > 1:
+            try:
+                with self._gradebook.transaction():
+                    results = [mutation(self._gradebook) for mutation in batch]
+            except Exception:
+                self.log.debug("Applying %d changes one at a time", len(batch), exc_info=True)
+            else:
+                for mutation, result in zip(batch, results):
+                    mutation.future.set_result(result)
+                return
+
+        for mutation in batch:
+            try:
+                with self._gradebook.transaction():
+                    result = mutation(self._gradebook)
+            except Exception as e:
+                mutation.future.set_exception(e)
+            else:
+                mutation.future.set_result(result)
@@ -30,6 +30,10 @@ def autogen_command_line(root):
         'DbAssignmentImportApp',
         'DbAssignmentListApp',
         'DbAssignmentRemoveApp',
+        'DbGradesImportApp',
+        'DbRebuildAggregatesApp',
+        'DbRecomputePenaltiesApp',
+        'DbSimulatePenaltiesApp',
         'DbStudentAddApp',
         'DbStudentImportApp',
         'DbStudentListApp',
@@ -3,7 +3,7 @@ import shutil
 import glob
 
 from .exchange import Exchange
-from ..utils import check_mode, notebook_hash, make_unique_key, get_username
+from ..utils import check_mode, notebook_hash, make_unique_key, get_username, find_feedback_assets
 
 
 class ExchangeFetchFeedback(Exchange):
@@ -99,6 +99,8 @@ class ExchangeFetchFeedback(Exchange):
             if os.path.exists(html_file):
                 self.log.debug("Overwriting existing feedback: {}".format(html_file))
             shutil.copy(feedbackpath, html_file)
+            for asset in find_feedback_assets(feedbackpath):
+                shutil.copy(os.path.join(os.path.dirname(feedbackpath), asset), dest_with_timestamp)
             self.log.info("Fetched feedback: {}".format(html_file))
 
     def copy_files(self):
@@ -10,7 +10,9 @@ from .exchange import Exchange
 
 def _checksum(path):
     m = hashlib.md5()
-    m.update(open(path, 'rb').read())
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            m.update(chunk)
     return m.hexdigest()
 
 
@@ -5,7 +5,9 @@ import re
 from stat import S_IRUSR, S_IWUSR, S_IXUSR, S_IRGRP, S_IWGRP, S_IXGRP, S_IXOTH, S_ISGID
 
 from .exchange import Exchange
-from ..utils import notebook_hash, make_unique_key
+from ..utils import (
+    notebook_hash, make_unique_key, open_stored_file, is_compressed,
+    find_feedback_assets, COMPRESSED_EXTENSION)
 
 
 class ExchangeReleaseFeedback(Exchange):
@@ -37,13 +39,19 @@ class ExchangeReleaseFeedback(Exchange):
             exclude_students = set()
 
         html_files = glob.glob(os.path.join(self.src_path, "*.html"))
+        # feedback may also have been written compressed, in which case it
+        # is decompressed when it is released
+        for html_file in glob.glob(os.path.join(self.src_path, "*.html" + COMPRESSED_EXTENSION)):
+            if html_file[:-len(COMPRESSED_EXTENSION)] not in html_files:
+                html_files.append(html_file)
+
         for html_file in html_files:
             regexp = re.escape(os.path.sep).join([
                 self.coursedir.format_path(
                     self.coursedir.feedback_directory,
                     "(?P<student_id>.*)",
                     self.coursedir.assignment_id, escape=True),
-                "(?P<notebook_id>.*).html"
+                "(?P<notebook_id>.*).html(?:{})?$".format(re.escape(COMPRESSED_EXTENSION))
             ])
 
             m = re.match(regexp, html_file)
@@ -79,5 +87,17 @@ class ExchangeReleaseFeedback(Exchange):
 
             self.log.info("Releasing feedback for student '{}' on assignment '{}/{}/{}' ({})".format(
                 student_id, self.coursedir.course_id, self.coursedir.assignment_id, notebook_id, timestamp))
-            shutil.copy(html_file, dest)
+            if is_compressed(html_file):
+                with open_stored_file(html_file, "rb") as src, open(dest, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                shutil.copymode(html_file, dest)
+            else:
+                shutil.copy(html_file, dest)
+
+            # shared assets are named after their contents, so they only need
+            # to be copied once
+            for asset in find_feedback_assets(html_file):
+                asset_dest = os.path.join(self.dest_path, asset)
+                if not os.path.exists(asset_dest):
+                    shutil.copy(os.path.join(feedback_dir, asset), asset_dest)
             self.log.info("Feedback released to: {}".format(dest))
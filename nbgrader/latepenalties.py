@@ -0,0 +1,175 @@
+"""What-if simulation of late submission penalty policies.
+
+A :class:`PenaltySimulation` is created with
+:func:`~nbgrader.api.Gradebook.penalty_simulation`, which loads the score
+and lateness of every submitted notebook at once. Candidate policies are
+then evaluated on all of the submissions together, without changing the
+database. It requires NumPy.
+
+A policy is a function of three arrays with one element per submitted
+notebook, in the same order as the arguments of
+:func:`~nbgrader.plugins.LateSubmissionPlugin.late_submission_penalty`: the
+ids of the students, the scores of the notebooks and the number of seconds
+that they were late. It returns the penalties of the notebooks, where NaN
+means no penalty.
+
+NumPy (and pandas, for :func:`PenaltySimulation.to_dataframe`) are installed
+with ``pip install nbgrader[analysis]``.
+
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def no_penalty(students: Any, scores: Any, seconds_late: Any) -> Any:
+    """Do not penalize late submissions (the ``'none'`` penalty method)."""
+    return np.zeros_like(scores)
+
+
+def zero_score(students: Any, scores: Any, seconds_late: Any) -> Any:
+    """Give late submissions a score of zero (the ``'zero'`` penalty
+    method)."""
+    return np.array(scores, dtype=float)
+
+
+def plugin_policy(plugin: Any) -> Callable[[Any, Any, Any], Any]:
+    """Turn a late submission plugin (or anything else with a
+    ``late_submission_penalty`` method) into a policy. The plugin is called
+    once per late notebook, so this is slower than a vectorized policy."""
+    penalty = np.frompyfunc(plugin.late_submission_penalty, 3, 1)
+
+    def policy(students: Any, scores: Any, seconds_late: Any) -> Any:
+        penalties = penalty(students, scores, seconds_late)
+        return np.array([np.nan if x is None else x for x in penalties], dtype=float)
+    return policy
+
+
+class PenaltySimulation(object):
+    """The scores and lateness of submitted notebooks, on which late penalty
+    policies can be evaluated."""
+
+    def __init__(self,
+                 students: Sequence[str],
+                 notebooks: Sequence[Tuple[str, str]],
+                 scores: Sequence[float],
+                 seconds_late: Sequence[float],
+                 penalties: Sequence[float]) -> None:
+        """Create a simulation.
+
+        Parameters
+        ----------
+        students:
+            the id of the student of each submitted notebook
+        notebooks:
+            the (assignment, notebook) names of each submitted notebook
+        scores:
+            the score of each submitted notebook, before the late penalty
+        seconds_late:
+            the number of seconds that each submitted notebook was late,
+            including extensions
+        penalties:
+            the current late penalty of each submitted notebook
+
+        """
+        if np is None:
+            raise ImportError(
+                "NumPy is required to simulate late penalties, "
+                "install it with: pip install nbgrader[analysis]")
+
+        #: The id of the student of each submitted notebook
+        self.students = np.array(students, dtype=object)
+
+        #: The (assignment, notebook) names of each submitted notebook
+        self.notebooks = [tuple(notebook) for notebook in notebooks]
+
+        #: The score of each submitted notebook, before the late penalty
+        self.scores = np.asarray(scores, dtype=float).reshape(len(self.students))
+
+        #: The number of seconds that each submitted notebook was late
+        self.seconds_late = np.asarray(seconds_late, dtype=float).reshape(len(self.students))
+
+        #: The current late penalty of each submitted notebook
+        self.penalties = np.nan_to_num(
+            np.asarray(penalties, dtype=float).reshape(len(self.students)))
+
+        # the unique students, and the index of the student of each notebook
+        student_ids, self._rows = np.unique(
+            self.students.astype(str), return_inverse=True)
+        self.student_ids = student_ids.tolist()  # type: List[str]
+
+    def evaluate(self, policy: Callable[[Any, Any, Any], Any]) -> Any:
+        """Compute the penalty of each submitted notebook under a policy.
+
+        Like in :class:`~nbgrader.preprocessors.AssignLatePenalties`, the
+        policy is only applied to late notebooks, and the penalties are
+        limited to between zero and the score of the notebook.
+
+        """
+        late = self.seconds_late > 0
+        if not late.any():
+            return np.zeros_like(self.scores)
+
+        penalties = np.zeros_like(self.scores)
+        penalties[late] = np.broadcast_to(np.asarray(policy(
+            self.students[late], self.scores[late], self.seconds_late[late]), dtype=float),
+            (int(late.sum()),))
+        penalties = np.nan_to_num(penalties)
+        return np.minimum(np.maximum(penalties, 0.0), np.maximum(self.scores, 0.0))
+
+    def deltas(self, policy: Callable[[Any, Any, Any], Any]) -> Any:
+        """The change of the total score of each student in
+        :attr:`student_ids` if the current penalties were replaced by those
+        of a policy. Negative values mean that a student loses points."""
+        difference = self.penalties - self.evaluate(policy)
+        return np.bincount(self._rows, weights=difference, minlength=len(self.student_ids))
+
+    def compare(self, policies: Dict[str, Callable[[Any, Any, Any], Any]]) -> Dict[str, Dict[str, float]]:
+        """Summarize the effect of each of several policies on the total
+        scores of the students.
+
+        Parameters
+        ----------
+        policies:
+            the policies to compare, by name
+
+        Returns
+        -------
+        summary:
+            A dictionary for each policy, with the number of ``students``
+            whose score changes, the ``mean``, ``min`` and ``max`` change of
+            the scores of all the students, and the ``total`` penalty
+
+        """
+        summary = {}
+        for name, policy in policies.items():
+            deltas = self.deltas(policy)
+            summary[name] = {
+                "students": int(np.count_nonzero(deltas)),
+                "mean": float(deltas.mean()) if len(deltas) else 0.0,
+                "min": float(deltas.min()) if len(deltas) else 0.0,
+                "max": float(deltas.max()) if len(deltas) else 0.0,
+                "total": float(self.evaluate(policy).sum()),
+            }
+        return summary
+
+    def to_dataframe(self, policies: Dict[str, Callable[[Any, Any, Any], Any]]) -> Any:
+        """The change of the total score of each student under each policy,
+        as a pandas DataFrame indexed by student id with one column per
+        policy."""
+        # pandas is slow to import, so it is only imported when needed
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError(
+                "pandas is required to convert simulations to data frames, "
+                "install it with: pip install nbgrader[analysis]")
+
+        return pd.DataFrame(
+            {name: self.deltas(policy) for name, policy in policies.items()},
+            index=pd.Index(self.student_ids, name="student"),
+            columns=list(policies))
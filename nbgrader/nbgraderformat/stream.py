@@ -0,0 +1,245 @@
+"""Lightweight notebook reader that never materializes cell outputs.
+
+Many checks only need the cell types, sources and ``metadata.nbgrader`` of a
+notebook, but a regular :func:`nbformat.read` has to decode every output
+(including base64-encoded images) before any of that is available. The
+functions in this module scan the notebook JSON incrementally and skip over
+the keys that are not needed, so the memory cost is proportional to the
+retained content rather than to the size of the file.
+
+"""
+
+import io
+import json
+import re
+import typing
+
+from nbformat import read as _read, from_dict
+from nbformat.notebooknode import NotebookNode
+from nbformat.v4.rwbase import rejoin_lines, strip_transient
+
+#: Cell keys that are skipped (and never decoded) by default
+SKIPPED_KEYS = ('outputs', 'attachments')
+
+_CHUNK_SIZE = 64 * 1024
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+_NON_WHITESPACE = re.compile(r'\S')
+
+
+class _Scanner(object):
+    """Incremental scanner over a JSON text stream.
+
+    Values are either skipped (in which case they are scanned but never
+    decoded or kept in memory) or captured, in which case the raw text of the
+    value is decoded with :func:`json.loads`.
+
+    """
+
+    def __init__(self, fp: typing.TextIO) -> None:
+        self.fp = fp
+        self.buf = ''
+        self.pos = 0
+        self.mark = None  # type: typing.Optional[int]
+
+    def _fill(self) -> bool:
+        chunk = self.fp.read(_CHUNK_SIZE)
+        if not chunk:
+            return False
+        start = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[start:] + chunk
+        self.pos -= start
+        if self.mark is not None:
+            self.mark = 0
+        return True
+
+    def _search(self, pattern: typing.Pattern) -> int:
+        while True:
+            m = pattern.search(self.buf, self.pos)
+            if m is not None:
+                return m.start()
+            self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("Unexpected end of notebook JSON")
+
+    def _ensure(self, n: int) -> None:
+        while len(self.buf) - self.pos < n:
+            if not self._fill():
+                raise ValueError("Unexpected end of notebook JSON")
+
+    def peek(self) -> str:
+        self.pos = self._search(_NON_WHITESPACE)
+        return self.buf[self.pos]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError("Expected '{}' at offset {} of notebook JSON".format(char, self.pos))
+        self.pos += 1
+
+    def _scan_string(self) -> None:
+        self.pos += 1
+        while True:
+            self.pos = self._search(_STRING_END)
+            if self.buf[self.pos] == '"':
+                self.pos += 1
+                return
+            self._ensure(2)
+            self.pos += 2
+
+    def _scan_value(self) -> None:
+        char = self.peek()
+        if char == '"':
+            self._scan_string()
+        elif char in '[{':
+            depth = 0
+            while True:
+                self.pos = self._search(_STRUCTURE)
+                char = self.buf[self.pos]
+                if char == '"':
+                    self._scan_string()
+                    continue
+                self.pos += 1
+                depth += 1 if char in '[{' else -1
+                if depth == 0:
+                    return
+        else:
+            try:
+                self.pos = self._search(_SCALAR_END)
+            except ValueError:
+                # a scalar may legitimately run up to the end of the stream
+                self.pos = len(self.buf)
+
+    def skip_value(self) -> None:
+        self._scan_value()
+
+    def read_value(self) -> typing.Any:
+        self.peek()
+        self.mark = self.pos
+        try:
+            self._scan_value()
+            return json.loads(self.buf[self.mark:self.pos])
+        finally:
+            self.mark = None
+
+    def iter_object(self) -> typing.Iterator[str]:
+        """Iterate over the keys of a JSON object. The caller must consume
+        the value (with :meth:`skip_value`, :meth:`read_value` or one of the
+        iterators) before advancing to the next key."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def iter_array(self) -> typing.Iterator[None]:
+        """Iterate over the items of a JSON array. Each item must be consumed
+        by the caller before advancing."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+    def read_object(self, skip: typing.Container[str]) -> typing.Dict:
+        obj = {}
+        for key in self.iter_object():
+            if key in skip:
+                self.skip_value()
+            else:
+                obj[key] = self.read_value()
+        return obj
+
+
+def _finalize_cell(cell: typing.Dict) -> typing.Dict:
+    if cell.get('cell_type') == 'code':
+        cell.setdefault('outputs', [])
+    return cell
+
+
+def _to_notebook(nb: typing.Dict) -> NotebookNode:
+    nb = from_dict(nb)
+    nb.setdefault('metadata', NotebookNode())
+    return strip_transient(rejoin_lines(nb))
+
+
+def stream_cells(fp: typing.TextIO,
+                 skip: typing.Container[str] = SKIPPED_KEYS
+                 ) -> typing.Iterator[NotebookNode]:
+    """Iterate over the cells of an nbformat v4 notebook, without loading the
+    keys listed in ``skip`` (by default, outputs and attachments). Code cells
+    always have an (empty) ``outputs`` list.
+
+    Parameters
+    ----------
+    fp:
+        A file-like object opened in text mode
+    skip:
+        The cell keys that should be skipped
+
+    """
+    scanner = _Scanner(fp)
+    for key in scanner.iter_object():
+        if key != 'cells':
+            scanner.skip_value()
+            continue
+        for _ in scanner.iter_array():
+            cell = _finalize_cell(scanner.read_object(skip))
+            yield _to_notebook({'cells': [cell]}).cells[0]
+
+
+def read_stripped(filename: str,
+                  skip: typing.Container[str] = SKIPPED_KEYS
+                  ) -> NotebookNode:
+    """Read a notebook without loading the keys listed in ``skip`` (by default,
+    outputs and attachments) from any cell. The result is an nbformat v4
+    notebook whose code cells have empty outputs.
+
+    Notebooks in an older format than v4 cannot be scanned incrementally, so
+    they are read and converted in full before the keys are dropped.
+
+    Parameters
+    ----------
+    filename:
+        The path to the notebook
+    skip:
+        The cell keys that should be skipped
+
+    """
+    with io.open(filename, encoding='utf-8') as fh:
+        scanner = _Scanner(fh)
+        nb = {}  # type: typing.Dict[str, typing.Any]
+        for key in scanner.iter_object():
+            if key == 'cells':
+                nb['cells'] = [
+                    _finalize_cell(scanner.read_object(skip))
+                    for _ in scanner.iter_array()]
+            elif key == 'worksheets':
+                # nbformat v3 or older
+                break
+            else:
+                nb[key] = scanner.read_value()
+
+    if nb.get('nbformat', 0) < 4 or 'cells' not in nb:
+        full = _read(filename, as_version=4)
+        for cell in full.cells:
+            for key in skip:
+                cell.pop(key, None)
+            _finalize_cell(cell)
+        return full
+
+    return _to_notebook(nb)
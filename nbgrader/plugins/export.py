@@ -1,7 +1,14 @@
-from traitlets import Unicode, List
+import csv
+import datetime
+import gzip
+import os
+
+from textwrap import dedent
+from traitlets import Bool, Integer, Unicode, List
 
 from .base import BasePlugin
-from ..api import MissingEntry, Gradebook
+from ..api import Gradebook
+from ..utils import parse_utc
 
 
 class ExportPlugin(BasePlugin):
@@ -15,6 +22,33 @@ class ExportPlugin(BasePlugin):
     assignment = List(
         [], help="list of assignments to export").tag(config=True)
 
+    since = Unicode(
+        "",
+        help=dedent(
+            """
+            Only export grades that changed after this time, e.g.
+            "2020-01-31 23:59:00 America/Los_Angeles" (UTC if no timezone is
+            given). Submissions that were removed since then are exported as
+            missing submissions (with a score of zero), unless their student
+            or assignment was removed too. Per-cell exports do not include
+            removed grades, so they require a full export to detect them.
+            """
+        )
+    ).tag(config=True)
+
+    watermark = Unicode(
+        "",
+        help=dedent(
+            """
+            File in which the time of the last export is stored. If the file
+            exists, only grades that changed since the last export are
+            exported (unless `since` is given), and the file is updated after
+            every export. Removed submissions are handled as described for
+            `since`.
+            """
+        )
+    ).tag(config=True)
+
     def export(self, gradebook: Gradebook) -> None:
         """Export grades to another format.
 
@@ -35,6 +69,52 @@ class ExportPlugin(BasePlugin):
 class CsvExportPlugin(ExportPlugin):
     """CSV exporter plugin."""
 
+    per_cell = Bool(
+        False,
+        help=dedent(
+            """
+            Export one row per grade of each graded cell in each submission,
+            rather than one row per assignment and student.
+            """
+        )
+    ).tag(config=True)
+
+    batch_size = Integer(
+        1000,
+        help="Number of rows to fetch from the database at a time."
+    ).tag(config=True)
+
+    #: The columns of the default export, one row per assignment and student
+    assignment_keys = [
+        "assignment",
+        "duedate",
+        "timestamp",
+        "student_id",
+        "last_name",
+        "first_name",
+        "email",
+        "raw_score",
+        "late_submission_penalty",
+        "score",
+        "max_score"
+    ]
+
+    #: The columns of the per-cell export, one row per grade
+    cell_keys = [
+        "assignment",
+        "notebook",
+        "cell",
+        "student_id",
+        "last_name",
+        "first_name",
+        "email",
+        "auto_score",
+        "manual_score",
+        "extra_credit",
+        "score",
+        "max_score"
+    ]
+
     def export(self, gradebook: Gradebook) -> None:
         if self.to == "":
             dest = "grades.csv"
@@ -42,13 +122,13 @@ class CsvExportPlugin(ExportPlugin):
             dest = self.to
 
         if len(self.student) == 0:
-            allstudents = []
+            allstudents = None
         else:
             # make sure studentID(s) are a list of strings
             allstudents = [str(item) for item in self.student]
 
         if len(self.assignment) == 0:
-            allassignments = []
+            allassignments = None
         else:
             # make sure assignment(s) are a list of strings
             allassignments = [str(item) for item in self.assignment]
@@ -60,73 +140,43 @@ class CsvExportPlugin(ExportPlugin):
         if allstudents:
             self.log.info("Exporting only students: %s", allstudents)
 
-        fh = open(dest, "w")
-        keys = [
-            "assignment",
-            "duedate",
-            "timestamp",
-            "student_id",
-            "last_name",
-            "first_name",
-            "email",
-            "raw_score",
-            "late_submission_penalty",
-            "score",
-            "max_score"
-        ]
-        fh.write(",".join(keys) + "\n")
-        fmt = ",".join(["{" + x + "}" for x in keys]) + "\n"
-
-        # Loop over each assignment in the database
-        for assignment in gradebook.assignments:
-
-            # only continue if assignment is required
-            if allassignments and assignment.name not in allassignments:
-                continue
-
-            # Loop over each student in the database
-            for student in gradebook.students:
-
-                # only continue if student is required
-                if allstudents and student.id not in allstudents:
-                    continue
-
-                # Create a dictionary that will store information 
-                # about this student's submitted assignment
-                score = {}
-                score['assignment'] = assignment.name
-                score['duedate'] = assignment.duedate
-                score['student_id'] = student.id
-                score['last_name'] = student.last_name
-                score['first_name'] = student.first_name
-                score['email'] = student.email
-                score['max_score'] = assignment.max_score
-
-                # Try to find the submission in the database. If it
-                # doesn't exist, the `MissingEntry` exception will be
-                # raised, which means the student didn't submit 
-                # anything, so we assign them a score of zero.
-                try:
-                    submission = gradebook.find_submission(
-                        assignment.name, student.id)
-                except MissingEntry:
-                    score['timestamp'] = ''
-                    score['raw_score'] = 0.0
-                    score['late_submission_penalty'] = 0.0
-                    score['score'] = 0.0
-                else:
-                    penalty = submission.late_submission_penalty
-                    score['timestamp'] = submission.timestamp
-                    score['raw_score'] = submission.score
-                    score['late_submission_penalty'] = penalty
-                    score['score'] = max(0.0, submission.score - penalty)
-
-                for key in score:
-                    if score[key] is None:
-                        score[key] = ''
-                    if not isinstance(score[key], str):
-                        score[key] = str(score[key])
-
-                fh.write(fmt.format(**score))
-
-        fh.close()
+        if self.since:
+            since = parse_utc(self.since)
+        elif self.watermark and os.path.exists(self.watermark):
+            with open(self.watermark, "r") as fh:
+                since = parse_utc(fh.read().strip())
+        else:
+            since = None
+        if since is not None:
+            self.log.info("Exporting only grades changed since %s UTC", since)
+
+        # grades that change while the export is running are exported again
+        # by the next export
+        started = datetime.datetime.utcnow()
+
+        if self.per_cell:
+            keys = self.cell_keys
+            rows = gradebook.iter_grades(
+                assignments=allassignments, students=allstudents,
+                batch_size=self.batch_size, since=since)
+        else:
+            keys = self.assignment_keys
+            rows = gradebook.iter_submission_scores(
+                assignments=allassignments, students=allstudents,
+                batch_size=self.batch_size, since=since)
+
+        # the rows are written as they are fetched, so that the whole
+        # export never has to be held in memory
+        if dest.endswith(".gz"):
+            fh = gzip.open(dest, "wt", newline="")
+        else:
+            fh = open(dest, "w", newline="")
+        with fh:
+            writer = csv.writer(fh, lineterminator="\n")
+            writer.writerow(keys)
+            for row in rows:
+                writer.writerow(["" if row[key] is None else str(row[key]) for key in keys])
+
+        if self.watermark:
+            with open(self.watermark, "w") as fh:
+                fh.write(started.isoformat())
@@ -11,6 +11,7 @@ from .execute import Execute
 from .getgrades import GetGrades
 from .clearoutput import ClearOutput
 from .limitoutput import LimitOutput
+from .compactoutput import CompactOutput
 from .deduplicateids import DeduplicateIds
 from .latesubmissions import AssignLatePenalties
 from .clearhiddentests import ClearHiddenTests
@@ -31,6 +32,7 @@ __all__ = [
     "GetGrades",
     "ClearOutput",
     "LimitOutput",
+    "CompactOutput",
     "DeduplicateIds",
     "ClearHiddenTests",
     "ClearMarkScheme",
@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import io
+import json
+
+from traitlets import Bool, Dict, Integer, List
+from textwrap import dedent
+
+from . import NbGraderPreprocessor
+from nbformat.notebooknode import NotebookNode
+from nbconvert.exporters.exporter import ResourcesDict
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class CompactOutput(NbGraderPreprocessor):
+    """Preprocessor for reducing the size of rich cell outputs, such as large
+    images and HTML tables. This is disabled by default; enable it with
+    ``CompactOutput.enabled = True``."""
+
+    enabled = Bool(False, help="Whether to use this preprocessor when running nbgrader").tag(config=True)
+
+    max_sizes = Dict(
+        {
+            "image/png": 1000000,
+            "image/jpeg": 1000000,
+            "image/gif": 1000000,
+            "image/svg+xml": 1000000,
+            "text/html": 500000,
+            "application/json": 500000,
+        },
+        help=dedent(
+            """
+            Maximum size (in characters of the encoded data) of a single output
+            of each MIME type. MIME types that are not listed are never limited,
+            unless a limit is given for the special key "*". Images above the
+            limit are downscaled and recompressed if Pillow is installed; any
+            other output above the limit is removed.
+            """
+        )
+    ).tag(config=True)
+
+    max_image_dimension = Integer(
+        1024,
+        help="Maximum width or height (in pixels) of an image that is downscaled to fit its size limit."
+    ).tag(config=True)
+
+    jpeg_quality = Integer(
+        75,
+        help="JPEG quality used when recompressing JPEG images."
+    ).tag(config=True)
+
+    redundant_mimetypes = List(
+        ["image/png", "image/jpeg", "image/svg+xml", "text/html"],
+        help=dedent(
+            """
+            Rich representations that duplicate each other. If an output has
+            more than one of these MIME types, only the first one (in the order
+            of this list) is kept. "text/plain" is always kept. Set to an empty
+            list to keep all representations.
+            """
+        )
+    ).tag(config=True)
+
+    remove_duplicates = Bool(
+        True,
+        help="Remove display outputs that are identical to an earlier output of the same cell."
+    ).tag(config=True)
+
+    truncation_marker = "... Output truncated ..."
+
+    def _max_size(self, mimetype: str) -> int:
+        return self.max_sizes.get(mimetype, self.max_sizes.get("*", -1))
+
+    def _size(self, value) -> int:
+        if isinstance(value, str):
+            return len(value)
+        return len(json.dumps(value))
+
+    def _recompress_image(self, mimetype: str, data: str, max_size: int) -> Optional[str]:
+        if Image is None or mimetype not in ("image/png", "image/jpeg"):
+            return None
+
+        try:
+            image = Image.open(io.BytesIO(base64.b64decode(data)))
+            image.thumbnail((self.max_image_dimension, self.max_image_dimension))
+            buf = io.BytesIO()
+            if mimetype == "image/png":
+                image.save(buf, format="PNG", optimize=True)
+            else:
+                image.convert("RGB").save(buf, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        except Exception:
+            self.log.warning("Could not recompress %s output", mimetype, exc_info=True)
+            return None
+
+        compressed = base64.b64encode(buf.getvalue()).decode("ascii")
+        if len(compressed) > max_size:
+            return None
+        return compressed
+
+    def _compact_data(self, output: NotebookNode) -> None:
+        data = output.data
+        metadata = output.get("metadata", {})
+
+        redundant = [m for m in self.redundant_mimetypes if m in data]
+        for mimetype in redundant[1:]:
+            del data[mimetype]
+            metadata.pop(mimetype, None)
+
+        truncated = False
+        for mimetype in list(data.keys()):
+            if mimetype == "text/plain":
+                continue
+            max_size = self._max_size(mimetype)
+            if max_size == -1 or self._size(data[mimetype]) <= max_size:
+                continue
+
+            compressed = None
+            if mimetype.startswith("image/"):
+                compressed = self._recompress_image(mimetype, data[mimetype], max_size)
+            if compressed is not None:
+                data[mimetype] = compressed
+                if mimetype in metadata:
+                    metadata[mimetype].pop("width", None)
+                    metadata[mimetype].pop("height", None)
+            else:
+                del data[mimetype]
+                metadata.pop(mimetype, None)
+                truncated = True
+
+        if truncated:
+            if "text/plain" in data:
+                data["text/plain"] = "\n".join([data["text/plain"], self.truncation_marker])
+            else:
+                data["text/plain"] = self.truncation_marker
+
+    def _output_key(self, output: NotebookNode) -> str:
+        m = hashlib.md5()
+        m.update(json.dumps(output.data, sort_keys=True).encode("utf-8"))
+        return m.hexdigest()
+
+    def preprocess_cell(self,
+                        cell: NotebookNode,
+                        resources: ResourcesDict,
+                        cell_index: int
+                        ) -> Tuple[NotebookNode, ResourcesDict]:
+        if cell.cell_type != "code":
+            return cell, resources
+
+        seen = set()
+        new_outputs = []
+        for output in cell.outputs:
+            if output.output_type in ("display_data", "execute_result"):
+                if self.remove_duplicates and output.output_type == "display_data":
+                    key = self._output_key(output)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                self._compact_data(output)
+
+            new_outputs.append(output)
+
+        cell.outputs = new_outputs
+        return cell, resources
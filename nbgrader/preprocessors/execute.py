@@ -5,7 +5,7 @@ from textwrap import dedent
 from . import NbGraderPreprocessor
 from nbconvert.exporters.exporter import ResourcesDict
 from nbformat.notebooknode import NotebookNode
-from typing import Any, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 
 class UnresponsiveKernelError(Exception):
@@ -33,6 +33,123 @@ class Execute(NbGraderPreprocessor, ExecutePreprocessor):
         """)
     ).tag(config=True)
 
+    max_output_lines = Integer(1000, help=dedent(
+        """
+        Maximum number of lines of stream output kept per cell while the cell
+        is executing (-1 means no limit). Output past the limit is discarded as
+        it arrives, so a runaway cell cannot exhaust memory before it times out.
+        The truncation is the same as the one performed afterwards by
+        ``LimitOutput.max_lines``, so this should not be lower than that value.
+        """)
+    ).tag(config=True)
+
+    max_output_chars = Integer(-1, help=dedent(
+        """
+        Maximum number of characters of stream output kept per cell while the
+        cell is executing (-1 means no limit).
+        """)
+    ).tag(config=True)
+
+    max_display_outputs = Integer(-1, help=dedent(
+        """
+        Maximum number of rich outputs (display data and execution results)
+        kept per cell while the cell is executing (-1 means no limit).
+        """)
+    ).tag(config=True)
+
+    max_image_size = Integer(-1, help=dedent(
+        """
+        Maximum size (in bytes of encoded data) of a single image kept in the
+        output of a cell while the cell is executing (-1 means no limit).
+        Larger images are replaced by a truncation notice.
+        """)
+    ).tag(config=True)
+
+    truncation_marker = "... Output truncated ..."
+
+    def _reset_output_limits(self) -> None:
+        self._stream_lines = 0
+        self._stream_chars = 0
+        self._stream_exhausted = False
+        self._display_outputs = 0
+
+    def _limit_stream_text(self, text: str) -> Optional[str]:
+        if self._stream_exhausted:
+            return None
+
+        if self.max_output_lines != -1:
+            if self._stream_lines == self.max_output_lines:
+                self._stream_exhausted = True
+                return None
+
+            lines = text.split("\n")
+            if (len(lines) + self._stream_lines) > self.max_output_lines:
+                lines = lines[:(self.max_output_lines - self._stream_lines - 1)]
+                lines.append(self.truncation_marker)
+                self._stream_exhausted = True
+
+            self._stream_lines += len(lines)
+            text = "\n".join(lines)
+
+        if self.max_output_chars != -1 and not self._stream_exhausted:
+            if (len(text) + self._stream_chars) > self.max_output_chars:
+                text = text[:(self.max_output_chars - self._stream_chars)]
+                text = "\n".join([text, self.truncation_marker])
+                self._stream_exhausted = True
+            self._stream_chars += len(text)
+
+        return text
+
+    def _limit_display_data(self, content: Dict) -> Optional[Dict]:
+        if self.max_display_outputs != -1:
+            self._display_outputs += 1
+            if self._display_outputs > self.max_display_outputs + 1:
+                return None
+            elif self._display_outputs == self.max_display_outputs + 1:
+                return dict(content, data={"text/plain": self.truncation_marker}, metadata={})
+
+        if self.max_image_size != -1:
+            data = content.get("data", {})
+            too_large = [
+                mimetype for mimetype in data
+                if mimetype.startswith("image/") and len(data[mimetype]) > self.max_image_size]
+            if too_large:
+                data = {k: v for k, v in data.items() if k not in too_large}
+                data["text/plain"] = self.truncation_marker
+                metadata = {k: v for k, v in content.get("metadata", {}).items() if k not in too_large}
+                return dict(content, data=data, metadata=metadata)
+
+        return content
+
+    def run_cell(self, cell: NotebookNode, cell_index: int = 0, store_history: bool = True) -> Any:
+        self._reset_output_limits()
+        return super(Execute, self).run_cell(cell, cell_index, store_history)
+
+    def clear_output(self, outs: list, msg: Dict, cell_index: int) -> None:
+        if not msg['content'].get('wait'):
+            self._reset_output_limits()
+        return super(Execute, self).clear_output(outs, msg, cell_index)
+
+    def output(self, outs: list, msg: Dict, display_id: Optional[str], cell_index: int) -> Optional[NotebookNode]:
+        if self.clear_before_next_output:
+            self._reset_output_limits()
+
+        msg_type = msg['msg_type']
+        content = msg['content']
+        if msg_type == 'stream':
+            text = self._limit_stream_text(content['text'])
+            if text is None:
+                return None
+            content = dict(content, text=text)
+        elif msg_type in ('display_data', 'execute_result'):
+            content = self._limit_display_data(content)
+            if content is None:
+                return None
+
+        if content is not msg['content']:
+            msg = dict(msg, content=content)
+        return super(Execute, self).output(outs, msg, display_id, cell_index)
+
     def preprocess(self,
                    nb: NotebookNode,
                    resources: ResourcesDict,
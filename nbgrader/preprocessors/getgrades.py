@@ -5,7 +5,7 @@ from nbformat.notebooknode import NotebookNode
 from typing import Optional, Any, Tuple
 
 from .. import utils
-from ..api import Gradebook
+from ..api import Gradebook, Grade, Comment
 from . import NbGraderPreprocessor
 
 
@@ -28,6 +28,12 @@ class GetGrades(NbGraderPreprocessor):
         self.gradebook = Gradebook(self.db_url)
 
         with self.gradebook:
+            # look up the grades and comments of all the cells at once
+            self.grades = self.gradebook.find_submitted_cells(
+                Grade, self.notebook_id, self.assignment_id, self.student_id)
+            self.comments = self.gradebook.find_submitted_cells(
+                Comment, self.notebook_id, self.assignment_id, self.student_id)
+
             # process the cells
             nb, resources = super(GetGrades, self).preprocess(nb, resources)
             notebook = self.gradebook.find_submission_notebook(
@@ -41,6 +47,7 @@ class GetGrades(NbGraderPreprocessor):
             resources['nbgrader']['score'] = notebook.score - late_penalty
             resources['nbgrader']['max_score'] = notebook.max_score
             resources['nbgrader']['late_penalty'] = late_penalty
+            resources['nbgrader']['last_modified'] = notebook.last_modified
 
         return nb, resources
 
@@ -53,21 +60,25 @@ class GetGrades(NbGraderPreprocessor):
         """
 
         # retrieve or create the comment object from the database
-        comment = self.gradebook.find_comment(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        comment = self.comments.get(cell.metadata['nbgrader']['grade_id'])
+        if comment is None:
+            comment = self.gradebook.find_comment(
+                cell.metadata['nbgrader']['grade_id'],
+                self.notebook_id,
+                self.assignment_id,
+                self.student_id)
 
         # save it in the notebook
         cell.metadata.nbgrader['comment'] = comment.comment
 
     def _get_score(self, cell: NotebookNode, resources: ResourcesDict) -> None:
-        grade = self.gradebook.find_grade(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        grade = self.grades.get(cell.metadata['nbgrader']['grade_id'])
+        if grade is None:
+            grade = self.gradebook.find_grade(
+                cell.metadata['nbgrader']['grade_id'],
+                self.notebook_id,
+                self.assignment_id,
+                self.student_id)
 
         cell.metadata.nbgrader['score'] = grade.score
         cell.metadata.nbgrader['points'] = grade.max_score
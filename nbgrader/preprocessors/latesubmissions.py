@@ -1,13 +1,13 @@
 from traitlets import Instance
 from traitlets import Type
 
-from ..api import Gradebook, SubmittedNotebook
+from ..api import Gradebook
 from ..plugins import BasePlugin
 from ..plugins import LateSubmissionPlugin
 from . import NbGraderPreprocessor
 from nbconvert.exporters.exporter import ResourcesDict
 from nbformat.notebooknode import NotebookNode
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 class AssignLatePenalties(NbGraderPreprocessor):
@@ -24,18 +24,34 @@ class AssignLatePenalties(NbGraderPreprocessor):
     def init_plugin(self) -> None:
         self.plugin_inst = self.plugin_class(parent=self)
 
-    def _check_late_penalty(self, notebook: SubmittedNotebook, penalty: float) -> float:
+    def _check_late_penalty(self, score: float, penalty: float) -> float:
         msg = "(Penalty {}) Adjusting late submission penalty from {} to {}."
         if penalty < 0:
             self.log.warning(msg.format("< 0", penalty, 0))
             return 0
 
-        if penalty > notebook.score:
-            self.log.warning(msg.format("> score", penalty, notebook.score))
-            return notebook.score
+        if penalty > score:
+            self.log.warning(msg.format("> score", penalty, score))
+            return score
 
         return penalty
 
+    def late_submission_penalty(self, student_id: str, score: float, total_seconds_late: float) -> Optional[float]:
+        """Compute the late penalty of a notebook with the plugin, limited to
+        between zero and the score of the notebook. This is also used by
+        ``nbgrader db recompute-penalties`` to recompute the penalties from
+        the stored scores.
+
+        """
+        if self.plugin_inst is None:
+            self.init_plugin()
+
+        late_penalty = self.plugin_inst.late_submission_penalty(
+            student_id, score, total_seconds_late)
+        if late_penalty is not None:
+            late_penalty = self._check_late_penalty(score, late_penalty)
+        return late_penalty
+
     def preprocess(self, nb: NotebookNode, resources: ResourcesDict) -> Tuple[NotebookNode, ResourcesDict]:
         # pull information from the resources
         self.notebook_id = resources['nbgrader']['notebook']
@@ -64,13 +80,10 @@ class AssignLatePenalties(NbGraderPreprocessor):
                 self.log.warning("{} is {} seconds late".format(
                     assignment, assignment.total_seconds_late))
 
-                late_penalty = self.plugin_inst.late_submission_penalty(
+                notebook.late_submission_penalty = self.late_submission_penalty(
                     self.student_id, notebook.score, assignment.total_seconds_late)
-                self.log.warning("Late submission penalty: {}".format(late_penalty))
-
-                if late_penalty is not None:
-                    late_penalty = self._check_late_penalty(notebook, late_penalty)
-                    notebook.late_submission_penalty = late_penalty
+                self.log.warning("Late submission penalty: {}".format(
+                    notebook.late_submission_penalty))
 
             self.gradebook.db.commit()
 
@@ -1,7 +1,7 @@
 from nbformat.v4.nbbase import validate
 
 from .. import utils
-from ..api import Gradebook, MissingEntry
+from ..api import Gradebook, SourceCell, Notebook, Assignment
 from . import NbGraderPreprocessor
 from nbconvert.exporters.exporter import ResourcesDict
 from nbformat.notebooknode import NotebookNode
@@ -21,6 +21,13 @@ class OverwriteCells(NbGraderPreprocessor):
         self.gradebook = Gradebook(self.db_url)
 
         with self.gradebook:
+            # look up the source cells of the notebook at once
+            source_cells = self.gradebook.db.query(SourceCell)\
+                .join(Notebook, Notebook.id == SourceCell.notebook_id)\
+                .join(Assignment, Assignment.id == Notebook.assignment_id)\
+                .filter(Notebook.name == self.notebook_id, Assignment.name == self.assignment_id)
+            self.source_cells = {x.name: x for x in source_cells}
+
             nb, resources = super(OverwriteCells, self).preprocess(nb, resources)
 
         return nb, resources
@@ -54,12 +61,8 @@ class OverwriteCells(NbGraderPreprocessor):
         if grade_id is None:
             return cell, resources
 
-        try:
-            source_cell = self.gradebook.find_source_cell(
-                grade_id,
-                self.notebook_id,
-                self.assignment_id)
-        except MissingEntry:
+        source_cell = self.source_cells.get(grade_id)
+        if source_cell is None:
             self.log.warning("Cell '{}' does not exist in the database".format(grade_id))
             del cell.metadata.nbgrader['grade_id']
             return cell, resources
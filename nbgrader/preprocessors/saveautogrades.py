@@ -1,5 +1,5 @@
 from .. import utils
-from ..api import Gradebook
+from ..api import Gradebook, Grade, Comment
 from . import NbGraderPreprocessor
 from nbconvert.exporters.exporter import ResourcesDict
 from nbformat.notebooknode import NotebookNode
@@ -20,6 +20,12 @@ class SaveAutoGrades(NbGraderPreprocessor):
         self.gradebook = Gradebook(self.db_url)
 
         with self.gradebook:
+            # look up the grades and comments of all the cells at once
+            self.grades = self.gradebook.find_submitted_cells(
+                Grade, self.notebook_id, self.assignment_id, self.student_id)
+            self.comments = self.gradebook.find_submitted_cells(
+                Comment, self.notebook_id, self.assignment_id, self.student_id)
+
             # process the cells
             nb, resources = super(SaveAutoGrades, self).preprocess(nb, resources)
 
@@ -35,11 +41,13 @@ class SaveAutoGrades(NbGraderPreprocessor):
         """
         # these are the fields by which we will identify the score
         # information
-        grade = self.gradebook.find_grade(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        grade = self.grades.get(cell.metadata['nbgrader']['grade_id'])
+        if grade is None:
+            grade = self.gradebook.find_grade(
+                cell.metadata['nbgrader']['grade_id'],
+                self.notebook_id,
+                self.assignment_id,
+                self.student_id)
 
         # determine what the grade is
         auto_score, _ = utils.determine_grade(cell, self.log)
@@ -55,11 +63,13 @@ class SaveAutoGrades(NbGraderPreprocessor):
         self.gradebook.db.commit()
 
     def _add_comment(self, cell: NotebookNode, resources: ResourcesDict) -> None:
-        comment = self.gradebook.find_comment(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        comment = self.comments.get(cell.metadata['nbgrader']['grade_id'])
+        if comment is None:
+            comment = self.gradebook.find_comment(
+                cell.metadata['nbgrader']['grade_id'],
+                self.notebook_id,
+                self.assignment_id,
+                self.student_id)
         if cell.metadata.nbgrader.get("checksum", None) == utils.compute_checksum(cell) and not utils.is_task(cell):
             comment.auto_comment = "No response."
         else:
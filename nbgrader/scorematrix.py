@@ -0,0 +1,236 @@
+"""Columnar access to the grades in the gradebook, for course analytics.
+
+A :class:`ScoreMatrix` is created with
+:func:`~nbgrader.api.Gradebook.score_matrix`. It requires NumPy, and
+:func:`ScoreMatrix.to_dataframe` additionally requires pandas. Both are
+installed with ``pip install nbgrader[analysis]``.
+
+"""
+
+import warnings
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+#: The levels at which scores can be summarized, from the finest to the
+#: coarsest. Each level corresponds to a prefix of the cell labels.
+LEVELS = ("cell", "notebook", "assignment")
+
+
+class ScoreMatrix(object):
+    """The scores of every student (rows) on every graded cell (columns).
+
+    Scores of students that did not submit an assignment are NaN, so that
+    they are left out of the summary statistics, like in
+    :func:`~nbgrader.api.Gradebook.average_assignment_score`.
+
+    """
+
+    def __init__(self,
+                 students: Sequence[str],
+                 cells: Sequence[Tuple[str, str, str]],
+                 max_scores: Sequence[float],
+                 scores: Optional[Any] = None) -> None:
+        """Create a score matrix.
+
+        Parameters
+        ----------
+        students:
+            the ids of the students, one per row
+        cells:
+            (assignment, notebook, cell) names of the graded cells, one per
+            column, sorted so that the cells of each notebook and assignment
+            are adjacent
+        max_scores:
+            the maximum score of each cell
+        scores:
+            an array of shape ``(len(students), len(cells))``, or None to
+            start with only NaN scores
+
+        """
+        if np is None:
+            raise ImportError(
+                "NumPy is required to compute score matrices, "
+                "install it with: pip install nbgrader[analysis]")
+
+        #: The ids of the students, one per row
+        self.students = list(students)
+
+        #: The (assignment, notebook, cell) names of the graded cells, one
+        #: per column
+        self.cells = [tuple(cell) for cell in cells]
+
+        #: The maximum score of each cell
+        self.max_scores = np.asarray(max_scores, dtype=float).reshape(len(self.cells))
+
+        shape = (len(self.students), len(self.cells))
+        if scores is None:
+            scores = np.full(shape, np.nan)
+
+        #: The score of each student on each cell, NaN where the student did
+        #: not submit the assignment
+        self.scores = np.asarray(scores, dtype=float).reshape(shape)
+
+    def grouped(self, level: str = "cell") -> Tuple[List[tuple], Any, Any]:
+        """Sum the scores of the cells in each notebook or assignment.
+
+        Parameters
+        ----------
+        level:
+            one of ``"cell"``, ``"notebook"`` or ``"assignment"``
+
+        Returns
+        -------
+        labels:
+            the names of the cells, notebooks or assignments, as tuples
+        scores:
+            an array with one row per student and one column per label
+        max_scores:
+            the maximum score of each label
+
+        """
+        if level not in LEVELS:
+            raise ValueError("Invalid level '{}', must be one of: {}".format(
+                level, ", ".join(LEVELS)))
+        depth = len(LEVELS) - LEVELS.index(level)
+
+        labels = []  # type: List[tuple]
+        starts = []  # type: List[int]
+        for i, cell in enumerate(self.cells):
+            label = cell[:depth]
+            if not labels or labels[-1] != label:
+                labels.append(label)
+                starts.append(i)
+
+        if level == "cell" or not labels:
+            return labels, self.scores, self.max_scores
+
+        # the cells of a notebook are either all submitted or all NaN, so
+        # that the sums are NaN for assignments that were not submitted
+        scores = np.add.reduceat(self.scores, starts, axis=1)
+        max_scores = np.add.reduceat(self.max_scores, starts)
+        return labels, scores, max_scores
+
+    def totals(self) -> Any:
+        """The total score of each student over all assignments, counting
+        assignments that were not submitted as zero."""
+        return np.nansum(self.scores, axis=1)
+
+    def mean(self, level: str = "cell") -> Any:
+        """The mean score of each cell, notebook or assignment, over the
+        students that submitted it."""
+        _, scores, _ = self.grouped(level)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanmean(scores, axis=0)
+
+    def median(self, level: str = "cell") -> Any:
+        """The median score of each cell, notebook or assignment, over the
+        students that submitted it."""
+        return self.percentile(50, level=level)
+
+    def percentile(self, q: Any, level: str = "cell") -> Any:
+        """The ``q``-th percentiles of the scores of each cell, notebook or
+        assignment, over the students that submitted it.
+
+        Parameters
+        ----------
+        q:
+            a percentile or sequence of percentiles between 0 and 100
+        level:
+            one of ``"cell"``, ``"notebook"`` or ``"assignment"``
+
+        Returns
+        -------
+        percentiles:
+            an array with one value per label, or with one row per
+            percentile if ``q`` is a sequence
+
+        """
+        _, scores, _ = self.grouped(level)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanpercentile(scores, q, axis=0)
+
+    def histogram(self, bins: int = 10, level: str = "cell") -> Tuple[Any, Any]:
+        """Count the scores of each cell, notebook or assignment in equal
+        bins of the maximum score.
+
+        Parameters
+        ----------
+        bins:
+            the number of bins
+        level:
+            one of ``"cell"``, ``"notebook"`` or ``"assignment"``
+
+        Returns
+        -------
+        counts:
+            an array of shape ``(len(labels), bins)``
+        edges:
+            the ``bins + 1`` edges of the bins, as fractions of the maximum
+            score of each label
+
+        """
+        _, scores, max_scores = self.grouped(level)
+        n_labels = scores.shape[1]
+        submitted = ~np.isnan(scores)
+
+        fractions = np.divide(
+            scores, max_scores,
+            out=np.zeros_like(scores),
+            where=submitted & (max_scores > 0))
+        # full marks (or extra credit) go into the last bin
+        index = np.clip(np.floor(fractions * bins).astype(int), 0, bins - 1)
+        index += np.arange(n_labels) * bins
+
+        counts = np.bincount(index[submitted], minlength=n_labels * bins)
+        return counts.reshape(n_labels, bins), np.linspace(0.0, 1.0, bins + 1)
+
+    def discrimination(self, level: str = "cell") -> Any:
+        """The discrimination index of each cell, notebook or assignment:
+        the correlation between its scores and the total of the other scores
+        of the same students (the corrected item-total correlation).
+
+        Only students with at least one submission are included, and
+        assignments that they did not submit count as zero. The index is NaN
+        for labels whose scores, or the corresponding totals, do not vary.
+
+        """
+        _, scores, _ = self.grouped(level)
+        scores = scores[~np.all(np.isnan(scores), axis=1)]
+        scores = np.nan_to_num(scores)
+        rest = scores.sum(axis=1)[:, None] - scores
+
+        scores = scores - scores.mean(axis=0)
+        rest = rest - rest.mean(axis=0)
+        numerator = (scores * rest).sum(axis=0)
+        denominator = np.sqrt((scores ** 2).sum(axis=0) * (rest ** 2).sum(axis=0))
+        return np.divide(
+            numerator, denominator,
+            out=np.full(numerator.shape, np.nan),
+            where=denominator > 0)
+
+    def to_dataframe(self, level: str = "cell") -> Any:
+        """Convert the scores to a pandas DataFrame, indexed by student id
+        and with one column per cell, notebook or assignment.
+
+        """
+        # pandas is slow to import, so it is only imported when needed
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError(
+                "pandas is required to convert score matrices to data frames, "
+                "install it with: pip install nbgrader[analysis]")
+
+        labels, scores, _ = self.grouped(level)
+        names = list(reversed(LEVELS[LEVELS.index(level):]))
+        columns = pd.MultiIndex.from_tuples(labels, names=names) if labels else None
+        return pd.DataFrame(
+            scores, index=pd.Index(self.students, name="student"), columns=columns)
@@ -98,6 +98,35 @@ class CommentHandler(BaseApiHandler):
         self.write(json.dumps(comment.to_dict()))
 
 
+class ChangeCollectionHandler(BaseApiHandler):
+    # the maximum number of changes returned at once
+    max_limit = 1000
+
+    # The cursor is the id of the last change that was returned. On databases
+    # where concurrent transactions may commit their changes out of order
+    # (e.g. PostgreSQL), a change with a lower id may become visible after
+    # the cursor has moved past it, and is then skipped; see
+    # Gradebook.changes_since.
+    @web.authenticated
+    @check_xsrf
+    @check_notebook_dir
+    def get(self):
+        try:
+            cursor = int(self.get_argument("since", "0"))
+            limit = int(self.get_argument("limit", str(self.max_limit)))
+        except ValueError:
+            raise web.HTTPError(400)
+        if not 1 <= limit <= self.max_limit:
+            raise web.HTTPError(400, "limit must be between 1 and {}".format(self.max_limit))
+        changes = self.gradebook.changes_since(cursor, limit=limit)
+        if changes:
+            cursor = changes[-1].id
+        self.write(json.dumps({
+            "changes": [c.to_dict() for c in changes],
+            "cursor": cursor
+        }))
+
+
 class FlagSubmissionHandler(BaseApiHandler):
     @web.authenticated
     @check_xsrf
@@ -341,6 +370,8 @@ default_handlers = [
     (r"/formgrader/api/comments", CommentCollectionHandler),
     (r"/formgrader/api/comment/([^/]+)", CommentHandler),
 
+    (r"/formgrader/api/changes", ChangeCollectionHandler),
+
     (r"/formgrader/api/students", StudentCollectionHandler),
     (r"/formgrader/api/student/([^/]+)", StudentHandler),
 
@@ -6,6 +6,7 @@ from tornado import web
 
 from .base import BaseHandler, check_xsrf, check_notebook_dir
 from ...api import MissingEntry
+from ...utils import find_stored_file, open_stored_file, is_compressed
 
 
 class ManageAssignmentsHandler(BaseHandler):
@@ -96,6 +97,7 @@ class SubmissionHandler(BaseHandler):
 
         filename = os.path.join(os.path.abspath(self.coursedir.format_path(
             self.coursedir.autograded_directory, student_id, assignment_id)), '{}.ipynb'.format(notebook_id))
+        filename = find_stored_file(filename) or filename
         relative_path = os.path.relpath(filename, self.coursedir.root)
         indices = self.api.get_notebook_submission_indices(assignment_id, notebook_id)
         ix = indices.get(submission.id, -2)
@@ -121,6 +123,11 @@ class SubmissionHandler(BaseHandler):
             self.set_status(404)
             self.write(html)
 
+        elif is_compressed(filename):
+            with open_stored_file(filename) as fh:
+                html, _ = self.exporter.from_file(fh, resources=resources)
+            self.write(html)
+
         else:
             html, _ = self.exporter.from_filename(filename, resources=resources)
             self.write(html)
@@ -9,6 +9,9 @@
 <meta charset="utf-8" />
 <title>{{ resources.nbgrader.notebook }}</title>
 
+{% for href in resources.nbgrader.feedback_assets -%}
+    <link rel="stylesheet" type="text/css" href="{{ href }}" />
+{% endfor %}
 {% for css in resources.inlining.css -%}
     <style type="text/css">
     {{ css }}
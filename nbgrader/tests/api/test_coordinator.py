@@ -0,0 +1,114 @@
+import queue
+import threading
+
+import pytest
+
+from ... import api
+from ...api import Gradebook, InvalidEntry, MissingEntry
+from ...coordinator import WriteCoordinator
+
+
+@pytest.fixture
+def db_url(tmpdir):
+    db_url = "sqlite:///" + str(tmpdir.join("gradebook.db"))
+    with Gradebook(db_url) as gb:
+        gb.add_assignment('ps1')
+        gb.add_notebook('p1', 'ps1')
+        gb.add_grade_cell('written1', 'p1', 'ps1', max_score=4, cell_type='markdown')
+        gb.add_solution_cell('written1', 'p1', 'ps1')
+    yield db_url
+    api.dispose_engines()
+
+
+def add_submission(gb, student):
+    gb.update_or_create_student(student)
+    return gb.add_submission('ps1', student).id
+
+
+def test_write_coordinator(db_url):
+    students = ['student{}'.format(i) for i in range(20)]
+    with WriteCoordinator(db_url, batch_size=8) as writer:
+        futures = []
+
+        def work(student):
+            futures.append(writer.submit(add_submission, student))
+            writer.flush()
+            futures.append(writer.submit('bulk_set_grades', [{
+                'assignment': 'ps1', 'notebook': 'p1', 'cell': 'written1',
+                'student': student, 'manual_score': 3, 'comment': 'ok'}]))
+
+        threads = [threading.Thread(target=work, args=(x,)) for x in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+        assert all(x.done() for x in futures)
+        assert writer.apply('bulk_set_grades', []) == {'grades': 0, 'comments': 0}
+
+    with Gradebook(db_url) as gb:
+        assert len(gb.assignment_submissions('ps1')) == 20
+        assert gb.find_submission('ps1', 'student7').score == 3
+        assert gb.find_comment('written1', 'p1', 'ps1', 'student7').manual_comment == 'ok'
+
+    with pytest.raises(RuntimeError):
+        writer.submit(add_submission, 'student21')
+
+
+def test_write_coordinator_errors(db_url):
+    started = threading.Event()
+    release = threading.Event()
+
+    def wait(gb):
+        started.set()
+        release.wait()
+
+    with WriteCoordinator(db_url, max_pending=3) as writer:
+        # the changes submitted while the writer is busy are applied together
+        writer.submit(wait)
+        started.wait()
+        first = writer.submit(add_submission, 'hacker123')
+        bad = writer.submit('find_student', 'bitdiddle')
+        second = writer.submit(add_submission, 'louisreasoner')
+
+        # there are too many changes waiting
+        with pytest.raises(queue.Full):
+            writer.submit(add_submission, 'alyssa', timeout=0.1)
+        release.set()
+
+        # a bad change does not fail the others
+        with pytest.raises(MissingEntry):
+            bad.result()
+        assert first.result() and second.result()
+        with pytest.raises(InvalidEntry):
+            writer.apply(add_submission, 'hacker123')
+
+    with Gradebook(db_url) as gb:
+        assert len(gb.assignment_submissions('ps1')) == 2
+
+    with pytest.raises(ValueError):
+        WriteCoordinator("sqlite:///:memory:")
+
+
+def test_write_coordinator_close(db_url):
+    writer = WriteCoordinator(db_url)
+    closing = []
+    put = writer._queue.put
+
+    def close_then_put(item, *args, **kwargs):
+        # close the coordinator while a change is being submitted
+        if item is not None and not closing:
+            closing.append(threading.Thread(target=writer.close))
+            closing[0].start()
+            closing[0].join(0.2)
+        put(item, *args, **kwargs)
+
+    writer._queue.put = close_then_put
+    future = writer.submit(add_submission, 'hacker123')
+    closing[0].join()
+
+    # the change was applied before the writer stopped
+    assert future.result(timeout=5)
+    writer.flush()
+    with pytest.raises(RuntimeError):
+        writer.submit(add_submission, 'bitdiddle')
@@ -1,4 +1,5 @@
 import pytest
+import sqlalchemy
 
 from datetime import datetime, timedelta
 from ... import api
@@ -204,6 +205,171 @@ def test_init(gradebook: Gradebook) -> None:
     assert gradebook.assignments == []
 
 
+def test_shared_engine(tmpdir, monkeypatch):
+    db_url = "sqlite:///" + str(tmpdir.join("gradebook.db"))
+    try:
+        with Gradebook(db_url) as gb1, Gradebook(db_url) as gb2:
+            assert gb1.engine is gb2.engine
+            gb1.add_student('12345')
+            assert gb2.find_student('12345').id == '12345'
+
+        # relative paths refer to the same database
+        monkeypatch.chdir(str(tmpdir))
+        with Gradebook("sqlite:///gradebook.db") as gb3:
+            assert gb3.engine is gb1.engine
+
+        # in-memory databases are never shared
+        with Gradebook("sqlite:///:memory:") as gb4, Gradebook("sqlite:///:memory:") as gb5:
+            assert gb4.engine is not gb5.engine
+
+        api.dispose_engines(db_url)
+        with Gradebook(db_url) as gb6:
+            assert gb6.engine is not gb1.engine
+            assert gb6.find_student('12345').id == '12345'
+
+        # a forked process does not reuse the connections of its parent
+        monkeypatch.setattr(api, "_engines_pid", -1)
+        with Gradebook(db_url) as gb7:
+            assert gb7.engine is not gb6.engine
+    finally:
+        api.dispose_engines()
+
+
+def test_engine_key(tmpdir, monkeypatch):
+    make_url = sqlalchemy.engine.url.make_url
+
+    class ImmutableURL(object):
+        """A URL that cannot be changed, like in SQLAlchemy 1.4 and later."""
+
+        def __init__(self, url):
+            object.__setattr__(self, '_url', make_url(url))
+
+        def __getattr__(self, name):
+            return getattr(self._url, name)
+
+        def __setattr__(self, name, value):
+            raise AttributeError("can't set attribute")
+
+        def set(self, database):
+            url = make_url(str(self._url))
+            url.database = database
+            return ImmutableURL(str(url))
+
+        def __str__(self):
+            return str(self._url)
+
+    monkeypatch.setattr(api, "make_url", ImmutableURL)
+    monkeypatch.chdir(str(tmpdir))
+    assert api._engine_key("sqlite:///gradebook.db") == \
+        "sqlite:///" + str(tmpdir.join("gradebook.db"))
+    assert api._engine_key("sqlite:///:memory:") == "sqlite:///:memory:"
+
+
+def test_transaction(gradebook):
+    gradebook.add_assignment('foo')
+    with gradebook.transaction():
+        gradebook.add_student('hacker123')
+        # the changes are visible in the transaction before they are committed
+        with gradebook.transaction():
+            gradebook.add_submission('foo', 'hacker123')
+        assert gradebook.find_submission('foo', 'hacker123')
+    assert gradebook.find_submission('foo', 'hacker123')
+
+    # nothing is committed if a method fails
+    with pytest.raises(InvalidEntry):
+        with gradebook.transaction():
+            gradebook.add_student('bitdiddle')
+            gradebook.add_student('hacker123')
+    with pytest.raises(MissingEntry):
+        gradebook.find_student('bitdiddle')
+
+    # or if the transaction raises an exception
+    with pytest.raises(ValueError):
+        with gradebook.transaction():
+            gradebook.add_student('bitdiddle')
+            raise ValueError
+    with pytest.raises(MissingEntry):
+        gradebook.find_student('bitdiddle')
+
+
+def test_undefer_computed(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.db.commit()
+    statements = []
+    sqlalchemy.event.listen(
+        assignment.engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement))
+
+    # the scores are only computed when they are accessed
+    submission = assignment.find_submission('foo', 'hacker123')
+    assert 'grade_cells' not in statements[-1]
+    submission.max_score
+    assert len(statements) == 2
+
+    # unless they are loaded right away
+    assignment.db.expire_all()
+    statements[:] = []
+    submission = assignment.find_submission('foo', 'hacker123', computed=True)
+    submission.to_dict()
+    assert 'grade_cells' in statements[0]
+    assert not any('grade_cells' in x for x in statements[1:])
+
+
+def test_submission_max_task_score(gradebook):
+    gradebook.add_assignment('foo')
+    gradebook.add_assignment('bar')
+    gradebook.add_notebook('p1', 'foo')
+    gradebook.add_notebook('p1', 'bar')
+    gradebook.add_task_cell('task1', 'p1', 'foo', max_score=1, cell_type='markdown')
+    gradebook.add_task_cell('task1', 'p1', 'bar', max_score=5, cell_type='markdown')
+    gradebook.add_student('hacker123')
+    gradebook.add_submission('foo', 'hacker123')
+    gradebook.add_submission('bar', 'hacker123')
+    assert gradebook.find_submission('foo', 'hacker123').max_task_score == 1
+    assert gradebook.find_submission('bar', 'hacker123').max_task_score == 5
+
+
+def test_foreign_key_indexes(gradebook):
+    indexes = [
+        row[0] for row in gradebook.db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert 'ix_grade_notebook_id' in indexes
+    assert 'ix_comment_notebook_id' in indexes
+    assert 'ix_submitted_notebook_assignment_id' in indexes
+    assert 'ix_submitted_assignment_student_id' in indexes
+
+
+def test_fast_open(tmpdir):
+    db_url = "sqlite:///" + str(tmpdir.join("gradebook.db"))
+    statements = []
+    try:
+        with Gradebook(db_url) as gb:
+            gb.add_student('12345')
+            sqlalchemy.event.listen(
+                gb.engine, "before_cursor_execute",
+                lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # the schema and course have already been checked
+        with Gradebook(db_url) as gb:
+            assert statements == []
+            assert gb.find_student('12345').id == '12345'
+
+        # a different course still needs to be created
+        statements[:] = []
+        with Gradebook(db_url, course_id="other_course") as gb:
+            assert len(statements) > 0
+            assert gb.db.query(api.Course).count() == 2
+
+        # after disposing the engine, the schema is checked again
+        api.dispose_engines(db_url)
+        with Gradebook(db_url) as gb:
+            assert gb._schema_is_current()
+            assert gb.find_student('12345').id == '12345'
+    finally:
+        api.dispose_engines()
+
+
 # Test students
 
 def test_add_student(gradebook):
@@ -269,6 +435,32 @@ def test_update_or_create_student(gradebook):
     assert s2.first_name == 'Alyssa'
 
 
+def test_update_or_create_students(gradebook):
+    gradebook.add_student('hacker123', first_name='Alyssa')
+    gradebook.add_student('bitdiddle', first_name='Ben')
+    summary = gradebook.update_or_create_students([
+        {'id': 'hacker123', 'first_name': 'Alyssa'},
+        {'id': 'bitdiddle', 'last_name': 'Bitdiddle'},
+        {'id': 'louisreasoner'},
+        {'id': 'louisreasoner', 'email': 'louis@example.com'},
+    ])
+    assert summary == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+
+    s = gradebook.find_student('bitdiddle')
+    assert (s.first_name, s.last_name) == ('Ben', 'Bitdiddle')
+    assert gradebook.find_student('louisreasoner').email == 'louis@example.com'
+
+    summary = gradebook.update_or_create_students(
+        ({'id': 'student{}'.format(i)} for i in range(5)), batch_size=2)
+    assert summary == {'inserted': 5, 'updated': 0, 'unchanged': 0}
+    assert len(gradebook.students) == 8
+
+    with pytest.raises(InvalidEntry):
+        gradebook.update_or_create_students([{'first_name': 'Alyssa'}])
+    with pytest.raises(InvalidEntry):
+        gradebook.update_or_create_students([{'id': 'hacker123', 'foo': 'bar'}])
+
+
 # Test assignments
 
 def test_add_assignment(gradebook):
@@ -338,6 +530,79 @@ def test_remove_assignment(assignment):
     assert assignment.find_student('hacker123').submissions == []
 
 
+def test_remove_statements(assignment):
+    def count_deletes(num_students):
+        for i in range(num_students):
+            assignment.update_or_create_student('student{}'.format(i))
+            assignment.add_submission('foo', 'student{}'.format(i))
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.startswith("DELETE"):
+                statements.append(statement)
+
+        sqlalchemy.event.listen(assignment.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assignment.remove_assignment('foo')
+        finally:
+            sqlalchemy.event.remove(assignment.engine, "before_cursor_execute", before_cursor_execute)
+
+        assignment.add_assignment('foo')
+        assignment.add_notebook('p1', 'foo')
+        assignment.add_grade_cell('test1', 'p1', 'foo', max_score=1, cell_type='code')
+        assignment.add_solution_cell('test1', 'p1', 'foo')
+        return len(statements)
+
+    assert count_deletes(1) == count_deletes(5)
+    assert assignment.db.query(api.Grade).count() == 0
+
+
+def test_remove_forgets_deleted(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    s1 = assignment.add_submission('foo', 'hacker123')
+    s2 = assignment.add_submission('foo', 'bitdiddle')
+    g1 = assignment.find_grade('test1', 'p1', 'foo', 'hacker123')
+    g2 = assignment.find_grade('test1', 'p1', 'foo', 'bitdiddle')
+
+    # the loaded objects are not looked up by their ids
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.startswith("SELECT"):
+            statements.append(statement)
+
+    sqlalchemy.event.listen(assignment.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assignment.remove_submission('foo', 'hacker123')
+    finally:
+        sqlalchemy.event.remove(assignment.engine, "before_cursor_execute", before_cursor_execute)
+    assert not any("IN (?" in x for x in statements)
+
+    assert sqlalchemy.inspect(s1).detached
+    assert sqlalchemy.inspect(g1).detached
+    assert sqlalchemy.inspect(s2).persistent
+    assert sqlalchemy.inspect(g2).persistent
+
+
+def test_remove_notebook_scores(assignment):
+    assignment.add_notebook('p2', 'foo')
+    assignment.add_grade_cell('test1', 'p2', 'foo', max_score=1, cell_type='code')
+    assignment.add_student('hacker123')
+    s = assignment.add_submission('foo', 'hacker123')
+    assignment.find_grade('test1', 'p1', 'foo', 'hacker123').manual_score = 1
+    assignment.find_grade('test1', 'p2', 'foo', 'hacker123').manual_score = 1
+    assignment.db.commit()
+    assert s.score == 2
+
+    assignment.remove_notebook('p2', 'foo')
+    assert s.score == 1
+    assignment.remove_submission_notebook('p1', 'foo', 'hacker123')
+    assert s.score == 0
+    assert s.notebooks == []
+
+
 def test_update_or_create_assignment(gradebook):
     # first test creating it
     a1 = gradebook.update_or_create_assignment('foo')
@@ -349,6 +614,23 @@ def test_update_or_create_assignment(gradebook):
     assert a1 == a2
     assert a2.duedate == utils.parse_utc("2015-02-02 14:58:23.948203 America/Los_Angeles")
 
+
+def test_update_or_create_assignments(gradebook):
+    duedate = "2015-02-02 14:58:23.948203 America/Los_Angeles"
+    gradebook.add_assignment('foo')
+    summary = gradebook.update_or_create_assignments([
+        {'name': 'foo', 'duedate': duedate},
+        {'name': 'bar', 'duedate': None},
+    ])
+    assert summary == {'inserted': 1, 'updated': 1, 'unchanged': 0}
+    assert gradebook.find_assignment('foo').duedate == utils.parse_utc(duedate)
+    bar = gradebook.find_assignment('bar')
+    assert bar.course_id == gradebook.course_id
+    assert bar.id is not None
+
+    summary = gradebook.update_or_create_assignments([{'name': 'foo', 'duedate': duedate}])
+    assert summary == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+
 # Test notebooks
 
 
@@ -782,6 +1064,37 @@ def test_remove_submission_notebook(assignment):
             assignment.find_submission_notebook(nb.name, 'foo', 'hacker123')
 
 
+def test_iter_submissions(assignment):
+    for student in ['hacker123', 'bitdiddle', 'louisreasoner']:
+        assignment.add_student(student, last_name=student[::-1])
+    assignment.add_submission('foo', 'hacker123')
+    assignment.add_submission('foo', 'bitdiddle')
+
+    students = list(assignment.iter_students(batch_size=2))
+    assert students == assignment.students
+    rows = list(assignment.iter_students(batch_size=2, tuples=True))
+    assert [x.id for x in rows] == [x.id for x in students]
+    assert rows[0].last_name == students[0].last_name
+    assert not isinstance(rows[0], api.Student)
+
+    submissions = list(assignment.iter_assignment_submissions('foo', batch_size=1, computed=True))
+    assert set(submissions) == set(assignment.assignment_submissions('foo'))
+    rows = list(assignment.iter_assignment_submissions('foo', tuples=True))
+    assert {x.student_id for x in rows} == {'hacker123', 'bitdiddle'}
+    assert {x.score for x in rows} == {0}
+    assert list(assignment.iter_assignment_submissions('bar')) == []
+
+    notebooks = list(assignment.iter_notebook_submissions('p1', 'foo', batch_size=1))
+    assert set(notebooks) == set(assignment.notebook_submissions('p1', 'foo'))
+    rows = list(assignment.iter_notebook_submissions('p1', 'foo', tuples=True))
+    assert {x.id for x in rows} == {x.id for x in notebooks}
+
+    submissions = list(assignment.iter_student_submissions('hacker123'))
+    assert submissions == assignment.student_submissions('hacker123')
+    rows = list(assignment.iter_student_submissions('louisreasoner', tuples=True))
+    assert rows == []
+
+
 def test_find_grade(assignment):
     assignment.add_student('hacker123')
     s = assignment.add_submission('foo', 'hacker123')
@@ -838,6 +1151,221 @@ def test_find_comment_by_id(assignment):
         assignment.find_comment_by_id('12345')
 
 
+def test_find_submitted_cells(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.add_submission('foo', 'bitdiddle')
+
+    grades = assignment.find_submitted_cells(api.Grade, 'p1', 'foo', 'hacker123')
+    assert grades == {
+        'test1': assignment.find_grade('test1', 'p1', 'foo', 'hacker123'),
+        'test2': assignment.find_grade('test2', 'p1', 'foo', 'hacker123')}
+    comments = assignment.find_submitted_cells(api.Comment, 'p1', 'foo', 'bitdiddle')
+    assert comments == {
+        'solution1': assignment.find_comment('solution1', 'p1', 'foo', 'bitdiddle'),
+        'test2': assignment.find_comment('test2', 'p1', 'foo', 'bitdiddle')}
+
+    assert assignment.find_submitted_cells(api.Grade, 'p2', 'foo', 'hacker123') == {}
+    assert assignment.find_submitted_cells(api.Grade, 'p1', 'foo', 'louisreasoner') == {}
+
+
+def test_submitted_notebook_last_modified(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_submission('foo', 'hacker123')
+    n1 = assignment.find_submission_notebook('p1', 'foo', 'hacker123')
+    created = n1.last_modified
+    assert created is not None
+    assert n1.feedback_last_modified is None
+
+    # flagging the notebook does not count as a change to its grades
+    n1.flagged = True
+    assignment.db.commit()
+    assert n1.last_modified == created
+
+    # neither does a grade being flushed without changes
+    grade = assignment.find_grade('test1', 'p1', 'foo', 'hacker123')
+    grade.manual_score = grade.manual_score
+    assignment.db.commit()
+    assert n1.last_modified == created
+
+    grade.manual_score = 1
+    assignment.db.commit()
+    after_grade = n1.last_modified
+    assert after_grade > created
+
+    comment = assignment.find_comment('test2', 'p1', 'foo', 'hacker123')
+    comment.manual_comment = "nice work"
+    assignment.db.commit()
+    assert n1.last_modified > after_grade
+
+
+def test_stored_scores(assignment):
+    assignment.add_student('hacker123')
+    s1 = assignment.add_submission('foo', 'hacker123')
+    n1 = s1.notebooks[0]
+    assert (n1.score, n1.needs_manual_grade) == (0, True)
+    assert (s1.score, s1.needs_manual_grade) == (0, True)
+
+    # changing a grade updates the stored scores
+    g1 = assignment.find_grade('test1', 'p1', 'foo', 'hacker123')
+    g2 = assignment.find_grade('test2', 'p1', 'foo', 'hacker123')
+    g1.auto_score = 0.5
+    g1.needs_manual_grade = False
+    g2.manual_score = 2
+    g2.needs_manual_grade = False
+    assignment.db.commit()
+    assert (n1.score, n1.code_score, n1.written_score) == (2.5, 0.5, 2)
+    assert (n1.needs_manual_grade, n1.failed_tests) == (False, True)
+    assert (s1.score, s1.code_score, s1.written_score) == (2.5, 0.5, 2)
+    assert not s1.needs_manual_grade
+    assert assignment.find_student('hacker123').score == 2.5
+
+    # as does changing the grade cells
+    assignment.update_or_create_grade_cell('test1', 'p1', 'foo', max_score=0.5)
+    assert not n1.failed_tests
+
+    # scores that are out of date can be recomputed
+    assignment.db.execute("UPDATE submitted_notebook SET score = 0")
+    assignment.db.execute("UPDATE submitted_assignment SET score = 0")
+    assignment.db.commit()
+    assert s1.score == 0
+    assignment.rebuild_aggregates()
+    assert (n1.score, s1.score) == (2.5, 2.5)
+
+
+def test_score_last_modified(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    s1 = assignment.add_submission('foo', 'hacker123')
+    s2 = assignment.add_submission('foo', 'bitdiddle')
+    assert s1.score_last_modified is not None
+
+    past = datetime(2000, 1, 1)
+    s1.score_last_modified = s2.score_last_modified = past
+    for notebook in s1.notebooks + s2.notebooks:
+        notebook.last_modified = past
+    assignment.db.commit()
+
+    # changes that do not affect the score are not recorded
+    g1 = assignment.find_grade('test1', 'p1', 'foo', 'hacker123')
+    g1.needs_manual_grade = False
+    assignment.find_comment('test2', 'p1', 'foo', 'hacker123').manual_comment = 'good'
+    assignment.db.commit()
+    assert s1.score_last_modified == past
+
+    g1.manual_score = 1
+    assignment.db.commit()
+    assert s1.score_last_modified > past
+    assert s2.score_last_modified == past
+
+    # the late penalty is part of the final score
+    s1.score_last_modified = past
+    assignment.find_submission_notebook('p1', 'foo', 'bitdiddle').late_submission_penalty = 1
+    assignment.db.commit()
+    assert s2.score_last_modified > past
+
+    rows = list(assignment.iter_submission_scores(since=past))
+    assert [x["student_id"] for x in rows] == ['bitdiddle']
+    assert list(assignment.iter_submission_scores(since=s2.score_last_modified)) == []
+
+    grades = list(assignment.iter_grades(since=past))
+    assert {x["student_id"] for x in grades} == {'hacker123'}
+
+    # removed submissions are included as missing submissions
+    since = s2.score_last_modified
+    assignment.remove_submission('foo', 'hacker123')
+    rows = list(assignment.iter_submission_scores(since=since))
+    assert [(x["student_id"], x["timestamp"], x["score"]) for x in rows] == [('hacker123', None, 0.0)]
+    assignment.add_submission('foo', 'hacker123')
+    rows = list(assignment.iter_submission_scores(since=since))
+    assert [(x["student_id"], x["timestamp"]) for x in rows] == [('hacker123', None)]
+
+
+def test_changes_since(assignment):
+    assert assignment.changes_since() == []
+    assignment.add_student('hacker123')
+    s = assignment.add_submission('foo', 'hacker123')
+
+    changes = assignment.changes_since()
+    assert [(c.kind, c.action) for c in changes[:2]] == [
+        ('submitted_assignment', 'insert'), ('submitted_notebook', 'insert')]
+    assert {c.kind for c in changes[2:]} == {'grade', 'comment'}
+    assert changes[0].object_id == s.id
+    assert (changes[0].assignment, changes[0].notebook, changes[0].student) == ('foo', None, 'hacker123')
+    assert changes[1].notebook == 'p1'
+    cursor = changes[-1].id
+
+    g = assignment.find_grade('test1', 'p1', 'foo', 'hacker123')
+    g.manual_score = 1
+    assignment.db.commit()
+    g.manual_score = 2
+    assignment.db.rollback()
+    changes = assignment.changes_since(cursor)
+    assert [(c.kind, c.action, c.object_id) for c in changes] == [('grade', 'update', g.id)]
+    assert changes[0].to_dict()["student"] == 'hacker123'
+    assert assignment.changes_since(changes[0].id) == []
+
+    assignment.remove_submission('foo', 'hacker123')
+    changes = assignment.changes_since(cursor, limit=2)
+    assert [c.action for c in changes] == ['update', 'delete']
+    changes = assignment.changes_since(changes[-1].id)
+    assert {c.action for c in changes} == {'delete'}
+    assert (changes[-1].kind, changes[-1].object_id) == ('submitted_assignment', s.id)
+    assert changes[-1].student == 'hacker123'
+
+
+def test_bulk_set_grades(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    s1 = assignment.add_submission('foo', 'hacker123')
+    s2 = assignment.add_submission('foo', 'bitdiddle')
+    cursor = assignment.changes_since()[-1].id
+
+    summary = assignment.bulk_set_grades([
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'test2', 'student': 'hacker123',
+         'manual_score': 1.5, 'comment': 'good'},
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'test1', 'student': 'hacker123',
+         'manual_score': '1'},
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'solution1', 'student': 'bitdiddle',
+         'manual_score': None, 'comment': 'bad'},
+    ], batch_size=2)
+    assert summary == {'grades': 2, 'comments': 2}
+
+    g = assignment.find_grade('test2', 'p1', 'foo', 'hacker123')
+    assert (g.manual_score, g.needs_manual_grade) == (1.5, False)
+    assert assignment.find_comment('test2', 'p1', 'foo', 'hacker123').manual_comment == 'good'
+    assert assignment.find_comment('solution1', 'p1', 'foo', 'bitdiddle').manual_comment == 'bad'
+    assert s1.score == 2.5
+    assert s1.notebooks[0].needs_manual_grade is False
+    assert s2.score == 0
+    assert {(c.kind, c.student) for c in assignment.changes_since(cursor)} == {
+        ('grade', 'hacker123'), ('comment', 'hacker123'), ('comment', 'bitdiddle')}
+
+    # unchanged grades are not written again
+    summary = assignment.bulk_set_grades([
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'test1', 'student': 'hacker123',
+         'manual_score': 1}])
+    assert summary == {'grades': 0, 'comments': 0}
+
+    # nothing is imported if any of the rows is invalid
+    rows = [
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'test1', 'student': 'bitdiddle',
+         'manual_score': 1},
+        {'assignment': 'foo', 'notebook': 'p1', 'cell': 'test1', 'student': 'louisreasoner',
+         'manual_score': 1},
+    ]
+    with pytest.raises(MissingEntry):
+        assignment.bulk_set_grades(rows)
+    assert assignment.find_grade('test1', 'p1', 'foo', 'bitdiddle').manual_score is None
+    with pytest.raises(InvalidEntry):
+        assignment.bulk_set_grades([
+            {'assignment': 'foo', 'notebook': 'p1', 'cell': 'solution1', 'student': 'bitdiddle',
+             'manual_score': 1}])
+    with pytest.raises(InvalidEntry):
+        assignment.bulk_set_grades([{'assignment': 'foo', 'cell': 'test1', 'student': 'bitdiddle'}])
+
+
 # Test average scores
 
 def test_average_assignment_score(assignment):
@@ -900,6 +1428,56 @@ def test_average_notebook_score(assignment: Gradebook) -> None:
     assert assignment.average_notebook_written_score('p1', 'foo') == 1.5
 
 
+def test_assignment_statistics(assignment):
+    assignment.add_assignment('bar')
+    stats = assignment.assignment_statistics()
+    assert sorted(stats.keys()) == ['bar', 'foo']
+    assert stats['foo'] == {
+        "num_submissions": 0,
+        "average_score": 0.0,
+        "average_code_score": 0.0,
+        "average_written_score": 0.0,
+        "average_task_score": 0.0,
+        "highest_score": 0.0,
+        "num_needs_manual_grade": 0
+    }
+
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.add_submission('foo', 'bitdiddle')
+
+    g1 = assignment.find_grade("test1", "p1", "foo", "hacker123")
+    g2 = assignment.find_grade("test2", "p1", "foo", "hacker123")
+    g3 = assignment.find_grade("test1", "p1", "foo", "bitdiddle")
+    g1.manual_score = 0.5
+    g2.manual_score = 2
+    g3.manual_score = 1
+    for grade in (g1, g2):
+        grade.needs_manual_grade = False
+    assignment.db.commit()
+
+    stats = assignment.assignment_statistics(['foo'])
+    assert list(stats.keys()) == ['foo']
+    assert stats['foo']["num_submissions"] == 2
+    assert stats['foo']["average_score"] == 1.75
+    assert stats['foo']["average_code_score"] == 0.75
+    assert stats['foo']["average_written_score"] == 1.0
+    assert stats['foo']["average_task_score"] == 0.0
+    assert stats['foo']["highest_score"] == 2.5
+    assert stats['foo']["num_needs_manual_grade"] == 1
+
+    stats = assignment.notebook_statistics('foo')
+    assert list(stats.keys()) == ['p1']
+    assert stats['p1']["num_submissions"] == 2
+    assert stats['p1']["average_score"] == 1.75
+    assert stats['p1']["num_needs_manual_grade"] == 1
+
+    assert assignment.notebook_statistics('bar') == {}
+    with pytest.raises(MissingEntry):
+        assignment.notebook_statistics('baz')
+
+
 # Test mass dictionary queries
 
 def test_student_dicts(assignment):
@@ -982,6 +1560,39 @@ def test_submission_dicts(assignment):
     assert a == b
 
 
+def test_iter_submission_scores(assignment):
+    assignment.add_assignment('bar')
+    assignment.add_student('hacker123', last_name='Hacker')
+    assignment.add_student('bitdiddle', last_name='Bitdiddle')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.find_grade("test1", "p1", "foo", "hacker123").manual_score = 1
+    assignment.find_grade("test2", "p1", "foo", "hacker123").manual_score = 2
+    assignment.find_submission_notebook("p1", "foo", "hacker123").late_submission_penalty = 0.5
+    assignment.db.commit()
+
+    rows = list(assignment.iter_submission_scores(batch_size=1))
+    assert [(x["assignment"], x["student_id"]) for x in rows] == [
+        ('bar', 'bitdiddle'), ('bar', 'hacker123'), ('foo', 'bitdiddle'), ('foo', 'hacker123')]
+    assert rows[0]["timestamp"] is None
+    assert rows[0]["max_score"] == 0.0
+    assert rows[2]["raw_score"] == rows[2]["score"] == 0.0
+
+    submission = assignment.find_submission('foo', 'hacker123')
+    assert rows[3]["timestamp"] == submission.timestamp
+    assert rows[3]["raw_score"] == submission.score == 3
+    assert rows[3]["late_submission_penalty"] == submission.late_submission_penalty == 0.5
+    assert rows[3]["score"] == 2.5
+    assert rows[3]["max_score"] == submission.max_score
+
+    rows = list(assignment.iter_submission_scores(assignments=['foo'], students=['hacker123']))
+    assert len(rows) == 1
+
+    grades = list(assignment.iter_grades(students=['hacker123']))
+    assert [(x["notebook"], x["cell"], x["score"], x["max_score"]) for x in grades] == [
+        ('p1', 'test1', 1, 1), ('p1', 'test2', 2, 2)]
+    assert list(assignment.iter_grades(assignments=['bar'])) == []
+
+
 def test_grant_extension(gradebook):
     gradebook.add_assignment("ps1", duedate="2018-05-09 10:00:00")
     gradebook.add_student("hacker123")
@@ -1010,6 +1621,52 @@ def test_grant_extension(gradebook):
     assert s1.duedate == datetime(2018, 5, 9, 10, 0, 0)
 
 
+def test_grant_extensions_and_recompute_penalties(gradebook):
+    gradebook.add_assignment("ps1", duedate="2018-05-09 10:00:00")
+    gradebook.add_notebook("p1", "ps1")
+    gradebook.add_grade_cell("test1", "p1", "ps1", max_score=4, cell_type="code")
+    for student in ("hacker123", "bitdiddle", "louisreasoner"):
+        gradebook.add_student(student)
+        gradebook.add_submission("ps1", student, timestamp="2018-05-09 12:00:00")
+        gradebook.find_grade("test1", "p1", "ps1", student).auto_score = 3
+    gradebook.db.commit()
+
+    def penalty(student, score, seconds_late):
+        return seconds_late / 3600
+
+    assert gradebook.recompute_late_penalties("ps1", penalty) == 3
+    assert gradebook.find_submission_notebook("p1", "ps1", "hacker123").late_submission_penalty == 2
+    # nothing changes the second time
+    assert gradebook.recompute_late_penalties("ps1", penalty) == 0
+
+    assert gradebook.grant_extensions("ps1", ["hacker123", "bitdiddle"], hours=1) == 2
+    assert gradebook.find_submission("ps1", "hacker123").extension == timedelta(hours=1)
+    assert gradebook.find_submission("ps1", "louisreasoner").extension is None
+    assert gradebook.recompute_late_penalties("ps1", penalty, students=["hacker123"]) == 1
+    assert gradebook.find_submission_notebook("p1", "ps1", "hacker123").late_submission_penalty == 1
+    assert gradebook.find_submission_notebook("p1", "ps1", "bitdiddle").late_submission_penalty == 2
+
+    # submissions that are no longer late have no penalty
+    assert gradebook.grant_extensions("ps1", days=1) == 3
+    assert gradebook.recompute_late_penalties("ps1", penalty) == 3
+    submission = gradebook.find_submission("ps1", "louisreasoner")
+    assert submission.late_submission_penalty == 0
+    assert submission.notebooks[0].late_submission_penalty is None
+
+    changes = [x for x in gradebook.changes_since() if x.kind == "submitted_assignment"]
+    assert [x.action for x in changes[-3:]] == ["update"] * 3
+
+    # all of the students must have submitted the assignment
+    with pytest.raises(MissingEntry):
+        gradebook.grant_extensions("ps1", ["hacker123", "alyssa"])
+    assert gradebook.find_submission("ps1", "hacker123").extension == timedelta(days=1)
+    with pytest.raises(MissingEntry):
+        gradebook.grant_extensions("ps2")
+
+    assert gradebook.grant_extensions("ps1") == 3
+    assert gradebook.find_submission("ps1", "hacker123").extension is None
+
+
 # Test task cells
 
 def test_add_task_cell(gradebook):
@@ -1226,6 +1883,21 @@ def test_average_notebook_with_score(assignmentWithSubmissionWithMarks: Gradeboo
     assert assignmentWithSubmissionWithMarks.average_notebook_task_score('p1', 'foo') == sum(assignmentWithSubmissionWithMarks.usedgrades_task) / 2.0
 
 
+def test_statistics_with_score(assignmentWithSubmissionWithMarks: Gradebook) -> None:
+    gb = assignmentWithSubmissionWithMarks
+    stats = gb.assignment_statistics()['foo']
+    assert stats["average_score"] == gb.average_assignment_score('foo')
+    assert stats["average_code_score"] == gb.average_assignment_code_score('foo')
+    assert stats["average_written_score"] == gb.average_assignment_written_score('foo')
+    assert stats["average_task_score"] == gb.average_assignment_task_score('foo')
+
+    for notebook, stats in gb.notebook_statistics('foo').items():
+        assert stats["average_score"] == gb.average_notebook_score(notebook, 'foo')
+        assert stats["average_code_score"] == gb.average_notebook_code_score(notebook, 'foo')
+        assert stats["average_written_score"] == gb.average_notebook_written_score(notebook, 'foo')
+        assert stats["average_task_score"] == gb.average_notebook_task_score(notebook, 'foo')
+
+
 def test_student_dicts(assignmentWithSubmissionWithMarks):
     assign = assignmentWithSubmissionWithMarks
     students = assign.student_dicts()
@@ -0,0 +1,98 @@
+import pytest
+
+from ... import api
+from ...api import MissingEntry
+from ...latepenalties import no_penalty, zero_score, plugin_policy
+from ...plugins import LateSubmissionPlugin
+from _pytest.fixtures import SubRequest
+from nbgrader.api import Gradebook
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def gradebook(request: SubRequest) -> Gradebook:
+    gb = api.Gradebook("sqlite:///:memory:")
+
+    def fin() -> None:
+        gb.close()
+    request.addfinalizer(fin)
+    return gb
+
+
+@pytest.fixture
+def submitted(gradebook: Gradebook) -> Gradebook:
+    gradebook.add_assignment('ps1', duedate='2018-05-09 10:00:00')
+    gradebook.add_notebook('p1', 'ps1')
+    gradebook.add_notebook('p2', 'ps1')
+    gradebook.add_grade_cell('code1', 'p1', 'ps1', max_score=4, cell_type='code')
+    gradebook.add_grade_cell('code1', 'p2', 'ps1', max_score=4, cell_type='code')
+
+    timestamps = {
+        'alice': '2018-05-09 09:00:00',
+        'bob': '2018-05-09 12:00:00',
+        'carol': '2018-05-10 10:00:00',
+    }
+    for student, timestamp in timestamps.items():
+        gradebook.add_student(student)
+        gradebook.add_submission('ps1', student, timestamp=timestamp)
+        for notebook in ['p1', 'p2']:
+            gradebook.find_grade('code1', notebook, 'ps1', student).auto_score = 3
+    gradebook.find_submission_notebook('p1', 'ps1', 'carol').late_submission_penalty = 1
+    gradebook.grant_extension('ps1', 'bob', hours=1)
+    gradebook.db.commit()
+    return gradebook
+
+
+def hourly(students, scores, seconds_late):
+    return np.ceil(seconds_late / 3600)
+
+
+def test_penalty_simulation(submitted):
+    simulation = submitted.penalty_simulation()
+    assert len(simulation.notebooks) == 6
+    assert simulation.student_ids == ['alice', 'bob', 'carol']
+    assert simulation.scores.tolist() == [3] * 6
+    late = dict(zip(simulation.students, simulation.seconds_late))
+    assert late == {'alice': 0, 'bob': 3600, 'carol': 86400}
+    assert simulation.penalties.sum() == 1
+
+    # penalties are only given to late notebooks, and at most the score
+    penalties = simulation.evaluate(hourly)
+    assert dict(zip(simulation.students, penalties)) == {'alice': 0, 'bob': 1, 'carol': 3}
+    assert simulation.deltas(hourly).tolist() == [0, -2, -5]
+    assert simulation.deltas(no_penalty).tolist() == [0, 0, 1]
+    assert simulation.deltas(zero_score).tolist() == [0, -6, -5]
+
+    # NaN means no penalty
+    assert simulation.evaluate(lambda students, scores, late: np.nan).sum() == 0
+
+    # nothing is written to the database
+    assert submitted.find_submission('ps1', 'bob').late_submission_penalty == 0
+
+
+def test_penalty_simulation_compare(submitted):
+    simulation = submitted.penalty_simulation('ps1')
+    summary = simulation.compare({'hourly': hourly, 'none': no_penalty})
+    assert summary['hourly'] == {
+        'students': 2, 'mean': pytest.approx(-7 / 3), 'min': -5, 'max': 0, 'total': 8}
+    assert summary['none']['students'] == 1
+    assert summary['none']['total'] == 0
+
+    plugin = LateSubmissionPlugin(penalty_method='zero')
+    assert simulation.deltas(plugin_policy(plugin)).tolist() == \
+        simulation.deltas(zero_score).tolist()
+
+    submitted.add_assignment('ps2')
+    assert submitted.penalty_simulation('ps2').compare({'none': no_penalty}) == {
+        'none': {'students': 0, 'mean': 0, 'min': 0, 'max': 0, 'total': 0}}
+    with pytest.raises(MissingEntry):
+        submitted.penalty_simulation('ps3')
+
+
+def test_penalty_simulation_dataframe(submitted):
+    pytest.importorskip("pandas")
+    df = submitted.penalty_simulation().to_dataframe({'hourly': hourly, 'zero': zero_score})
+    assert df.index.tolist() == ['alice', 'bob', 'carol']
+    assert df.columns.tolist() == ['hourly', 'zero']
+    assert df.loc['bob', 'zero'] == -6
@@ -0,0 +1,112 @@
+import pytest
+
+from ... import api
+from ...api import MissingEntry
+from _pytest.fixtures import SubRequest
+from nbgrader.api import Gradebook
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def gradebook(request: SubRequest) -> Gradebook:
+    gb = api.Gradebook("sqlite:///:memory:")
+
+    def fin() -> None:
+        gb.close()
+    request.addfinalizer(fin)
+    return gb
+
+
+@pytest.fixture
+def graded(gradebook: Gradebook) -> Gradebook:
+    for assignment in ['ps1', 'ps2']:
+        gradebook.add_assignment(assignment)
+        gradebook.add_notebook('p1', assignment)
+        gradebook.add_grade_cell('code1', 'p1', assignment, max_score=2, cell_type='code')
+        gradebook.add_grade_cell('written1', 'p1', assignment, max_score=4, cell_type='markdown')
+        gradebook.add_task_cell('task1', 'p1', assignment, max_score=4, cell_type='markdown')
+
+    scores = {
+        'alice': (2, 4, 4),
+        'bob': (1, 2, 0),
+        'carol': (0, 1, 2),
+    }
+    for student, (code, written, task) in scores.items():
+        gradebook.add_student(student)
+        gradebook.add_submission('ps1', student)
+        gradebook.find_grade('code1', 'p1', 'ps1', student).auto_score = code
+        gradebook.find_grade('written1', 'p1', 'ps1', student).manual_score = written
+        gradebook.find_grade('task1', 'p1', 'ps1', student).manual_score = task
+    gradebook.add_student('dave')
+    gradebook.add_submission('ps2', 'alice')
+    gradebook.db.commit()
+    return gradebook
+
+
+def test_score_matrix(graded):
+    matrix = graded.score_matrix()
+    assert matrix.students == ['alice', 'bob', 'carol', 'dave']
+    assert matrix.cells == [
+        ('ps1', 'p1', 'code1'), ('ps1', 'p1', 'task1'), ('ps1', 'p1', 'written1'),
+        ('ps2', 'p1', 'code1'), ('ps2', 'p1', 'task1'), ('ps2', 'p1', 'written1')]
+    assert matrix.max_scores.tolist() == [2, 4, 4, 2, 4, 4]
+    assert matrix.scores[:3, :3].tolist() == [[2, 4, 4], [1, 0, 2], [0, 2, 1]]
+    assert matrix.scores[0, 3:].tolist() == [0, 0, 0]
+    assert np.isnan(matrix.scores[1:, 3:]).all()
+    assert np.isnan(matrix.scores[3]).all()
+    assert matrix.totals().tolist() == [10, 3, 3, 0]
+
+
+def test_score_matrix_assignment(graded):
+    matrix = graded.score_matrix('ps1')
+    assert matrix.cells == [('ps1', 'p1', 'code1'), ('ps1', 'p1', 'task1'), ('ps1', 'p1', 'written1')]
+    assert matrix.scores.shape == (4, 3)
+
+    graded.add_assignment('ps3')
+    assert graded.score_matrix('ps3').scores.shape == (4, 0)
+    with pytest.raises(MissingEntry):
+        graded.score_matrix('ps4')
+
+
+def test_score_matrix_grouped(graded):
+    matrix = graded.score_matrix()
+    labels, scores, max_scores = matrix.grouped('assignment')
+    assert labels == [('ps1',), ('ps2',)]
+    assert max_scores.tolist() == [10, 10]
+    assert scores[:3, 0].tolist() == [10, 3, 3]
+    assert np.isnan(scores[3, 0])
+
+    labels, _, _ = matrix.grouped('notebook')
+    assert labels == [('ps1', 'p1'), ('ps2', 'p1')]
+
+    with pytest.raises(ValueError):
+        matrix.grouped('student')
+
+
+def test_score_matrix_statistics(graded):
+    matrix = graded.score_matrix()
+
+    # only the submitted assignments are counted
+    assert matrix.mean('assignment').tolist() == [pytest.approx(16 / 3), 0]
+    assert matrix.mean('assignment')[0] == pytest.approx(graded.average_assignment_score('ps1'))
+    assert matrix.median()[:3].tolist() == [1, 2, 2]
+    assert matrix.percentile([0, 100], 'notebook')[:, 0].tolist() == [3, 10]
+
+    counts, edges = matrix.histogram(bins=2, level='assignment')
+    assert edges.tolist() == [0, 0.5, 1]
+    assert counts.tolist() == [[2, 1], [1, 0]]
+
+    discrimination = matrix.discrimination()
+    assert discrimination.shape == (6,)
+    assert discrimination[0] > 0
+    # nobody scored on the cells of ps2
+    assert np.isnan(discrimination[3:]).all()
+
+
+def test_score_matrix_dataframe(graded):
+    pytest.importorskip("pandas")
+    df = graded.score_matrix().to_dataframe('notebook')
+    assert df.index.tolist() == ['alice', 'bob', 'carol', 'dave']
+    assert df.columns.names == ['assignment', 'notebook']
+    assert df.loc['alice', ('ps1', 'p1')] == 10
@@ -8,7 +8,7 @@ from textwrap import dedent
 
 from _pytest.fixtures import SubRequest
 
-from ...api import Gradebook
+from ...api import Gradebook, dispose_engines
 from ...utils import rmtree
 
 
@@ -18,6 +18,7 @@ def db(request: SubRequest) -> str:
     dbpath = os.path.join(path, "nbgrader_test.db")
 
     def fin() -> None:
+        dispose_engines()
         rmtree(path)
     request.addfinalizer(fin)
 
@@ -29,6 +30,7 @@ def course_dir(request: SubRequest) -> str:
     path = tempfile.mkdtemp(prefix='tmp-coursedir-')
 
     def fin() -> None:
+        dispose_engines()
         rmtree(path)
     request.addfinalizer(fin)
 
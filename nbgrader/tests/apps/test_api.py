@@ -736,12 +736,19 @@ class TestNbGraderAPI(BaseTestApp):
             nb.grades[0].manual_score = 123
             gb.db.commit()
 
-        # contents shouldn't have changed, because force=False
+        # contents should have changed even though force=False, because the
+        # grades have changed since the feedback was generated
         result = api.generate_feedback("ps1", "foo", force=False)
         assert result["success"]
         assert os.path.exists(join(course_dir, "feedback", "foo", "ps1", "p1.html"))
         new_contents = open(join(course_dir, "feedback", "foo", "ps1", "p1.html"), "r").read()
-        assert new_contents == contents
+        assert new_contents != contents
+
+        # contents shouldn't have changed, because force=False and nothing
+        # has changed since the last time
+        result = api.generate_feedback("ps1", "foo", force=False)
+        assert result["success"]
+        assert open(join(course_dir, "feedback", "foo", "ps1", "p1.html"), "r").read() == new_contents
 
         # contents should now have changed, because force=True
         result = api.generate_feedback("ps1", "foo", force=True)
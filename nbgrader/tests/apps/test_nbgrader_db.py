@@ -5,8 +5,11 @@ import os
 
 from textwrap import dedent
 from os.path import join
+from subprocess import check_call
 
-from ...api import Gradebook, MissingEntry
+from ... import latepenalties
+from ...api import Gradebook, MissingEntry, dispose_engines
+from ...dbutil import _temp_alembic_ini
 from .. import run_nbgrader
 from .base import BaseTestApp
 
@@ -26,6 +29,11 @@ class TestNbGraderDb(BaseTestApp):
         run_nbgrader(["db", "assignment", "remove", "--help-all"])
         run_nbgrader(["db", "assignment", "add", "--help-all"])
         run_nbgrader(["db", "assignment", "import", "--help-all"])
+        run_nbgrader(["db", "grades", "--help-all"])
+        run_nbgrader(["db", "grades", "import", "--help-all"])
+        run_nbgrader(["db", "rebuild-aggregates", "--help-all"])
+        run_nbgrader(["db", "recompute-penalties", "--help-all"])
+        run_nbgrader(["db", "simulate-penalties", "--help-all"])
 
     def test_no_args(self):
         """Is there an error if no arguments are given?"""
@@ -169,6 +177,20 @@ class TestNbGraderDb(BaseTestApp):
             assert student.first_name is None
             assert student.email is None
 
+        # check that it works in several batches
+        with open("students.csv", "w") as fh:
+            fh.write("id,last_name\n")
+            for i in range(5):
+                fh.write("student{},xyz\n".format(i))
+            fh.write("foo,xyz\n")
+        run_nbgrader([
+            "db", "student", "import", "students.csv", "--db", db,
+            "--DbStudentImportApp.batch_size=2"])
+        with Gradebook(db) as gb:
+            assert len(gb.students) == 7
+            assert gb.find_student("student4").last_name == "xyz"
+            assert gb.find_student("foo").email == "foo@bar.com"
+
         # check that it fails when no id column is given
         with open("students.csv", "w") as fh:
             fh.write(dedent(
@@ -376,6 +398,162 @@ class TestNbGraderDb(BaseTestApp):
             assert assignment.duedate == datetime.datetime(2017, 1, 8, 16, 31, 22)
             assignment = gb.find_assignment("bar")
             assert assignment.duedate is None
+    def test_rebuild_aggregates(self, db):
+        run_nbgrader(["db", "assignment", "add", "foo", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        with Gradebook(db) as gb:
+            gb.add_notebook("p1", "foo")
+            gb.add_grade_cell("test1", "p1", "foo", max_score=2, cell_type="code")
+            gb.add_submission("foo", "foo")
+            grade = gb.find_grade("test1", "p1", "foo", "foo")
+            grade.auto_score = 1
+            gb.db.commit()
+            gb.db.execute("UPDATE submitted_assignment SET score = 0")
+            gb.db.commit()
+
+        run_nbgrader(["db", "rebuild-aggregates", "--db", db])
+        with Gradebook(db) as gb:
+            assert gb.find_submission("foo", "foo").score == 1
+
+    def test_recompute_penalties(self, db):
+        run_nbgrader(["db", "assignment", "add", "foo", "--duedate", "2018-05-09 10:00:00", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        with Gradebook(db) as gb:
+            gb.add_notebook("p1", "foo")
+            gb.add_grade_cell("test1", "p1", "foo", max_score=2, cell_type="code")
+            gb.add_submission("foo", "foo", timestamp="2018-05-09 12:00:00")
+            gb.find_grade("test1", "p1", "foo", "foo").auto_score = 2
+            gb.db.commit()
+
+        # the whole score is taken off late submissions
+        run_nbgrader([
+            "db", "recompute-penalties", "foo", "--db", db,
+            "--LateSubmissionPlugin.penalty_method=zero"])
+        with Gradebook(db) as gb:
+            assert gb.find_submission("foo", "foo").late_submission_penalty == 2
+
+        run_nbgrader(["db", "assignment", "add", "foo", "--duedate", "2018-05-09 12:00:00", "--db", db])
+        run_nbgrader(["db", "recompute-penalties", "foo", "--db", db])
+        with Gradebook(db) as gb:
+            assert gb.find_submission("foo", "foo").late_submission_penalty == 0
+
+        run_nbgrader(["db", "recompute-penalties", "--db", db], retcode=1)
+        run_nbgrader(["db", "recompute-penalties", "bar", "--db", db], retcode=1)
+
+    def test_simulate_penalties(self, db, temp_cwd, monkeypatch):
+        run_nbgrader(["db", "assignment", "add", "foo", "--duedate", "2018-05-09 10:00:00", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        run_nbgrader(["db", "student", "add", "bar", "--db", db])
+        with Gradebook(db) as gb:
+            gb.add_notebook("p1", "foo")
+            gb.add_grade_cell("test1", "p1", "foo", max_score=2, cell_type="code")
+            gb.add_submission("foo", "foo", timestamp="2018-05-09 12:00:00")
+            gb.add_submission("foo", "bar", timestamp="2018-05-09 09:00:00")
+            gb.find_grade("test1", "p1", "foo", "foo").auto_score = 2
+            gb.find_grade("test1", "p1", "foo", "bar").auto_score = 2
+            gb.db.commit()
+
+        output = run_nbgrader(["db", "simulate-penalties", "foo", "--db", db, "--to", "deltas.csv"], stdout=True)
+        assert "zero" in output
+        with open("deltas.csv") as fh:
+            assert fh.read().splitlines() == ["student,none,zero", "bar,0.0,0.0", "foo,0.0,-2.0"]
+
+        # nothing is written to the database
+        with Gradebook(db) as gb:
+            assert gb.find_submission("foo", "foo").late_submission_penalty == 0
+
+        run_nbgrader([
+            "db", "simulate-penalties", "--db", db,
+            "--DbSimulatePenaltiesApp.policies={'bad': 'nbgrader.latepenalties.nonexistent'}"], retcode=1)
+        run_nbgrader(["db", "simulate-penalties", "bar", "--db", db], retcode=1)
+
+        # without NumPy, the command explains how to install it
+        monkeypatch.setattr(latepenalties, "np", None)
+        output = run_nbgrader(["db", "simulate-penalties", "foo", "--db", db], retcode=1)
+        assert "pip install nbgrader[analysis]" in output
+        assert "Traceback" not in output
+
+    def test_grades_import(self, db, temp_cwd):
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        run_nbgrader(["db", "student", "add", "bar", "--db", db])
+        with Gradebook(db) as gb:
+            gb.add_notebook("p1", "ps1")
+            gb.add_grade_cell("written1", "p1", "ps1", max_score=4, cell_type="markdown")
+            gb.add_solution_cell("written1", "p1", "ps1")
+            gb.add_submission("ps1", "foo")
+            gb.add_submission("ps1", "bar")
+
+        with open("grades.csv", "w") as fh:
+            fh.write(dedent(
+                """
+                assignment,notebook,cell,student,manual_score,comment
+                ps1,p1,written1,foo,3,nice
+                ps1,p1,written1,bar,,
+                """
+            ).strip())
+        run_nbgrader(["db", "grades", "import", "grades.csv", "--db", db])
+        with Gradebook(db) as gb:
+            grade = gb.find_grade("written1", "p1", "ps1", "foo")
+            assert grade.manual_score == 3
+            assert not grade.needs_manual_grade
+            assert gb.find_comment("written1", "p1", "ps1", "foo").manual_comment == "nice"
+            assert gb.find_submission("ps1", "foo").score == 3
+            assert gb.find_grade("written1", "p1", "ps1", "bar").manual_score is None
+
+        # nothing is imported if a row does not match a submission
+        with open("grades.csv", "w") as fh:
+            fh.write(dedent(
+                """
+                assignment,notebook,cell,student,manual_score
+                ps1,p1,written1,bar,2
+                ps1,p1,written1,baz,2
+                """
+            ).strip())
+        run_nbgrader(["db", "grades", "import", "grades.csv", "--db", db], retcode=1)
+        with Gradebook(db) as gb:
+            assert gb.find_grade("written1", "p1", "ps1", "bar").manual_score is None
+
+        # check that it fails when a required column is missing
+        with open("grades.csv", "w") as fh:
+            fh.write("assignment,notebook,student,manual_score\nps1,p1,foo,1\n")
+        run_nbgrader(["db", "grades", "import", "grades.csv", "--db", db], retcode=1)
+
+    def test_upgrade_computes_scores(self, db):
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        with Gradebook(db) as gb:
+            gb.add_notebook("p1", "ps1")
+            gb.add_grade_cell("code1", "p1", "ps1", max_score=2, cell_type="code")
+            gb.add_grade_cell("written1", "p1", "ps1", max_score=4, cell_type="markdown")
+            gb.add_submission("ps1", "foo")
+            gb.find_grade("code1", "p1", "ps1", "foo").auto_score = 1
+            grade = gb.find_grade("written1", "p1", "ps1", "foo")
+            grade.manual_score = 3
+            grade.extra_credit = 0.5
+            gb.db.commit()
+        dispose_engines()
+
+        # the scores are computed by the migration that adds them, without
+        # `nbgrader db upgrade`
+        with _temp_alembic_ini(db) as alembic_ini:
+            check_call(["alembic", "-c", alembic_ini, "downgrade", "3f2b7c1d8e90"])
+            check_call(["alembic", "-c", alembic_ini, "upgrade", "head"])
+
+        with Gradebook(db) as gb:
+            notebook = gb.find_submission_notebook("p1", "ps1", "foo")
+            assert notebook.score == 4.5
+            assert notebook.code_score == 1
+            assert notebook.written_score == 3.5
+            assert notebook.failed_tests
+            assert notebook.needs_manual_grade
+            submission = gb.find_submission("ps1", "foo")
+            assert submission.score == 4.5
+            assert submission.code_score == 1
+            assert submission.needs_manual_grade
+            # and are included by the next incremental export
+            assert submission.score_last_modified is not None
+
     def test_upgrade_nodb(self, temp_cwd):
         # test upgrading without a database
         run_nbgrader(["db", "upgrade"])
@@ -1,6 +1,9 @@
+import csv
+import gzip
 import os
 
 from os.path import join
+from ...api import Gradebook
 from ...utils import remove
 from .. import run_nbgrader
 from .base import BaseTestApp
@@ -63,3 +66,64 @@ class TestNbGraderExport(BaseTestApp):
         with open("grades.csv", "r") as fh:
             contents = fh.readlines()
         assert len(contents) == 2
+
+    def test_export_gzip_per_cell(self, db, course_dir):
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        run_nbgrader(["db", "student", "add", "bar", "--db", db])
+
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        run_nbgrader(["generate_assignment", "ps1", "--db", db])
+        self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "submitted", "bar", "ps1", "p1.ipynb"))
+        run_nbgrader(["autograde", "ps1", "--db", db])
+
+        run_nbgrader(["export", "--db", db])
+        run_nbgrader(["export", "--db", db, "--to", "grades.csv.gz"])
+        with gzip.open("grades.csv.gz", "rt") as fh:
+            assert fh.read() == self._file_contents("grades.csv")
+
+        run_nbgrader(["export", "--db", db, "--per-cell", "--to", "cells.csv"])
+        with open("cells.csv", "r") as fh:
+            rows = list(csv.DictReader(fh))
+        with Gradebook(db) as gb:
+            grades = gb.find_submission_notebook("p1", "ps1", "bar").grades
+            assert len(rows) == len(grades)
+            assert sorted(row["cell"] for row in rows) == sorted(grade.name for grade in grades)
+            assert all(row["student_id"] == "bar" for row in rows)
+            assert sum(float(row["score"]) for row in rows) == gb.find_submission("ps1", "bar").score
+
+    def test_export_incremental(self, db, course_dir):
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        run_nbgrader(["db", "student", "add", "bar", "--db", db])
+
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        run_nbgrader(["generate_assignment", "ps1", "--db", db])
+        self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "submitted", "foo", "ps1", "p1.ipynb"))
+        self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "submitted", "bar", "ps1", "p1.ipynb"))
+        run_nbgrader(["autograde", "ps1", "--db", db])
+
+        # the first export contains everything
+        run_nbgrader(["export", "--db", db, "--watermark", "watermark.txt"])
+        assert os.path.isfile("watermark.txt")
+        with open("grades.csv", "r") as fh:
+            assert len(fh.readlines()) == 3
+
+        # nothing changed since then
+        run_nbgrader(["export", "--db", db, "--watermark", "watermark.txt"])
+        with open("grades.csv", "r") as fh:
+            assert len(fh.readlines()) == 1
+
+        with Gradebook(db) as gb:
+            grade = gb.find_submission_notebook("p1", "ps1", "bar").grades[0]
+            grade.manual_score = 0.5
+            gb.db.commit()
+
+        run_nbgrader(["export", "--db", db, "--watermark", "watermark.txt"])
+        with open("grades.csv", "r") as fh:
+            rows = list(csv.DictReader(fh))
+        assert [row["student_id"] for row in rows] == ["bar"]
+
+        run_nbgrader(["export", "--db", db, "--since", "2000-01-01 00:00:00 UTC"])
+        with open("grades.csv", "r") as fh:
+            assert len(fh.readlines()) == 3
@@ -91,3 +91,32 @@ class TestNbGraderFetchFeedback(BaseTestApp):
         assert os.path.isdir(join("ps1", "feedback", timestamp))
         assert os.path.isfile(join("ps1", "feedback", timestamp, 'p1.html'))
         assert os.path.isfile(join("ps1", "feedback", timestamp, 'p1.html'))
+
+    @notwindows
+    def test_shared_assets(self, db, course_dir, exchange, cache):
+        self._copy_file(join("files", "test.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        self._copy_file(join("files", "test.ipynb"), join(course_dir, "source", "ps1", "p2.ipynb"))
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db, "--duedate",
+                      "2015-02-02 14:58:23.948203 America/Los_Angeles"])
+        self._generate_assignment("ps1", course_dir, db)
+        self._release_and_fetch("ps1", exchange, cache, course_dir)
+        self._submit("ps1", exchange, cache)
+        self._collect("ps1", exchange)
+        run_nbgrader(["autograde", "ps1", "--create", "--db", db])
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--GenerateFeedback.shared_assets=True"])
+
+        username = os.environ["USER"]
+        feedback_dir = join(course_dir, "feedback", username, "ps1")
+        assets = [x for x in os.listdir(feedback_dir) if x.endswith(".css")]
+        assert len(assets) == 1
+        p1 = self._file_contents(join(feedback_dir, "p1.html"))
+        assert 'href="{}"'.format(assets[0]) in p1
+        assert len(p1) * 5 < os.path.getsize(join(feedback_dir, assets[0]))
+
+        run_nbgrader(["release_feedback", "ps1", "--Exchange.root={}".format(exchange), '--course', 'abc101'])
+        assert isfile(join(exchange, "abc101", "feedback", assets[0]))
+
+        run_nbgrader(["fetch_feedback", "ps1", "--Exchange.root={}".format(exchange), "--Exchange.cache={}".format(cache), '--course', 'abc101'])
+        timestamp = open(join(course_dir, "submitted", username, "ps1", "timestamp.txt")).read()
+        assert os.path.isfile(join("ps1", "feedback", timestamp, 'p1.html'))
+        assert os.path.isfile(join("ps1", "feedback", timestamp, assets[0]))
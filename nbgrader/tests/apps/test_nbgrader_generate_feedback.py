@@ -1,8 +1,10 @@
 import os
+import gzip
 import sys
 import pytest
 from os.path import join, exists, isfile
 
+from ...api import Gradebook
 from ...utils import remove
 from .. import run_nbgrader
 from .base import BaseTestApp
@@ -346,3 +348,128 @@ class TestNbGraderFeedback(BaseTestApp):
         assert exists(join(course_dir, "feedback", "foo", "ps1", "p2.html"))
         assert not exists(join(course_dir, "feedback", "bar", "ps1", "p1.html"))
         assert not exists(join(course_dir, "feedback", "bar", "ps1", "p2.html"))
+
+    def test_compressed_output(self, db, course_dir):
+        """Can feedback be generated from compressed autograded notebooks?"""
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        self._make_file(join(course_dir, "source", "ps1", "foo.txt"), "foo")
+        run_nbgrader(["generate_assignment", "ps1", "--db", db])
+
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "submitted", "foo", "ps1", "p1.ipynb"))
+        run_nbgrader(["autograde", "ps1", "--db", db, "--Autograde.compress_output=True"])
+        assert exists(join(course_dir, "autograded", "foo", "ps1", "p1.ipynb.gz"))
+        assert not exists(join(course_dir, "autograded", "foo", "ps1", "p1.ipynb"))
+
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--GenerateFeedback.compress_output=True"])
+        assert exists(join(course_dir, "feedback", "foo", "ps1", "p1.html.gz"))
+        assert exists(join(course_dir, "feedback", "foo", "ps1", "foo.txt"))
+        assert not exists(join(course_dir, "feedback", "foo", "ps1", "p1.html"))
+        assert not exists(join(course_dir, "feedback", "foo", "ps1", "p1.ipynb.gz"))
+
+        with gzip.open(join(course_dir, "feedback", "foo", "ps1", "p1.html.gz"), "rt") as fh:
+            assert "<html>" in fh.read()
+
+        # switching compression off replaces the compressed feedback
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--force"])
+        assert exists(join(course_dir, "feedback", "foo", "ps1", "p1.html"))
+        assert not exists(join(course_dir, "feedback", "foo", "ps1", "p1.html.gz"))
+
+    def test_workers(self, db, course_dir):
+        """Can feedback be generated with multiple worker processes?"""
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "source", "ps1", "p2.ipynb"))
+        run_nbgrader(["generate_assignment", "ps1", "--db", db])
+
+        students = ["foo", "bar", "baz"]
+        for student in students:
+            run_nbgrader(["db", "student", "add", student, "--db", db])
+            self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "submitted", student, "ps1", "p1.ipynb"))
+            self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "submitted", student, "ps1", "p2.ipynb"))
+        run_nbgrader(["autograde", "ps1", "--db", db])
+
+        run_nbgrader(["generate_feedback", "ps1", "--db", db])
+        serial = {}
+        for student in students:
+            for notebook in ["p1", "p2"]:
+                serial[student, notebook] = self._file_contents(join(course_dir, "feedback", student, "ps1", notebook + ".html"))
+
+        with Gradebook(db) as gb:
+            gb.db.execute("UPDATE submitted_notebook SET feedback_last_modified = NULL")
+            gb.db.commit()
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--force", "--GenerateFeedback.workers=2"])
+        for student in students:
+            for notebook in ["p1", "p2"]:
+                path = join(course_dir, "feedback", student, "ps1", notebook + ".html")
+                assert self._file_contents(path) == serial[student, notebook]
+
+        # the feedback rendered by the workers is recorded by the parent
+        with Gradebook(db) as gb:
+            for student in students:
+                for notebook in ["p1", "p2"]:
+                    submission = gb.find_submission_notebook(notebook, "ps1", student)
+                    assert submission.feedback_last_modified is not None
+                    assert submission.feedback_last_modified == submission.last_modified
+
+        # a failure only affects the submission that failed
+        self._make_file(join(course_dir, "autograded", "bar", "ps1", "p2.ipynb"), "not a notebook")
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--force", "--GenerateFeedback.workers=2"], retcode=1)
+        assert exists(join(course_dir, "feedback", "foo", "ps1", "p2.html"))
+        assert exists(join(course_dir, "feedback", "baz", "ps1", "p2.html"))
+        assert not exists(join(course_dir, "feedback", "bar", "ps1"))
+
+        # errors that stop the conversion are reported like without workers
+        self._copy_file(join("files", "submitted-changed.ipynb"), join(course_dir, "autograded", "bar", "ps1", "p2.ipynb"))
+        with Gradebook(db) as gb:
+            gb.db.execute("ALTER TABLE comment RENAME TO old_comment")
+            gb.db.commit()
+        output = run_nbgrader(["generate_feedback", "ps1", "--db", db, "--force", "--GenerateFeedback.workers=2"], retcode=1)
+        assert "nbgrader db upgrade" in output
+        assert "with 2 workers" in output
+        assert not exists(join(course_dir, "feedback", "bar", "ps1"))
+
+    def test_changed_grades(self, db, course_dir):
+        """Is feedback regenerated only for submissions whose grades changed?"""
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db])
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p2.ipynb"))
+        run_nbgrader(["generate_assignment", "ps1", "--db", db])
+
+        for student in ["foo", "bar"]:
+            run_nbgrader(["db", "student", "add", student, "--db", db])
+            for notebook in ["p1", "p2"]:
+                self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "submitted", student, "ps1", notebook + ".ipynb"))
+        run_nbgrader(["autograde", "ps1", "--db", db])
+        run_nbgrader(["generate_feedback", "ps1", "--db", db])
+
+        def feedback(student, notebook):
+            return self._file_contents(join(course_dir, "feedback", student, "ps1", notebook + ".html"))
+
+        original = {(s, n): feedback(s, n) for s in ["foo", "bar"] for n in ["p1", "p2"]}
+        for s in ["foo", "bar"]:
+            for n in ["p1", "p2"]:
+                self._make_file(join(course_dir, "feedback", s, "ps1", n + ".html"), "stale")
+
+        # nothing has changed, so nothing is regenerated
+        run_nbgrader(["generate_feedback", "ps1", "--db", db])
+        assert feedback("foo", "p1") == "stale"
+
+        with Gradebook(db) as gb:
+            comment = gb.find_comment("set_a", "p2", "ps1", "foo")
+            comment.manual_comment = "good job"
+            gb.db.commit()
+
+        run_nbgrader(["generate_feedback", "ps1", "--db", db])
+        assert feedback("foo", "p1") == "stale"
+        assert feedback("bar", "p1") == "stale"
+        assert feedback("bar", "p2") == "stale"
+        assert feedback("foo", "p2") != original["foo", "p2"]
+        assert "good job" in feedback("foo", "p2")
+
+        # the regenerated feedback is now up to date
+        self._make_file(join(course_dir, "feedback", "foo", "ps1", "p2.html"), "stale")
+        run_nbgrader(["generate_feedback", "ps1", "--db", db])
+        assert feedback("foo", "p2") == "stale"
@@ -45,6 +45,28 @@ class TestNbGraderReleaseFeedback(BaseTestApp):
         # release feedback should overwrite without error
         run_nbgrader(["release_feedback", "ps1", "--Exchange.root={}".format(exchange), '--course', 'abc101'])
 
+    @notwindows
+    def test_compressed_feedback(self, db, course_dir, exchange):
+        """Is compressed feedback released uncompressed?"""
+        run_nbgrader(["db", "assignment", "add", "ps1", "--db", db, "--duedate",
+                      "2015-02-02 14:58:23.948203 America/Los_Angeles"])
+        run_nbgrader(["db", "student", "add", "foo", "--db", db])
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), join(course_dir, "source", "ps1", "p1.ipynb"))
+        run_nbgrader(["assign", "ps1", "--db", db])
+        nb_path = join(course_dir, "submitted", "foo", "ps1", "p1.ipynb")
+        self._copy_file(join("files", "submitted-unchanged.ipynb"), nb_path)
+        self._copy_file(join("files", "timestamp.txt"), join(course_dir, "submitted", "foo", "ps1", "timestamp.txt"))
+
+        run_nbgrader(["autograde", "ps1", "--db", db, "--Autograde.compress_output=True"])
+        run_nbgrader(["generate_feedback", "ps1", "--db", db, "--GenerateFeedback.compress_output=True"])
+        assert exists(join(course_dir, "feedback", "foo", "ps1", "p1.html.gz"))
+
+        run_nbgrader(["release_feedback", "ps1", "--Exchange.root={}".format(exchange), '--course', 'abc101'])
+        unique_key = make_unique_key("abc101", "ps1", "p1", "foo", "2019-05-30 11:44:01.911849 UTC")
+        nb_hash = notebook_hash(nb_path, unique_key)
+        released = join(exchange, "abc101", "feedback", "{}.html".format(nb_hash))
+        assert "<html>" in self._file_contents(released)
+
     @notwindows
     def test_single_student(self, db, course_dir, exchange):
         """Can feedback be generated for an unchanged assignment?"""
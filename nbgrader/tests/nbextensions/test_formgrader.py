@@ -1,5 +1,6 @@
 import pytest
 import os
+import requests
 import shutil
 import sys
 import time
@@ -1415,3 +1416,23 @@ def test_edit_student(browser, port, gradebook):
     assert row.find_element_by_css_selector(".email").text == "ela@email.net"
     assert row.find_element_by_css_selector(".score").text == "0 / 23"
     assert utils._child_exists(row, ".edit a")
+
+
+@pytest.mark.nbextensions
+def test_change_feed(port, gradebook):
+    url = utils._formgrade_url(port, "api/changes")
+
+    response = requests.get(url, params={"limit": 2})
+    assert response.status_code == 200
+    changes = response.json()
+    assert len(changes["changes"]) == 2
+    assert changes["cursor"] == changes["changes"][-1]["id"]
+
+    response = requests.get(url, params={"since": changes["cursor"], "limit": 1})
+    assert response.status_code == 200
+    assert [x["id"] for x in response.json()["changes"]] == [changes["cursor"] + 1]
+
+    # the limit must be between 1 and the maximum
+    for limit in ["0", "-1", "1001", "all"]:
+        response = requests.get(url, params={"limit": limit})
+        assert response.status_code == 400
@@ -0,0 +1,91 @@
+import io
+import os
+import pytest
+
+from nbformat import write, read
+from nbformat.v4 import new_notebook, new_output
+from ...nbgraderformat.stream import read_stripped, stream_cells
+from .. import (
+    create_grade_cell,
+    create_solution_cell,
+    create_regular_cell)
+
+
+def _make_notebook():
+    nb = new_notebook()
+    nb.metadata["kernelspec"] = {"name": "python3", "display_name": "Python 3", "language": "python"}
+    cell = create_grade_cell("assert x == 1\n# a \"quoted\" {brace} [bracket]", "code", "foo", 2)
+    cell.outputs = [
+        new_output("stream", name="stdout", text="hello\n" * 10000),
+        new_output("display_data", data={"image/png": "A" * 200000, "text/plain": "<Figure>"})
+    ]
+    nb.cells.append(cell)
+    nb.cells.append(create_solution_cell("this is\nthe answer", "markdown", "bar"))
+    nb.cells[-1].attachments = {"a.png": {"image/png": "B" * 1000}}
+    nb.cells.append(create_regular_cell("print('\\u00e9')", "code"))
+    return nb
+
+
+@pytest.fixture
+def notebook_path(temp_cwd):
+    path = os.path.join(os.getcwd(), "test.ipynb")
+    with io.open(path, mode="w", encoding="utf-8") as fh:
+        write(_make_notebook(), fh)
+    return path
+
+
+@pytest.fixture
+def temp_cwd(tmpdir):
+    orig_dir = os.getcwd()
+    os.chdir(str(tmpdir))
+    yield str(tmpdir)
+    os.chdir(orig_dir)
+
+
+def test_read_stripped(notebook_path):
+    full = read(notebook_path, as_version=4)
+    nb = read_stripped(notebook_path)
+
+    assert nb.nbformat == full.nbformat
+    assert nb.metadata == full.metadata
+    assert len(nb.cells) == len(full.cells)
+    for cell, full_cell in zip(nb.cells, full.cells):
+        assert cell.cell_type == full_cell.cell_type
+        assert cell.source == full_cell.source
+        assert cell.metadata == full_cell.metadata
+        assert "attachments" not in cell
+        if cell.cell_type == "code":
+            assert cell.outputs == []
+
+
+def test_read_stripped_keep_outputs(notebook_path):
+    full = read(notebook_path, as_version=4)
+    nb = read_stripped(notebook_path, skip=())
+    assert nb == full
+
+
+def test_read_stripped_small_chunks(notebook_path, monkeypatch):
+    monkeypatch.setattr("nbgrader.nbgraderformat.stream._CHUNK_SIZE", 7)
+    full = read(notebook_path, as_version=4)
+    nb = read_stripped(notebook_path)
+    assert [c.source for c in nb.cells] == [c.source for c in full.cells]
+    assert [c.metadata for c in nb.cells] == [c.metadata for c in full.cells]
+
+
+def test_stream_cells(notebook_path):
+    with io.open(notebook_path, encoding="utf-8") as fh:
+        cells = list(stream_cells(fh))
+
+    assert [c.cell_type for c in cells] == ["code", "markdown", "code"]
+    assert cells[0].metadata.nbgrader.grade_id == "foo"
+    assert cells[0].outputs == []
+    assert cells[1].source == "this is\nthe answer"
+    assert cells[2].source == "print('\\u00e9')"
+
+
+def test_read_stripped_invalid(temp_cwd):
+    path = os.path.join(temp_cwd, "bad.ipynb")
+    with open(path, "w") as fh:
+        fh.write('{"cells": [{"cell_type": "code", "source": "x"')
+    with pytest.raises(ValueError):
+        read_stripped(path)
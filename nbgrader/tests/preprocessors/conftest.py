@@ -3,6 +3,8 @@ import tempfile
 import os
 import shutil
 
+from ...api import dispose_engines
+
 
 @pytest.fixture
 def db(request):
@@ -10,6 +12,7 @@ def db(request):
     dbpath = os.path.join(path, "nbgrader_test.db")
 
     def fin():
+        dispose_engines()
         shutil.rmtree(path)
     request.addfinalizer(fin)
 
@@ -0,0 +1,98 @@
+import base64
+import io
+import pytest
+
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_output
+from ...preprocessors import CompactOutput
+from .base import BaseTestPreprocessor
+
+
+@pytest.fixture
+def preprocessor():
+    return CompactOutput(enabled=True)
+
+
+class TestCompactOutput(BaseTestPreprocessor):
+
+    def test_disabled_by_default(self):
+        assert not CompactOutput().enabled
+
+    def test_remove_large_html(self, preprocessor):
+        cell = new_code_cell(outputs=[
+            new_output("display_data", data={"text/html": "<td>x</td>" * 100000, "text/plain": "table"})
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        output, = cell.outputs
+        assert output.data == {"text/plain": "table\n... Output truncated ..."}
+
+    def test_keep_small_outputs(self, preprocessor):
+        cell = new_code_cell(outputs=[
+            new_output("display_data", data={"text/html": "<b>hi</b>", "text/plain": "hi"}),
+            new_output("stream", name="stdout", text="hello\n")
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        assert cell.outputs[0].data == {"text/html": "<b>hi</b>", "text/plain": "hi"}
+        assert cell.outputs[1].text == "hello\n"
+
+    def test_per_mimetype_limits(self, preprocessor):
+        preprocessor.max_sizes = {"*": 10}
+        cell = new_code_cell(outputs=[
+            new_output("execute_result", data={"application/json": {"a": "b" * 20}, "text/plain": "0.5"}, execution_count=1)
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        output, = cell.outputs
+        assert "application/json" not in output.data
+        assert output.data["text/plain"].startswith("0.5")
+
+    def test_remove_redundant_mimetypes(self, preprocessor):
+        cell = new_code_cell(outputs=[
+            new_output("display_data", data={"image/png": "AAAA", "text/html": "<img>", "text/plain": "<Figure>"})
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        output, = cell.outputs
+        assert output.data == {"image/png": "AAAA", "text/plain": "<Figure>"}
+
+    def test_keep_redundant_mimetypes(self, preprocessor):
+        preprocessor.redundant_mimetypes = []
+        data = {"image/png": "AAAA", "text/html": "<img>", "text/plain": "<Figure>"}
+        cell = new_code_cell(outputs=[new_output("display_data", data=dict(data))])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        assert cell.outputs[0].data == data
+
+    def test_remove_duplicate_outputs(self, preprocessor):
+        cell = new_code_cell(outputs=[
+            new_output("display_data", data={"image/png": "AAAA", "text/plain": "<Figure>"}),
+            new_output("display_data", data={"image/png": "BBBB", "text/plain": "<Figure>"}),
+            new_output("display_data", data={"image/png": "AAAA", "text/plain": "<Figure>"})
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        assert [o.data["image/png"] for o in cell.outputs] == ["AAAA", "BBBB"]
+
+    def test_markdown_cell_unchanged(self, preprocessor):
+        cell = new_markdown_cell("foo")
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+        assert cell.source == "foo"
+
+    def test_recompress_image(self, preprocessor):
+        Image = pytest.importorskip("PIL.Image")
+        buf = io.BytesIO()
+        Image.effect_noise((2000, 2000), 100).convert("RGB").save(buf, format="PNG")
+        data = base64.b64encode(buf.getvalue()).decode("ascii")
+
+        preprocessor.max_sizes = {"image/png": len(data) // 2}
+        preprocessor.max_image_dimension = 200
+        cell = new_code_cell(outputs=[
+            new_output("display_data", data={"image/png": data, "text/plain": "<Figure>"})
+        ])
+        cell, _ = preprocessor.preprocess_cell(cell, {}, 0)
+
+        output, = cell.outputs
+        assert output.data["text/plain"] == "<Figure>"
+        image = Image.open(io.BytesIO(base64.b64decode(output.data["image/png"])))
+        assert max(image.size) == 200
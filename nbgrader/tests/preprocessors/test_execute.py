@@ -0,0 +1,109 @@
+import pytest
+
+from nbformat.v4 import new_notebook, new_code_cell
+from ...preprocessors import Execute, LimitOutput
+from .base import BaseTestPreprocessor
+
+
+@pytest.fixture
+def preprocessor():
+    pp = Execute()
+    pp.clear_before_next_output = False
+    pp._display_id_map = {}
+    pp._reset_output_limits()
+    return pp
+
+
+def _stream(text):
+    return {
+        "msg_type": "stream",
+        "header": {"msg_type": "stream"},
+        "content": {"name": "stdout", "text": text}
+    }
+
+
+def _display(data):
+    return {
+        "msg_type": "display_data",
+        "header": {"msg_type": "display_data"},
+        "content": {"data": data, "metadata": {}}
+    }
+
+
+class TestExecute(BaseTestPreprocessor):
+
+    def test_limit_stream_lines(self, preprocessor):
+        preprocessor.max_output_lines = 9
+        outs = []
+        for i in range(20):
+            preprocessor.output(outs, _stream("{}\n".format(i)), None, 0)
+
+        text = "".join(out.text for out in outs)
+        assert len(outs) == 5
+        assert text.split("\n") == ["0", "1", "2", "3", "... Output truncated ..."]
+
+    def test_limit_stream_lines_matches_limit_output(self, preprocessor):
+        preprocessor.max_output_lines = -1
+        full = []
+        for i in range(50):
+            preprocessor.output(full, _stream("a\nb\n" * i), None, 0)
+        cell = new_code_cell(outputs=full)
+        limited = LimitOutput(max_lines=100)._limit_stream_output(cell).outputs
+
+        preprocessor.max_output_lines = 100
+        preprocessor._reset_output_limits()
+        outs = []
+        for i in range(50):
+            preprocessor.output(outs, _stream("a\nb\n" * i), None, 0)
+
+        assert outs == limited
+
+    def test_limit_stream_chars(self, preprocessor):
+        preprocessor.max_output_chars = 15
+        outs = []
+        for i in range(10):
+            preprocessor.output(outs, _stream("xxxxxxxxxx"), None, 0)
+
+        assert len(outs) == 2
+        assert outs[1].text == "xxxxx\n... Output truncated ..."
+
+    def test_limit_display_outputs(self, preprocessor):
+        preprocessor.max_display_outputs = 2
+        outs = []
+        for i in range(5):
+            preprocessor.output(outs, _display({"text/plain": str(i)}), None, 0)
+
+        assert len(outs) == 3
+        assert outs[0].data == {"text/plain": "0"}
+        assert outs[2].data == {"text/plain": "... Output truncated ..."}
+
+    def test_limit_image_size(self, preprocessor):
+        preprocessor.max_image_size = 100
+        outs = []
+        preprocessor.output(outs, _display({"image/png": "A" * 10, "text/plain": "small"}), None, 0)
+        preprocessor.output(outs, _display({"image/png": "A" * 1000, "text/plain": "large"}), None, 0)
+
+        assert outs[0].data == {"image/png": "A" * 10, "text/plain": "small"}
+        assert outs[1].data == {"text/plain": "... Output truncated ..."}
+
+    def test_clear_output_resets_limits(self, preprocessor):
+        preprocessor.max_output_lines = 3
+        outs = []
+        for i in range(5):
+            preprocessor.output(outs, _stream("{}\n".format(i)), None, 0)
+        preprocessor.clear_output(outs, {"content": {"wait": False}}, 0)
+        assert outs == []
+
+        preprocessor.output(outs, _stream("foo\n"), None, 0)
+        assert [out.text for out in outs] == ["foo\n"]
+
+    def test_execute_long_output(self):
+        nb = new_notebook()
+        nb.metadata["kernelspec"] = {"name": "python", "display_name": "Python", "language": "python"}
+        nb.cells.append(new_code_cell("for i in range(5000):\n    print(i)"))
+
+        nb, resources = Execute(max_output_lines=100).preprocess(nb, {})
+        text = "".join(out.text for out in nb.cells[0].outputs if out.output_type == "stream")
+        lines = text.split("\n")
+        assert len(lines) <= 100
+        assert lines[-1] == "... Output truncated ..."
@@ -1,4 +1,5 @@
 import pytest
+import sqlalchemy
 
 from nbformat.v4 import new_notebook, new_output
 
@@ -214,3 +215,30 @@ class TestSaveAutoGrades(BaseTestPreprocessor):
 
         gradebook.db.refresh(comment)
         assert comment.auto_comment is None
+
+    def test_find_grades_at_once(self, preprocessors, gradebook, resources):
+        """Are the grades and comments looked up once per notebook?"""
+        nb = new_notebook()
+        for i in range(5):
+            cell = create_grade_and_solution_cell("hello", "markdown", "foo{}".format(i), 1)
+            cell.metadata.nbgrader['checksum'] = compute_checksum(cell)
+            nb.cells.append(cell)
+        preprocessors[0].preprocess(nb, resources)
+        gradebook.add_submission("ps0", "bar")
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "JOIN" in statement:
+                statements.append(statement)
+
+        sqlalchemy.event.listen(gradebook.engine, "before_cursor_execute", record)
+        try:
+            preprocessors[1].preprocess(nb, resources)
+        finally:
+            sqlalchemy.event.remove(gradebook.engine, "before_cursor_execute", record)
+        assert len([x for x in statements if "base_cell.name" in x]) == 2
+
+        for i in range(5):
+            comment = gradebook.find_comment("foo{}".format(i), "test", "ps0", "bar")
+            assert comment.auto_comment == "No response."
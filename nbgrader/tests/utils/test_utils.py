@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import os
+import gzip
 import pytest
 import tempfile
 import shutil
@@ -376,6 +377,22 @@ def test_find_all_files(temp_cwd):
         join(".", "foo", "bar", "baz.txt")]
 
 
+def test_find_stored_file(temp_cwd):
+    assert utils.find_stored_file("foo.html") is None
+
+    with gzip.open("foo.html.gz", "wt") as fh:
+        fh.write(u"café")
+    assert utils.find_stored_file("foo.html") == "foo.html.gz"
+    with utils.open_stored_file("foo.html.gz") as fh:
+        assert fh.read() == u"café"
+
+    with open("foo.html", "w") as fh:
+        fh.write("bar")
+    assert utils.find_stored_file("foo.html") == "foo.html"
+    with utils.open_stored_file("foo.html") as fh:
+        assert fh.read() == "bar"
+
+
 def test_unzip_invalid_ext(temp_cwd):
     with open(join("baz.txt"), "w") as fh:
         pass
@@ -1,5 +1,7 @@
 import os
 import io
+import re
+import gzip
 import hashlib
 import dateutil.parser
 import glob
@@ -395,6 +397,52 @@ def remove(path: str) -> None:
     os.remove(path)
 
 
+#: Extension appended to notebooks and feedback files that are stored compressed
+COMPRESSED_EXTENSION = ".gz"
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(COMPRESSED_EXTENSION)
+
+
+def find_stored_file(path: str) -> Optional[str]:
+    """Find a file that may have been written in compressed form. Returns
+    ``path`` if it exists, otherwise the compressed version of ``path`` if
+    that exists, and otherwise None.
+
+    """
+    if os.path.exists(path):
+        return path
+    compressed = path + COMPRESSED_EXTENSION
+    if os.path.exists(compressed):
+        return compressed
+    return None
+
+
+def open_stored_file(path: str, mode: str = "r") -> Any:
+    """Open a file that may be stored in compressed form, decompressing it
+    transparently. Text mode always uses UTF-8."""
+    if is_compressed(path):
+        if "b" in mode:
+            return gzip.open(path, mode)
+        return gzip.open(path, mode.replace("t", "") + "t", encoding="utf-8")
+    if "b" in mode:
+        return io.open(path, mode)
+    return io.open(path, mode, encoding="utf-8")
+
+
+#: Pattern of the names of the shared asset files that feedback may refer to
+FEEDBACK_ASSET_PATTERN = r"feedback-[0-9a-f]{16}\.css"
+
+
+def find_feedback_assets(path: str) -> List[str]:
+    """Find the names of the shared asset files (which are stored next to
+    the feedback file) referred to by a (possibly compressed) feedback file."""
+    with open_stored_file(path) as fh:
+        html = fh.read()
+    return sorted(set(re.findall(r'href="({})"'.format(FEEDBACK_ASSET_PATTERN), html)))
+
+
 def unzip(src, dest, zip_ext=None, create_own_folder=False, tree=False):
     """Extract all content from an archive file to a destination folder.
 
@@ -534,7 +582,9 @@ def capture_log(app, fmt="[%(levelname)s] %(message)s"):
 
 def notebook_hash(path, unique_key=None):
     m = hashlib.md5()
-    m.update(open(path, 'rb').read())
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            m.update(chunk)
     if unique_key:
         m.update(to_bytes(unique_key))
     return m.hexdigest()
@@ -8,6 +8,7 @@ from textwrap import fill, dedent
 from nbconvert.filters import ansi2html, strip_ansi
 
 from .preprocessors import Execute, ClearOutput, CheckCellMetadata
+from .nbgraderformat import read_stripped
 from . import utils
 from nbformat.notebooknode import NotebookNode
 import typing
@@ -292,12 +293,26 @@ class Validator(LoggingConfigurable):
                 nb, resources = pp.preprocess(nb, resources)
         return nb
 
+    def _discards_outputs(self) -> bool:
+        # Existing outputs are never looked at if they are cleared before
+        # anything other than the metadata checks runs, in which case the
+        # notebook can be read without them.
+        for preprocessor in self.preprocessors:
+            if issubclass(preprocessor, ClearOutput):
+                return True
+            if not issubclass(preprocessor, CheckCellMetadata):
+                return False
+        return False
+
     def validate(self, filename: str) -> typing.Dict[str, typing.List[typing.Dict[str, str]]]:
         self.log.info("Validating '{}'".format(os.path.abspath(filename)))
         basename = os.path.basename(filename)
         dirname = os.path.dirname(filename)
         with utils.chdir(dirname):
-            nb = read_nb(basename, as_version=current_nbformat)
+            if self._discards_outputs():
+                nb = read_stripped(basename)
+            else:
+                nb = read_nb(basename, as_version=current_nbformat)
 
         type_changed = self._get_type_changed_cells(nb)
         if len(type_changed) > 0:
@@ -101,7 +101,11 @@ setup_args = dict(
         "jsonschema",
         "alembic",
         "fuzzywuzzy"
-    ]
+    ],
+    extras_require={
+        # score matrices and late penalty simulations
+        "analysis": ["numpy", "pandas"]
+    }
 )
 
 if __name__ == "__main__":
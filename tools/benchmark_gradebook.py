@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Time common gradebook queries on a generated database.
+
+The database is filled with one assignment per ``--assignments``, each with
+``--notebooks`` notebooks and a submission from each of ``--students``
+students. Each query is timed with and without the lookup indexes on the
+foreign key columns (see ``nbgrader/alembic/versions``), so that the effect
+of the indexes can be compared.
+
+Usage:
+
+    python tools/benchmark_gradebook.py [--students 1000] [--assignments 1]
+        [--notebooks 2] [--repeat 3] [--db gradebook.db]
+
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+from nbgrader.api import Gradebook, Base, dispose_engines
+
+
+def populate(gb, n_assignments, n_notebooks, n_students):
+    for i in range(n_students):
+        gb.add_student("s{}".format(i + 1))
+
+    for i in range(n_assignments):
+        assignment = "a{}".format(i + 1)
+        gb.add_assignment(assignment)
+        for j in range(n_notebooks):
+            notebook = "n{}".format(j + 1)
+            gb.add_notebook(notebook, assignment)
+            gb.add_solution_cell("solution1", notebook, assignment)
+            gb.add_source_cell("solution1", notebook, assignment, cell_type="code")
+            gb.add_source_cell("source1", notebook, assignment, cell_type="markdown")
+            gb.add_grade_cell("code1", notebook, assignment, cell_type="code", max_score=2)
+            gb.add_grade_cell("code2", notebook, assignment, cell_type="code", max_score=3)
+            gb.add_grade_cell("written1", notebook, assignment, cell_type="markdown", max_score=5)
+            gb.add_task_cell("task1", notebook, assignment, cell_type="markdown", max_score=5)
+
+        for k in range(n_students):
+            gb.add_submission(assignment, "s{}".format(k + 1))
+
+
+def indexes(gb):
+    return [
+        (index.name, table.name)
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes]
+
+
+def run_queries(gb, args):
+    last_student = "s{}".format(args.students)
+    queries = [
+        ("find_grade", lambda: gb.find_grade("code2", "n1", "a1", last_student)),
+        ("submission_dicts", lambda: gb.submission_dicts("a1")),
+        ("notebook_submission_dicts", lambda: gb.notebook_submission_dicts("n1", "a1")),
+    ]
+    results = {}
+    for name, query in queries:
+        # expire everything so that each run goes to the database
+        def run():
+            gb.db.expire_all()
+            query()
+        results[name] = min(timeit.repeat(run, number=1, repeat=args.repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--assignments", type=int, default=1)
+    parser.add_argument("--notebooks", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default=None, help="reuse (or create) this database file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        if args.db:
+            path = os.path.abspath(args.db)
+            copy = os.path.join(tmpdir, "gradebook.db")
+        else:
+            path = os.path.join(tmpdir, "gradebook.db")
+            copy = None
+
+        if not os.path.exists(path):
+            print("Generating {} students...".format(args.students))
+            with Gradebook("sqlite:///" + path) as gb:
+                populate(gb, args.assignments, args.notebooks, args.students)
+            dispose_engines()
+        if copy:
+            # the indexes are dropped below, so do not touch the original
+            shutil.copy(path, copy)
+            path = copy
+
+        with Gradebook("sqlite:///" + path) as gb:
+            with_indexes = run_queries(gb, args)
+            for name, _ in indexes(gb):
+                gb.db.execute("DROP INDEX IF EXISTS {}".format(name))
+            gb.db.commit()
+            without_indexes = run_queries(gb, args)
+        dispose_engines()
+
+        print("{:<28}{:>14}{:>14}".format("query", "indexed (s)", "no index (s)"))
+        for name in with_indexes:
+            print("{:<28}{:>14.4f}{:>14.4f}".format(
+                name, with_indexes[name], without_indexes[name]))
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()